@@ -1,5 +1,5 @@
 from enum import Enum
-import arcade
+import util.keys as keys
 
 
 class Actions(Enum):
@@ -33,23 +33,23 @@ class PlayerActions(Enum):
 
 
 DEFAULT_MAP = {
-    arcade.key.W: Actions.MOVE_UP,
-    arcade.key.A: Actions.MOVE_LEFT,
-    arcade.key.S: Actions.MOVE_DOWN,
-    arcade.key.D: Actions.MOVE_RIGHT,
-
-    arcade.key.RIGHT: Actions.LOOK_RIGHT,
-    arcade.key.LEFT: Actions.LOOK_LEFT,
-
-    arcade.key.SPACE: Actions.SHORT_ATTACK,
-    arcade.key.LSHIFT: Actions.LONG_ATTACK,
-    arcade.key.Q: Actions.USE_SHIELD,
-
-    arcade.key.ESCAPE: PlayerActions.END_GAME,
-    arcade.key.BACKSPACE: PlayerActions.END_ROUND,
-    arcade.key.BRACKETLEFT: PlayerActions.SHOW_ALL_MATCH_UPS,
-    arcade.key.BRACKETRIGHT: PlayerActions.SHOW_CONNECTIONS,
-    arcade.key.BACKSLASH: PlayerActions.SHOW_TRACERS,
-    arcade.key.N: PlayerActions.SHOW_NETWORKS,
-    arcade.key.P: PlayerActions.SPEED_UP
+    keys.W: Actions.MOVE_UP,
+    keys.A: Actions.MOVE_LEFT,
+    keys.S: Actions.MOVE_DOWN,
+    keys.D: Actions.MOVE_RIGHT,
+
+    keys.RIGHT: Actions.LOOK_RIGHT,
+    keys.LEFT: Actions.LOOK_LEFT,
+
+    keys.SPACE: Actions.SHORT_ATTACK,
+    keys.LSHIFT: Actions.LONG_ATTACK,
+    keys.Q: Actions.USE_SHIELD,
+
+    keys.ESCAPE: PlayerActions.END_GAME,
+    keys.BACKSPACE: PlayerActions.END_ROUND,
+    keys.BRACKETLEFT: PlayerActions.SHOW_ALL_MATCH_UPS,
+    keys.BRACKETRIGHT: PlayerActions.SHOW_CONNECTIONS,
+    keys.BACKSLASH: PlayerActions.SHOW_TRACERS,
+    keys.N: PlayerActions.SHOW_NETWORKS,
+    keys.P: PlayerActions.SPEED_UP
 }
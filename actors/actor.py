@@ -1,6 +1,7 @@
 import math
 from typing import Union, Tuple, List, Callable
 from environments.environment import *
+from util.geometry import *
 
 # Base Stats
 BASE_MOVEMENT_SPEED = 100
@@ -24,8 +25,7 @@ def find_intersection(x1, y1, x2, y2, x3, y3, x4, y4):
 
 
 def dist_squared(p1, p2):
-    return math.pow(p1[0]-p2[0], 2) + \
-        math.pow(p1[1]-p2[1], 2)
+    return raw_dist_squared(p1[0], p1[1], p2[0], p2[1])
 
 
 class Actor:
@@ -157,53 +157,33 @@ class Actor:
         """Adds the given 'updater' to the direction & normalizes the value."""
         self.set_direc(self.direc + updater)
 
-    def raw_dist_squared(self, pos: Tuple[int] = None, actor: 'Actor' = None):
-        """Returns the raw distance squared between this Actor & the given position / Actor."""
+    def get_target_pos(self, pos: Tuple[int] = None, actor: 'Actor' = None):
+        """Returns the given position, or the position of the given Actor."""
 
-        assert pos != None or actor != None, 'Can\'t compute the distance between None & None.'
-        assert not(pos != None and actor !=
-                   None), 'Can only compute the distance between a position or an actor, not both.'
+        assert pos is not None or actor is not None, 'Can\'t compute the distance between None & None.'
+        assert pos is None or actor is None, \
+            'Can only compute the distance between a position or an actor, not both.'
 
-        position = pos if pos != None else actor.get_pos()
+        return pos if pos is not None else actor.pos
 
-        return dist_squared(self.pos, position)
+    def raw_dist_squared(self, pos: Tuple[int] = None, actor: 'Actor' = None):
+        """Returns the raw distance squared between this Actor & the given position / Actor."""
+        position = self.get_target_pos(pos, actor)
+        return raw_dist_squared(self.pos[0], self.pos[1], position[0], position[1])
 
     def dist_squared(self, pos: Tuple[int] = None, actor: 'Actor' = None):
         """Returns the donut-compensated distance squared between this Actor & the given position / Actor."""
-        raw_dist = self.raw_dist_squared(pos, actor)
-        alt_dist = abs(max(SCREEN_WIDTH, SCREEN_HEIGHT) ** 2 - raw_dist)
-
-        return min(raw_dist, alt_dist)
+        position = self.get_target_pos(pos, actor)
+        return compensate_dist_squared(
+            raw_dist_squared(self.pos[0], self.pos[1], position[0], position[1]))
 
     def angle_to(self, pos: Tuple[int] = None, actor: 'Actor' = None):
         """
         Get the required direction to be looking at (in radians) the given position.
         """
 
-        assert pos != None or actor != None, 'Can\'t compute the distance between None & None.'
-        assert not(pos != None and actor !=
-                   None), 'Can only compute the distance between a position or an actor, not both.'
-
-        position = pos if pos != None else actor.get_pos()
-
-        vec = (
-            self.pos[0] - position[0],
-            self.pos[1] - position[1]
-        )
-
-        d = math.atan2(vec[1], vec[0]) + (math.pi)
-
-        if d < 0:
-            # Convert to [0, 2pi] range
-            d = math.pi + (-d)
-
-        raw_dist = self.raw_dist_squared(pos, actor)
-        alt_dist = max(SCREEN_WIDTH, SCREEN_HEIGHT) ** 2 - raw_dist
-
-        if alt_dist < raw_dist:
-            d += math.pi
-
-        return d % (2*math.pi)
+        position = self.get_target_pos(pos, actor)
+        return angle_between(self.pos[0], self.pos[1], position[0], position[1])
 
     def update(self, delta_time) -> float:
         """
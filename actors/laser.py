@@ -1,10 +1,9 @@
 from typing import List, Tuple
 from actors.actor import *
-import arcade
+import util.colors as colors
 import numpy as np
 
 LENGTH = 30
-WIDTH = 5
 
 
 class Laser(Actor):
@@ -34,7 +33,7 @@ class Laser(Actor):
         min_life_span: float = 0,
         max_life_span: float = 500,
         damage: float = 8,
-        color: tuple = arcade.color.RED
+        color: tuple = colors.RED
     ):
         """
         Args:
@@ -94,23 +93,6 @@ class Laser(Actor):
         if self.traveled > self.max_life_span:
             self.kill()
 
-    def draw(self, specific_color=None):
-        if self.is_dead:
-            return
-
-        color = self.color
-
-        # If it has a min life span, color it differently when less than.
-        if self.traveled < self.min_life_span:
-            color = arcade.color.RED_DEVIL
-
-        if specific_color != None:
-            color = specific_color
-
-        hp = self.get_head_position()
-        arcade.draw_line(self.pos[0], self.pos[1],
-                         hp[0], hp[1], color, WIDTH)
-
     def get_dist_if_in_path(self, C, r):
         """
         This method takes in the center & radius of a circle, and determines weather it's in
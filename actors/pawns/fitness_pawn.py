@@ -9,24 +9,51 @@ class FitnessPawn(Pawn):
     total_attacks: int = 1
     total_hits_taken: int = 1
 
-    def calculate_fitness(self):
+    # Cached fitness, recomputed whenever a counter changes.
+    fitness: float = 0
+
+    def compute_fitness(self):
         hit_rate = self.total_hits / (math.log(self.total_attacks) + 0.1)
         fit = hit_rate * HIT_RATE_COEFFICIENT - math.log(self.total_hits_taken)
         return max(0, fit)
 
+    def update_fitness(self):
+        """
+        Recomputes the cached fitness & reports it to the fitness listener.
+        MUST be called after writing the counters directly.
+        """
+        self.fitness = self.compute_fitness()
+
+        if self.fitness_listener is not None:
+            self.fitness_listener.on_fitness_changed(self)
+
+    def set_fitness(self, fitness: float):
+        """Overrides the cached fitness (e.g. with a cached evaluation) & reports it to the fitness listener."""
+        self.fitness = fitness
+
+        if self.fitness_listener is not None:
+            self.fitness_listener.on_fitness_changed(self)
+
+    def calculate_fitness(self):
+        return self.fitness
+
     def log_hit(self):
         self.total_hits += 1
+        self.update_fitness()
 
     def long_attack(self):
         if super().long_attack():
             self.total_attacks += 1
+            self.update_fitness()
 
     def short_attack(self):
         if super().short_attack():
             self.total_attacks += 1
+            self.update_fitness()
 
     def take_damage(self, amount):
         self.total_hits_taken += 1
+        self.update_fitness()
         return super().take_damage(amount)
 
     def kill(self):
@@ -37,5 +64,6 @@ class FitnessPawn(Pawn):
         self.total_hits = 0
         self.total_attacks = 1
         self.total_hits_taken = 1
+        self.update_fitness()
 
         super().reset()
@@ -1,5 +1,4 @@
 from actors import actor
-import arcade
 import random
 from enum import Enum
 from util.match_up import *
@@ -7,22 +6,13 @@ from environments.environment import *
 from controllers.controller import *
 import math
 from actors.laser import *
-from typing import Set, Tuple
+from util.laser_pool import *
+from typing import Dict, Tuple
 from util.cooldown import *
 import util.stat_biases as SB
 
-HALF_PI = math.pi / 2
-
 DEFAULT_START_POS = (SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
 
-HEALTH_BAR_HEIGHT = 20
-HEALTH_BAR_MAX_WIDTH = 60
-
-# Determines how wide the base of the aiming cone should be.
-LEG_BASE = BODY_RADIUS * 0.75
-# Determines how far the end of the aiming cone should be.
-CONE_END = BODY_RADIUS * 1.4
-
 
 class StartTypes(Enum):
     RANDOM_START = 1
@@ -49,13 +39,26 @@ class Pawn(actor.Actor):
     # Constants
     max_outward_bound: int = BODY_RADIUS
 
+    # Random stream for starts, replaced by the match up's own stream when seeded.
+    rng = random
+
     # Laser Stuff
-    lasers: Set[Laser] = None
+    lasers: Dict[Laser, None] = None  # Used as an ordered set
     laser_cooldown = None
 
+    # Incremented whenever lasers are added to or removed from 'lasers' (invalidates MatchUp queries).
+    laser_version: int = 0
+
+    # If set, lasers are spawned into this pool instead of the 'lasers' set.
+    laser_pool: LaserPool = None
+    laser_owner: int = -1
+
     controller: Controller
     stat_bias: SB.StatBias
 
+    # Notified whenever a FitnessPawn's fitness changes (its MatchUp).
+    fitness_listener = None
+
     def __init__(
         self,
         start_pos_type=StartTypes.RANDOM_START,
@@ -90,7 +93,11 @@ class Pawn(actor.Actor):
         sb: SB.StatBias = self.stat_bias
 
         self.vel = [0, 0]
-        self.lasers = set()
+        self.lasers = dict()
+        self.laser_version += 1
+
+        if self.laser_pool is not None:
+            self.laser_pool.kill_owner(self.laser_owner)
         self.shield_on = False
         self.is_dead = False
 
@@ -101,10 +108,10 @@ class Pawn(actor.Actor):
         if self.start_pos_type == StartTypes.RANDOM_START:
             # randomly init position & direc
             self.set_pos(
-                (SCREEN_WIDTH * random.random(), SCREEN_HEIGHT * random.random())
+                (SCREEN_WIDTH * self.rng.random(), SCREEN_HEIGHT * self.rng.random())
             )
 
-            self.set_direc(math.pi * random.random() * 2)
+            self.set_direc(math.pi * self.rng.random() * 2)
 
         elif self.start_pos_type == StartTypes.FIXED_START:
             # set position & direc back to starting
@@ -177,103 +184,26 @@ class Pawn(actor.Actor):
         self.shield_count -= 1
         assert self.shield_count >= 0, 'Something went terribly wrong with shields...'
 
-    def draw(self, color=arcade.color.WHITE, draw_tracers=False):
-        """
-        Creates the graphical representation for the pawn using a triangle & circle.
-        Sizing is relative to the BODY_RADIUS global variable.
-        """
-
-        if self.shield_on:
-            color = arcade.color.BLUE
-
-        if self.health <= 0:
-            color = arcade.color.RED
-
-        # Get triangle verticies relative to the rotation stored in the field variable 'direction'.
-        facing = (math.cos(self.direc) * CONE_END,
-                  math.sin(self.direc) * CONE_END)
-
-        temp = self.direc+HALF_PI
-        leftLeg = (math.cos(temp) * LEG_BASE,
-                   math.sin(temp) * LEG_BASE)
-
-        temp = self.direc-HALF_PI
-        rightLeg = (math.cos(temp) * LEG_BASE,
-                    math.sin(temp) * LEG_BASE)
-
-        # Draw Ray Traces (Debugging)
-        if draw_tracers:
-            arcade.draw_line(self.pos[0], self.pos[1], facing[0]
-                             * 1000, facing[1] * 1000, arcade.color.RED_DEVIL, 3)
-
-        # Draw body circle
-        arcade.draw_circle_filled(
-            self.pos[0], self.pos[1], BODY_RADIUS * 0.7, color)
-
-        # Draw triangle according to the determined verticies.
-        arcade.draw_triangle_filled(self.pos[0]+facing[0], self.pos[1]+facing[1],
-                                    self.pos[0] +
-                                    leftLeg[0], self.pos[1]+leftLeg[1],
-                                    self.pos[0] +
-                                    rightLeg[0], self.pos[1]+rightLeg[1],
-                                    color)
-
-        self.draw_health_bar()
-        self.draw_fitness_score()
-
-    def draw_health_bar(self):
-        """
-        Displays the pawns health above it's graphical representation.
-        Length is set in the global variable 'HEALTH_BAR_WIDTH'.
-        Height above it's body is set in the global variable 'HEALTH_BAR_HEIGHT'.
-        """
-
-        if self.health <= 0:
-            return
-
-        x = self.pos[0] - HEALTH_BAR_MAX_WIDTH / 2
-        y = self.pos[1] + BODY_RADIUS + HEALTH_BAR_HEIGHT
-
-        normal_health = self.health / self.stat_bias.max_health
-
-        color = arcade.color.GREEN
-
-        if normal_health <= 0.2:
-            color = arcade.color.RED
-        elif normal_health <= 0.5:
-            color = arcade.color.YELLOW
-        elif normal_health <= 0.7:
-            color = arcade.color.ORANGE
-
-        arcade.draw_line(x, y, x + (HEALTH_BAR_MAX_WIDTH *
-                                    normal_health), y, color, 5)
-
-    def draw_fitness_score(self):
-        fit = self.calculate_fitness()
-        if fit <= -1:
-            return
-
-        arcade.draw_text(str(round(fit)),
-                         self.pos[0]-100, self.pos[1]-35, arcade.color.WHITE, align="center", width=200)
-
-    def draw_lasers(self, imminent_laser=None):
-        laser: Laser
-        for laser in self.lasers:
-            if laser == imminent_laser:
-                laser.draw(specific_color=arcade.color.GREEN)
-            else:
-                laser.draw()
-
     def update(self, match_up: 'MatchUp', delta_time) -> bool:
         """Returns False if this pawn was killed."""
 
         if self.is_dead:
             return True
 
+        self.move(delta_time)
+        return self.update_collisions(match_up)
+
+    def move(self, delta_time):
         super().update(delta_time)
         self.frame += 1
 
-        enemy_lasers = match_up.get_lasers(self)
+    def update_collisions(self, match_up: 'MatchUp') -> bool:
+        """Takes damage from every enemy laser hitting this pawn. Returns False if it was killed."""
+        if self.laser_pool is not None:
+            # Pooled hits are found for every pawn at once, see 'MatchUp.resolve_pooled_hits'.
+            return True
+
+        enemy_lasers = match_up.get_laser_candidates(self, BODY_RADIUS_SQUARED)
         laser: Laser
         for laser in enemy_lasers:
             if self.is_colliding_with_laser(laser):
@@ -287,6 +217,19 @@ class Pawn(actor.Actor):
 
         return True
 
+    def take_pooled_hit(self, slot: int) -> bool:
+        """Same as a single laser collision in 'update_collisions', for a pooled laser. Returns False if it killed this pawn."""
+        pool: LaserPool = self.laser_pool
+        damage = float(pool.get_damage(slot))
+
+        if damage > 0:
+            if self.take_damage(damage):
+                return False
+            pool.owners[pool.owner[slot]].log_hit()
+
+        pool.kill(slot)
+        return True
+
     def is_colliding_with_laser(self, laser: Laser):
         if self.is_dead:
             return False
@@ -294,16 +237,24 @@ class Pawn(actor.Actor):
         return laser.dist_squared(actor=self) <= BODY_RADIUS_SQUARED
 
     def update_lasers(self, match_up: 'MatchUp', delta_time):
-        dead = set()
+        if self.laser_pool is not None:
+            # Pooled lasers are all updated at once by the environment.
+            return
+
+        dead = []
 
         laser: Laser
         for laser in self.lasers:
             laser.update(delta_time)
             if laser.is_dead:
-                dead.add(laser)
+                dead.append(laser)
 
         # Delete all dead lasers
-        self.lasers.difference_update(dead)
+        for laser in dead:
+            del self.lasers[laser]
+
+        if dead:
+            self.laser_version += 1
 
     def on_key_press(self, symbol):
         self.controller.on_key_press(symbol)
@@ -320,18 +271,13 @@ class Pawn(actor.Actor):
 
         super().long_attack()
 
-        laser = Laser(
-            self,
-            self.pos,
-            self.direc,
-            speed=sb.long_attack_speed,
-            min_life_span=sb.long_attack_range[0],
-            max_life_span=sb.long_attack_range[1],
-            damage=sb.long_attack_damage,
-            color=sb.long_attack_color
+        self.fire_laser(
+            sb.long_attack_speed,
+            sb.long_attack_range,
+            sb.long_attack_damage,
+            sb.long_attack_color
         )
 
-        self.lasers.add(laser)
         return True
 
     def short_attack(self):
@@ -343,19 +289,44 @@ class Pawn(actor.Actor):
 
         super().short_attack()
 
+        self.fire_laser(
+            sb.short_attack_speed,
+            sb.short_attack_range,
+            sb.short_attack_damage,
+            sb.short_attack_color
+        )
+
+        return True
+
+    def fire_laser(self, speed: float, attack_range: Tuple[float], damage: float, color: tuple):
+        """Spawns a laser from this pawn's position & direction."""
+
+        if self.laser_pool is not None:
+            self.laser_pool.spawn(
+                self.laser_owner,
+                self.pos,
+                self.direc,
+                speed,
+                attack_range[0],
+                attack_range[1],
+                damage,
+                color
+            )
+            return
+
         laser = Laser(
             self,
             self.pos,
             self.direc,
-            speed=sb.short_attack_speed,
-            min_life_span=sb.short_attack_range[0],
-            max_life_span=sb.short_attack_range[1],
-            damage=sb.short_attack_damage,
-            color=sb.short_attack_color
+            speed=speed,
+            min_life_span=attack_range[0],
+            max_life_span=attack_range[1],
+            damage=damage,
+            color=color
         )
 
-        self.lasers.add(laser)
-        return True
+        self.lasers[laser] = None
+        self.laser_version += 1
 
     def check_attack_capability_and_set_cooldown(self, cool_time) -> bool:
         """Returns True if on cooldown, otherwise False."""
@@ -371,6 +342,10 @@ class Pawn(actor.Actor):
         return False
 
     def get_lasers(self):
+        if self.laser_pool is not None:
+            return self.laser_pool.views(
+                self.laser_pool.owned_slots(self.laser_owner))
+
         return self.lasers
 
     def get_best_aim_position(self, pawn: 'Pawn') -> Tuple[float, float]:
@@ -379,21 +354,17 @@ class Pawn(actor.Actor):
             actor (Actor): The actor to which you want the best aim position for.
         """
 
-        bias = 100
         sb: StatBias = self.stat_bias
 
         pos = pawn.get_pos()
         vel = pawn.get_vel()
-        dist = self.dist_squared(actor=pawn)
-
-        if dist < sb.short_attack_range[1]:
-            scalar = dist / sb.short_attack_speed ** 2 * bias
-        else:
-            scalar = dist / sb.long_attack_speed ** 2 * bias
 
-        return (
-            pos[0] + vel[0]*scalar,
-            pos[1] + vel[1]*scalar
+        return aim_lead(
+            pos[0], pos[1], vel[0], vel[1],
+            self.dist_squared(actor=pawn),
+            sb.short_attack_range[1],
+            sb.short_attack_speed,
+            sb.long_attack_speed
         )
 
     def log_hit(self):
@@ -0,0 +1,341 @@
+from environments.environment import *
+from environments.evolution_environment import *
+from util.population import *
+from util.seeding import *
+from controllers.creature_controller import *
+from controllers.dynamic_controller import *
+from typing import Callable, Tuple
+import contextlib
+import argparse
+import io
+import platform
+import json
+import sys
+
+DEFAULT_SIZES = (10, 50, 250)
+DEFAULT_REPEATS = 5
+DEFAULT_FRAMES = 100
+DEFAULT_OUTPUT = 'benchmarks.json'
+DEFAULT_SEED = 1
+DEFAULT_GENERATIONS = 5
+DEFAULT_GAME_LENGTH = 600
+
+
+def measure(setup: Callable, repeats: int) -> dict:
+    """
+    Times a benchmark. Every repeat gets a fresh (untimed) setup.
+
+    'setup' returns the callable to time & the amount of operations it performs.
+    """
+
+    times = []
+    for _ in range(repeats):
+        run, ops = setup()
+
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    best = min(times)
+
+    return {
+        'ops': ops,
+        'repeats': repeats,
+        'best_seconds': best,
+        'mean_seconds': sum(times) / len(times),
+        'seconds_per_op': best / ops,
+        'ops_per_second': ops / best if best > 0 else float('inf')
+    }
+
+
+def build_fitness_population(size: int) -> Population:
+    """Returns a population whose creatures have random (non zero) fitness counters."""
+    pop = Population('benchmark', size=size)
+    pop.log_generations = False
+
+    for creature in pop.creatures_to_nets.keys():
+        creature.total_hits = random.randint(0, 20)
+        creature.total_attacks = random.randint(1, 40)
+        creature.total_hits_taken = random.randint(1, 20)
+        creature.update_fitness()
+
+    return pop
+
+
+def bench_network_output(size: int, settings: dict) -> Tuple[Callable, int]:
+    nets = generate_random_networks(size)
+    inputs = np.random.random(INPUT_NODES)
+
+    def run():
+        for net in nets:
+            net.output(inputs)
+
+    return run, size
+
+
+def bench_mutate(size: int, settings: dict) -> Tuple[Callable, int]:
+    nets = generate_random_networks(size)
+
+    def run():
+        for net in nets:
+            net.mutate()
+
+    return run, size
+
+
+def bench_crossover(size: int, settings: dict) -> Tuple[Callable, int]:
+    nets = generate_random_networks(size)
+    others = generate_random_networks(size)
+
+    def run():
+        for net, other in zip(nets, others):
+            net.crossover(other)
+
+    return run, size
+
+
+def bench_clone(size: int, settings: dict) -> Tuple[Callable, int]:
+    nets = generate_random_networks(size)
+
+    def run():
+        for net in nets:
+            net.clone()
+
+    return run, size
+
+
+def bench_natural_selection(size: int, settings: dict) -> Tuple[Callable, int]:
+    pop = build_fitness_population(size)
+    return pop.natural_selection, size
+
+
+def build_creature_pawn() -> Pawn:
+    pawn = FitnessPawn()
+    pawn.set_controller(CreatureController(pawn, EvoNeuralNetwork(NETWORK_DIMENSIONS)))
+    return pawn
+
+
+def build_dynamic_pawn() -> Pawn:
+    pawn = Pawn()
+    pawn.set_controller(DynamicController)
+    return pawn
+
+
+def match_up_benchmark(pawn_factory: Callable) -> Callable:
+    """
+    Returns a benchmark of 'size' seeded match ups of two pawns built by the factory,
+    each updated for 'frames' frames. One operation is one match up frame.
+    """
+
+    def bench(size: int, settings: dict) -> Tuple[Callable, int]:
+        match_ups = []
+        for i in range(size):
+            match_up = MatchUp(pawn_factory(), pawn_factory())
+            match_up.seed(derive_seed(settings['seed'], i))
+            match_ups.append(match_up)
+
+        frames = settings['frames']
+
+        def run():
+            for _ in range(frames):
+                for match_up in match_ups:
+                    match_up.update(FIXED_DELTA_TIME)
+
+        return run, size * frames
+
+    return bench
+
+
+def bench_laser_path(size: int, settings: dict) -> Tuple[Callable, int]:
+    """Every laser is tested against every pawn's body circle."""
+    pawns = [Pawn() for _ in range(size)]
+    lasers = [Laser(pawn, pawn.pos, pawn.direc) for pawn in pawns]
+    centers = [tuple(pawn.pos) for pawn in pawns]
+
+    def run():
+        for laser in lasers:
+            for C in centers:
+                laser.get_dist_if_in_path(C, BODY_RADIUS)
+
+    return run, size * size
+
+
+BENCHMARKS = {
+    'network_output': bench_network_output,
+    'mutate': bench_mutate,
+    'crossover': bench_crossover,
+    'clone': bench_clone,
+    'natural_selection': bench_natural_selection,
+    'match_up_update_creature': match_up_benchmark(build_creature_pawn),
+    'match_up_update_dynamic': match_up_benchmark(build_dynamic_pawn),
+    'match_up_update_brainless': match_up_benchmark(Pawn),
+    'laser_path': bench_laser_path
+}
+
+
+def build_meta(settings: dict) -> dict:
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'argv': sys.argv[1:],
+        'settings': settings
+    }
+
+
+def evolve(size: int, decision_interval: int, generations: int, game_length: int, seed: int,
+           batched_inference: bool = True) -> dict:
+    """
+    Evolves a seeded population against dynamic pawns, with creatures deciding every 'decision_interval' frames.
+    With batched inference, only the networks deciding on a frame are evaluated.
+    """
+    seed_globals(seed)
+
+    pop = Population('benchmark', size=size)
+    pop.log_generations = False
+    pop.set_opponent_factory(build_dynamic_pawn)
+
+    env = EvolutionEnvironment(pop)
+    env.save_interval = 0
+    env.max_game_length = game_length
+    env.decision_interval = decision_interval
+    env.batched_inference = batched_inference
+    env.set_seed(seed)
+
+    frames = 0
+    start = time.perf_counter()
+
+    # Generation reports are not part of the benchmark.
+    with contextlib.redirect_stdout(io.StringIO()):
+        while env.current_session_generation_count < generations:
+            env.do_logic()
+            frames += 1
+
+    seconds = time.perf_counter() - start
+    history = pop.generational_fitnesses
+
+    return {
+        'size': size,
+        'decision_interval': decision_interval,
+        'batched_inference': batched_inference,
+        'generations': generations,
+        'frames': frames,
+        'seconds': seconds,
+        'frames_per_second': frames / seconds,
+        'mean_max_fitness': float(np.mean(history)),
+        'last_max_fitness': float(history[-1]),
+        'best_fitness': float(pop.max_overall_fitness)
+    }
+
+
+def run_decision_sweep(intervals, sizes=DEFAULT_SIZES, generations=DEFAULT_GENERATIONS,
+                       game_length=DEFAULT_GAME_LENGTH, seed=DEFAULT_SEED, batched_inference=True) -> dict:
+    """
+    Evolves the same seeded population at every decision interval (& size), & returns a JSON
+    serializable report of the throughput versus the fitness reached (relative to the first interval).
+    """
+    results = []
+
+    for size in sizes:
+        baseline = None
+
+        for interval in intervals:
+            result = evolve(size, interval, generations, game_length, seed, batched_inference)
+            if baseline is None:
+                baseline = result
+
+            result['speed_up'] = result['frames_per_second'] / \
+                baseline['frames_per_second']
+            results.append(result)
+
+            print('size %5i | k %2i | %10.1f frames/s (%.2fx) | mean max fitness %8.1f | best %8.1f' % (
+                size, interval, result['frames_per_second'], result['speed_up'],
+                result['mean_max_fitness'], result['best_fitness']))
+
+    return {
+        'meta': build_meta({'sizes': list(sizes), 'decision_intervals': list(intervals),
+                            'generations': generations, 'game_length': game_length, 'seed': seed,
+                            'batched_inference': batched_inference}),
+        'decision_sweep': results
+    }
+
+
+def run_benchmarks(names=None, sizes=DEFAULT_SIZES, repeats=DEFAULT_REPEATS,
+                   frames=DEFAULT_FRAMES, seed=DEFAULT_SEED) -> dict:
+    """Runs the given benchmarks (all by default) at every size & returns a JSON serializable report."""
+    names = list(BENCHMARKS.keys()) if not names else names
+    settings = {'frames': frames, 'seed': seed}
+    results = []
+
+    for name in names:
+        for size in sizes:
+            # Every benchmark starts from the same random state.
+            seed_globals(derive_seed(seed, size))
+
+            result = measure(
+                lambda: BENCHMARKS[name](size, settings), repeats)
+            result['benchmark'] = name
+            result['size'] = size
+            results.append(result)
+
+            print('%-28s size %5i | %12.1f ops/s | %10.3f us/op' % (
+                name, size, result['ops_per_second'], result['seconds_per_op'] * 1e6))
+
+    return {
+        'meta': build_meta({'sizes': list(sizes), 'repeats': repeats, 'frames': frames, 'seed': seed}),
+        'results': results
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Headless micro-benchmarks of the simulation & evolution hot paths.')
+    parser.add_argument('benchmarks', nargs='*',
+                        help='Benchmarks to run (all if none are given): %s.' % ', '.join(BENCHMARKS.keys()))
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Population sizes to run every benchmark at.')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help='Timed repeats per benchmark (the best is reported).')
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES,
+                        help='Frames simulated by the match up benchmarks.')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--decision-sweep', type=int, nargs='+', metavar='K',
+                        help='Instead of the benchmarks, evolve a population at every given creature '
+                        'decision interval & report the throughput versus the fitness reached.')
+    parser.add_argument('--generations', type=int, default=DEFAULT_GENERATIONS,
+                        help='Generations evolved per decision interval.')
+    parser.add_argument('--game-length', type=int, default=DEFAULT_GAME_LENGTH,
+                        help='Max frames per generation of the decision sweep.')
+    parser.add_argument('--no-batched-inference', dest='batched_inference', action='store_false',
+                        help='Run the networks of the decision sweep one by one instead of in a batch.')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help='Path of the JSON report.')
+
+    args = parser.parse_args(argv)
+
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error('Unknown benchmark \'%s\'.' % name)
+
+    if args.decision_sweep and min(args.decision_sweep) < 1:
+        parser.error('Decision intervals MUST be at least 1 frame.')
+
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    if args.decision_sweep:
+        report = run_decision_sweep(args.decision_sweep, args.sizes,
+                                    args.generations, args.game_length, args.seed, args.batched_inference)
+    else:
+        report = run_benchmarks(args.benchmarks, args.sizes,
+                                args.repeats, args.frames, args.seed)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print('\nResults written to \"%s\".' % args.output)
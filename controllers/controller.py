@@ -1,10 +1,12 @@
 from actors.actions import *
 from actors.actor import *
-import arcade
 
 PA = PlayerActions
 A = Actions
 
+# Frames between the decisions of a controller, unless it is scheduled otherwise.
+FRAMES_BETWEEN_DECISIONS = 1
+
 
 class Controller:
     """Default controller class"""
@@ -12,6 +14,14 @@ class Controller:
     active_actions: set = None
     act_cycles = 0
 
+    # Looks, thinks & acts on the frames where 'frame % decision_interval == decision_phase'.
+    # In between, the actor keeps its last actions (velocity, looking & held attack).
+    decision_interval: int = FRAMES_BETWEEN_DECISIONS
+    decision_phase: int = 0
+
+    # If True, environments may give this controller a longer decision interval (see 'Environment.schedule_decisions').
+    repeats_actions = False
+
     def __init__(self, actor: Actor):
         assert actor != None, 'Actor must NOT be NoneType.'
         self.actor = actor
@@ -83,10 +93,30 @@ class Controller:
 
         self.active_actions.discard(action)
 
+    def set_decision_schedule(self, interval: int, phase: int = 0):
+        assert interval > 0, 'Decision intervals MUST be at least 1 frame.'
+        self.decision_interval = interval
+        self.decision_phase = phase % interval
+
+    def is_deciding(self, frame: int) -> bool:
+        """Whether this controller looks, thinks & acts on the given frame (of its match up)."""
+        return frame % self.decision_interval == self.decision_phase
+
+    def reseed(self):
+        """Re-rolls any random choices from the actor's (newly seeded) RNG stream."""
+        pass
+
     def look(self, match_up):
         """Observes data from the environment."""
         pass
 
+    def prepare_thinking(controllers: list):
+        """
+        Called with every controller of a class that is about to think at once (after all of them looked),
+        so subclasses can batch work shared by their 'think'. Does nothing for a basic controller.
+        """
+        pass
+
     def think(self):
         """Transforms data / makes a decision."""
         pass
@@ -19,6 +19,29 @@ NETWORK_DIMENSIONS = (
 MAX_DIST = SCREEN_WIDTH ** 2 + SCREEN_HEIGHT ** 2
 MAX_ANGLE = math.pi * 2
 
+# The first inputs only depend on the pawn's StatBias (see 'get_stat_inputs').
+STAT_INPUTS = 7
+STAT_INPUTS_CACHE = dict()
+
+
+def get_stat_inputs(sb: SB.StatBias) -> tuple:
+    """The self stat inputs of a StatBias, computed once per StatBias."""
+    inputs = STAT_INPUTS_CACHE.get(sb)
+
+    if inputs is None:
+        inputs = (
+            sb.movement_speed / MAX_DIST,
+            sb.long_attack_speed / MAX_DIST,
+            sb.short_attack_speed / MAX_DIST,
+            sb.long_attack_range[0] / MAX_DIST,
+            sb.long_attack_range[1] / MAX_DIST,
+            sb.short_attack_range[0] / MAX_DIST,
+            sb.short_attack_range[1] / MAX_DIST
+        )
+        STAT_INPUTS_CACHE[sb] = inputs
+
+    return inputs
+
 
 class CreatureController(Controller):
 
@@ -28,6 +51,8 @@ class CreatureController(Controller):
     inputs: list
     outputs: list
 
+    repeats_actions = True
+
     def __init__(self, pawn: Pawn, neural_network=None):
         super().__init__(pawn)
         self.pawn = pawn
@@ -42,7 +67,6 @@ class CreatureController(Controller):
     def look(self, match_up: MatchUp):
         """Create neural net inputs"""
         p: Pawn = self.pawn
-        sb: StatBias = p.stat_bias
 
         imminent: Laser = match_up.get_most_imminent_laser(p)
         enemy: Pawn = match_up.get_closest_opponent(p)
@@ -50,13 +74,7 @@ class CreatureController(Controller):
 
         self.inputs = [
             # Self-Stats
-            sb.movement_speed / MAX_DIST,
-            sb.long_attack_speed / MAX_DIST,
-            sb.short_attack_speed / MAX_DIST,
-            sb.long_attack_range[0] / MAX_DIST,
-            sb.long_attack_range[1] / MAX_DIST,
-            sb.short_attack_range[0] / MAX_DIST,
-            sb.short_attack_range[1] / MAX_DIST,
+            *get_stat_inputs(p.stat_bias),
 
             # Enemy-Stats
             esb.movement_speed / MAX_DIST if esb != None else 0,
@@ -8,6 +8,7 @@ from actors.actor import *
 from actors.pawns.pawn import *
 from util.match_up import *
 from util.stat_biases import *
+from util.threat_map import *
 
 DEBUG = False
 
@@ -30,10 +31,19 @@ class DynamicController(Controller):
     next_attack: Callable = None
     will_use_shield_next: bool = False
 
+    # Threats of the candidate moves, if prepared in a batch (see 'prepare_thinking').
+    threats: np.ndarray = None
+
+    # Paths tested by the last move decision (only logged if DEBUG), for renderers.
+    debug_paths: list = None
+
     def __init__(self, pawn: Pawn):
         super().__init__(pawn)
 
-        self.shield_strat = random.choice(list(ShieldStrat))
+        self.shield_strat = pawn.rng.choice(list(ShieldStrat))
+
+    def reseed(self):
+        self.shield_strat = self.actor.rng.choice(list(ShieldStrat))
 
     def set_optimal_move(self):
         """
@@ -44,53 +54,24 @@ class DynamicController(Controller):
         """
 
         pawn: Pawn = self.actor
-        lasers = self.lasers
-        laser: Laser
-
-        moves_map = dict()
-        initialized = False
-
-        # Loop through every possible move
-        for i in range(-1, 2):
-            for j in range(-1, 2):
-                move = (i, j)
-
-                # Loop through every laser and get if it's heading towards
-                # the current testing position
-
-                dx = pawn.get_x() + i * BODY_RADIUS * 1.5
-                dy = pawn.get_y() + j * BODY_RADIUS * 1.5
+        threats = self.threats
+        self.threats = None
 
-                if DEBUG:
-                    # Draw each path of testing for debugging
-                    arcade.draw_line(
-                        pawn.pos[0], pawn.pos[1], dx, dy, arcade.color.WHITE, 2)
-
-                for laser in lasers:
-                    if moves_map.get(move, None) == None:
-                        initialized = True
-                        moves_map[move] = float('-inf')
-
-                    dist = laser.get_dist_if_in_path((dx, dy), BODY_RADIUS)
-
-                    # Log the worst move
-                    moves_map[move] = \
-                        max(moves_map[move], dist)
+        if threats is None and self.lasers:
+            threat_map = ThreatMap()
+            threat_map.add(pawn.pos, self.lasers)
+            threats = threat_map.evaluate()[0]
 
         if DEBUG:
-            arcade.finish_render()
-
-        if initialized:
-            # Pick min moves_map
-            min_dist = float('inf')
-            best_move = None
-            for move in moves_map.keys():
-                worst = moves_map[move]
-                if worst < min_dist:
-                    min_dist = worst
-                    best_move = move
+            # Log each path of testing for debugging
+            self.debug_paths = [
+                (pawn.pos[0], pawn.pos[1], pawn.get_x() + ox, pawn.get_y() + oy)
+                for ox, oy in CANDIDATE_OFFSETS.tolist()
+            ]
 
-            self.next_move = best_move
+        if threats is not None:
+            # Pick the move with the least bad worst laser (the first one if tied).
+            self.next_move = CANDIDATE_MOVES[int(np.argmin(threats))]
 
         else:
             # if random.random() < 0.5:
@@ -134,6 +115,20 @@ class DynamicController(Controller):
                         pawn.get_y() - self.closest_opponent.get_y()
                     )
 
+    def prepare_thinking(controllers: List['DynamicController']):
+        """Evaluates the threats of every controller's candidate moves in a single ThreatMap pass."""
+        threat_map = ThreatMap()
+        queued = []
+
+        controller: DynamicController
+        for controller in controllers:
+            if controller.lasers:
+                threat_map.add(controller.actor.pos, controller.lasers)
+                queued.append(controller)
+
+        for controller, threats in zip(queued, threat_map.evaluate()):
+            controller.threats = threats
+
     def set_optimal_attack(self):
         dist_squared = self.actor.dist_squared(actor=self.closest_opponent)
         sb: StatBias = self.actor.stat_bias
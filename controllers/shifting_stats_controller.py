@@ -21,7 +21,7 @@ class ShiftingStatsController(Controller):
             self.act_cycles = 1
 
             while(True):
-                r = random.randint(0, len(STAT_BIASES)-1)
+                r = self.actor.rng.randint(0, len(STAT_BIASES)-1)
                 if r != self.current_index:
                     break
 
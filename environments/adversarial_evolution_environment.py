@@ -8,20 +8,23 @@ class AdversarialEvolutionEnvironment(EvolutionEnvironment):
     population2: Population
     opponent_index: int = 0
 
-    def __init__(self, population1: Population, population2: Population):
+    def __init__(self, population1: Population, population2: Population, batched: bool = False):
         self.population1 = population1
         self.population2 = population2
-        super().__init__(population1)
+        super().__init__(population1, batched=batched)
         self.reset(build_new_gen=False)
 
+    def get_populations(self) -> List[Population]:
+        return [self.population1, self.population2]
+
     def plot_data(self):
         plt.plot(
-            self.population1.generational_fitnesses,
+            *downsample_min_max(self.population1.get_history()),
             label='1: %s' % self.population1.dir_name
         )
 
         plt.plot(
-            self.population2.generational_fitnesses,
+            *downsample_min_max(self.population2.get_history()),
             label='2: %s' % self.population2.dir_name
         )
 
@@ -35,56 +38,73 @@ class AdversarialEvolutionEnvironment(EvolutionEnvironment):
         pop2 = self.population2
 
         if build_new_gen:
-            pop.natural_selection()
+            self.current_session_generation_count += 1
+            if self.profiler is not None:
+                self.profiler.end_generation()
+
+            wall_time = time.time() - self.start_generation_time
+
+            if self.evaluation_cache is not None:
+                self.store_evaluations()
+
+            saved_frames = self.end_racing_generation()
+
+            pop.natural_selection(self.frame_count, wall_time, saved_frames)
             pop.generate_creatures()
             pop.current_gen += 1
 
-            if pop.current_gen % 5 == 0:
-                pop.save_to_dir()
+            if self.save_interval > 0 and pop.current_gen % self.save_interval == 0:
+                self.save_population(pop)
 
-            pop2.natural_selection()
+            pop2.natural_selection(self.frame_count, wall_time, saved_frames)
             pop2.generate_creatures()
             pop2.current_gen += 1
 
-            if pop2.current_gen % 5 == 0:
-                pop2.save_to_dir()
+            if self.save_interval > 0 and pop2.current_gen % self.save_interval == 0:
+                self.save_population(pop2)
 
             self.verbose()
             print('----------------------------------')
             print(self.build_population_report(pop2))
 
         self.frame_count = 0
-        self.match_ups = pop.build_match_ups(other_population=pop2)
-        self.calculate_best_match_up()
+        self.set_new_match_ups(
+            pop.build_match_ups(other_population=pop2), pop.current_gen)
         self.start_generation_time = time.time()
 
-    def on_draw(self):
-        Environment.on_draw(self)
+    def get_drawn_networks(self) -> list:
+        networks = []
+
+        # Draw best neural network graphically
+        if self.draw_best:
+            if self.best_match_up != None:
+                for pawn in self.best_match_up.pawns:
 
-        if self.draw_networks:
-            # Draw best neural network graphically
-            if self.draw_best:
-                if self.best_match_up != None:
-                    for pawn in self.best_match_up.pawns:
+                    net1 = self.population1.get_network(pawn)
+                    if net1 != None:
+                        networks.append((net1, SCREEN_HEIGHT/2))
 
-                        net1 = self.population1.get_network(pawn)
-                        if net1 != None:
-                            net1.draw_weights()
-                            net1.draw_neurons(offset_y=SCREEN_HEIGHT/2)
+                    net2 = self.population2.get_network(pawn)
+                    if net2 != None:
+                        networks.append((net2, 0))
 
-                        net2 = self.population2.get_network(pawn)
-                        if net2 != None:
-                            net2.draw_weights()
-                            net2.draw_neurons()
+        return networks
 
     def end(self):
-        arcade.close_window()
-        self.population1.save_to_dir()
+        self.close_graphics()
+
+        if self.evaluator is not None:
+            self.evaluator.close()
+
+        self.export_trace()
+        self.save_population(self.population1)
         if self.population1.dir_name == self.population2.dir_name:
-            self.population2.save_to_dir(self.population1.dir_name + '(1)')
+            self.save_population(
+                self.population2, self.population1.dir_name + '(1)')
         else:
-            self.population2.save_to_dir()
+            self.save_population(self.population2)
 
+        self.close_checkpoint_writer()
         Environment.end(self)
 
     def __str__(self):
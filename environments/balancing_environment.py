@@ -3,7 +3,7 @@ from util.match_up import *
 
 
 class BalancingEnvironment(Environment):
-    match_ups: set = None
+    match_ups: list = None
     best_match_up: MatchUp = None
     max_game_length: int = -1
 
@@ -14,6 +14,11 @@ class BalancingEnvironment(Environment):
                 self.best_match_up = match_up
                 break
 
+    def on_fitness_changed(self, match_up: MatchUp, fitness: float):
+        """Moves on to the next open match up once the shown one is over."""
+        if match_up is self.best_match_up and not match_up.is_still_going():
+            self.calculate_best_match_up()
+
     def reset(self):
         """Ends this simulation."""
         self.end()
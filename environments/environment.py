@@ -1,6 +1,5 @@
 
 
-import arcade
 import time
 from actors.actions import *
 
@@ -10,22 +9,24 @@ SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 800
 
 from util.match_up import *
+from util.batched_simulation import *
+from util.seeding import *
 
 
-def max_helper(match_up):
-    best = match_up.get_best_pawn_based_on_fitness()
-    if best:
-        return best.calculate_fitness()
-
-    return -1
+USE_DELTA_TIME = True
 
 
-USE_DELTA_TIME = True
+class Environment:
+    """
+    Pure simulation of a set of match ups.
 
+    Has no rendering dependency. A renderer (see 'init_graphics') observes it,
+    forwarding updates & key presses to it & drawing its state.
+    """
 
-class Environment(arcade.Window):
-    match_ups: set = None
+    match_ups: list = None  # Ordered, so seeded runs iterate them identically
     best_match_up: MatchUp = None
+    best_match_up_fitness: float = -1
     absolute_max_fitness: float = 0
     current_gen_max_fitness: float = 0
 
@@ -46,73 +47,134 @@ class Environment(arcade.Window):
     all_dead = False
 
     graphical = False
-
-    def __init__(self, *match_ups: MatchUp):
-        self.match_ups = set(match_ups)
-        self.calculate_best_match_up()
+    renderer = None  # ArcadeRenderer
+
+    # If True, match ups are advanced by a BatchedSimulation instead of per pawn.
+    batched = False
+    simulation: BatchedSimulation = None
+
+    # If True, every laser of the environment is stored in a single LaserPool, whose hits &
+    # imminent lasers are found for all pawns at once (see 'do_pooled_logic').
+    pooled_lasers = False
+    laser_pool: LaserPool = None
+    laser_pool_source = None
+
+    # If True, every creature's network is evaluated in a single batch each frame.
+    batched_inference = False
+    inference = None  # BatchedInference
+    inference_source = None
+
+    # Frames between the decisions of controllers that repeat their actions in between (neural creatures),
+    # staggered across them so every frame runs about the same amount of decisions.
+    decision_interval: int = FRAMES_BETWEEN_DECISIONS
+    decision_source = None
+
+    # If set, the environment is deterministic: every match up gets its own RNG stream
+    # derived from this seed & the wall clock delta time is replaced by FIXED_DELTA_TIME.
+    seed: int = None
+
+    # If set, every phase of each frame is timed (see FrameProfiler).
+    profiler: FrameProfiler = None
+
+    def __init__(self, *match_ups: MatchUp, batched: bool = False):
+        self.batched = batched
+        self.set_match_ups(match_ups)
         self.print_str = self.__str__()
 
     def init_graphics(self):
-        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT)
-        arcade.set_background_color(arcade.color.BLACK)
+        """Opens an arcade window that renders this environment."""
+
+        # Imported here, so headless runs never load arcade.
+        from renderers.arcade_renderer import ArcadeRenderer
+
+        self.renderer = ArcadeRenderer(self)
         self.graphical = True
 
+    def close_graphics(self):
+        if self.renderer is not None:
+            self.renderer.close()
+            self.renderer = None
+
     def run(self, iterations=None):
         if self.started:
             raise Exception('Environment has already begun.')
         self.started = True
 
         if self.graphical:
-            arcade.run()
+            self.renderer.run()
             return True
 
         return False
 
+    def set_match_ups(self, match_ups):
+        """Replaces the match ups & listens to the fitness changes of their pawns."""
+        self.match_ups = list(match_ups)
+
+        match_up: MatchUp
+        for match_up in self.match_ups:
+            match_up.fitness_listener = self
+
+        if self.calculate_best_match_up() is not None:
+            self.on_fitness_changed(
+                self.best_match_up, self.best_match_up_fitness)
+
     def calculate_best_match_up(self):
-        """Sets the 'best_match_up' property based on each pawn's fitness."""
+        """Sets the 'best_match_up' property based on each match up's best fitness."""
+
+        if not self.match_ups:
+            self.best_match_up = None
+            self.best_match_up_fitness = -1
+            return None
 
         self.best_match_up = max(
-            self.match_ups, key=max_helper)
+            self.match_ups, key=lambda m: m.get_best_fitness())
+        self.best_match_up_fitness = self.best_match_up.get_best_fitness()
         return self.best_match_up
 
-    def on_draw(self):
-        if self.frame_count % 60 == 0:
-            self.calculate_best_match_up()
-
+    def on_fitness_changed(self, match_up: MatchUp, fitness: float):
+        """
+        Called by match ups with their new best fitness (-1 once over).
+        Only rescans every match up if the best one got worse.
+        """
+        self.absolute_max_fitness = max(self.absolute_max_fitness, fitness)
+        self.current_gen_max_fitness = max(self.current_gen_max_fitness, fitness)
+
+        if match_up is self.best_match_up:
+            if fitness < self.best_match_up_fitness:
+                self.calculate_best_match_up()
+            else:
+                self.best_match_up_fitness = fitness
+
+        elif self.best_match_up is None or fitness > self.best_match_up_fitness:
+            self.best_match_up = match_up
+            self.best_match_up_fitness = fitness
+
+    def prepare_draw(self):
+        """Refreshes the state shown by a renderer. Called once per drawn frame."""
         self.print_str = self.__str__()
-        arcade.start_render()
 
+    def get_drawn_match_ups(self) -> list:
+        """Returns the match ups a renderer should draw."""
         if self.draw_best:
-            if self.best_match_up:
-                self.best_match_up.draw(draw_dead=self.draw_dead,
-                                        draw_tracers=self.draw_tracers)
-
-        else:
-            match_up: MatchUp
-
-            for match_up in self.match_ups:
-                if match_up.is_still_going():
-                    match_up.draw(draw_dead=self.draw_dead,
-                                  draw_tracers=self.draw_tracers)
+            return [self.best_match_up] if self.best_match_up else []
 
-                    if self.draw_match_connections:
-                        prev = None
+        return [match_up for match_up in self.match_ups if match_up.is_still_going()]
 
-                        for pawn in match_up.get_alive_pawns():
-                            if prev != None:
-                                arcade.draw_line(
-                                    prev.pos[0], prev.pos[1], pawn.pos[0], pawn.pos[1], arcade.color.RED_DEVIL)
+    def get_drawn_networks(self) -> list:
+        """Returns (network, y offset) pairs a renderer should draw when 'draw_networks' is set."""
+        return []
 
-                            prev = pawn
+    def set_seed(self, seed: int):
+        """Makes the environment deterministic & re-seeds the current match ups."""
+        self.seed = seed
+        self.seed_match_ups()
 
-        arcade.draw_text(
-            self.print_str,
-            10,
-            SCREEN_HEIGHT - 20,
-            arcade.color.WHITE
-        )
+    def seed_match_ups(self, generation: int = 0, match_ups: list = None):
+        """Gives every match up (defaults to the current ones) its own stream, derived from the seed, generation & its index."""
+        for i, match_up in enumerate(self.match_ups if match_ups is None else match_ups):
+            match_up.seed(derive_seed(self.seed, generation, i))
 
-    def do_logic(self, delta_time=0.01796913):
+    def do_logic(self, delta_time=FIXED_DELTA_TIME):
         self.frame_count += 1
         if (not self.are_match_ups_still_going()):
             self.all_dead = True
@@ -121,39 +183,187 @@ class Environment(arcade.Window):
         if self.max_game_length > 0 and self.frame_count > self.max_game_length:
             return self.reset()
 
+        self.schedule_decisions()
+
+        if self.batched:
+            return self.do_batched_logic(delta_time)
+
+        if self.pooled_lasers:
+            return self.do_pooled_logic(delta_time)
+
+        profiler = self.profiler
+        deciding = []
+
+        # Pawns decide once every match up was updated, so their controllers can be prepared in a batch.
         match_up: MatchUp
         for match_up in self.match_ups:
-            match_up.update(delta_time if USE_DELTA_TIME else 1)
-            best_pawn = match_up.get_best_pawn_based_on_fitness()
+            pawns = match_up.update(
+                delta_time if USE_DELTA_TIME else 1,
+                decide=False,
+                profiler=profiler
+            )
+
+            for pawn in pawns:
+                deciding.append((match_up, pawn))
+
+        # Match ups ended by a later pawn's death no longer decide.
+        deciding = [(match_up, pawn) for match_up, pawn in deciding if match_up.is_still_going()]
+
+        if self.batched_inference:
+            self.get_inference().decide(deciding, profiler)
+        else:
+            MatchUp.decide_pawns(deciding, profiler)
+
+        if profiler is not None:
+            profiler.end_frame()
+
+    def do_pooled_logic(self, delta_time):
+        """
+        Advances every match up with their lasers in the laser pool, in the phases of a
+        BatchedSimulation frame: all pawns move, every hit is found in one pass over the pool,
+        all lasers move & finally the pawns due a decision decide.
+        """
+        self.prepare_laser_pool()
+        delta_time = delta_time if USE_DELTA_TIME else 1
+
+        profiler = self.profiler
+        deciding = []
+
+        match_up: MatchUp
+        for match_up in self.match_ups:
+            pawns = match_up.update(
+                delta_time, decide=False, profiler=profiler)
+            deciding.extend((match_up, pawn) for pawn in pawns)
+
+        if profiler is not None:
+            start = profiler.start()
+
+        MatchUp.resolve_pooled_hits([(match_up, pawn) for match_up in self.match_ups
+                                     if match_up.is_still_going() for pawn in match_up.get_alive_pawns()])
+
+        if profiler is not None:
+            profiler.stop(COLLISION, start)
+            start = profiler.start()
 
-            if best_pawn:
-                # Set the absolute max fitness
-                self.absolute_max_fitness = \
-                    max(self.absolute_max_fitness,
-                        best_pawn.calculate_fitness())
+        self.laser_pool.update(delta_time)
 
-                self.current_gen_max_fitness = \
-                    max(self.current_gen_max_fitness,
-                        best_pawn.calculate_fitness())
+        if profiler is not None:
+            profiler.stop(LASERS, start)
+            start = profiler.start()
+
+        # Pawns killed (& match ups ended) by this frame's hits no longer decide.
+        deciding = [(match_up, pawn) for match_up, pawn in deciding
+                    if match_up.is_still_going() and not pawn.is_dead]
+        MatchUp.cache_imminent_lasers(deciding)
+
+        if profiler is not None:
+            profiler.stop(LOOK, start)
+
+        if self.batched_inference:
+            self.get_inference().decide(deciding, profiler)
+        else:
+            MatchUp.decide_pawns(deciding, profiler)
+
+        if profiler is not None:
+            profiler.end_frame()
+
+    def schedule_decisions(self):
+        """
+        Gives every controller of the current match ups that repeats its actions the environment's
+        decision interval, with phases assigned round robin (in match up order) to spread the decisions.
+        Other controllers keep deciding on their own schedule (every frame by default).
+        """
+        if self.decision_interval == FRAMES_BETWEEN_DECISIONS or self.decision_source is self.match_ups:
+            return
+
+        self.decision_source = self.match_ups
+        phase = 0
+
+        match_up: MatchUp
+        for match_up in self.match_ups:
+            for pawn in match_up.pawns:
+                controller = pawn.controller
+
+                if controller.repeats_actions:
+                    controller.set_decision_schedule(self.decision_interval, phase)
+                    phase += 1
+
+    def get_inference(self):
+        """Returns the BatchedInference for the current match ups."""
+
+        # Imported here, since creature controllers depend on this module.
+        from util.batched_inference import BatchedInference
+
+        if self.inference_source is not self.match_ups:
+            self.inference = BatchedInference.from_match_ups(self.match_ups)
+            self.inference_source = self.match_ups
+
+        return self.inference
+
+    def prepare_laser_pool(self):
+        """Attaches the environment's laser pool to the current match ups."""
+        if self.laser_pool is None:
+            self.laser_pool = LaserPool()
+
+        if self.laser_pool_source is self.match_ups:
+            return
+
+        self.laser_pool.reset()
+        self.laser_pool_source = self.match_ups
+
+        match_up: MatchUp
+        for match_up in self.match_ups:
+            match_up.attach_laser_pool(self.laser_pool)
+
+    def do_batched_logic(self, delta_time):
+        """Advances every match up at once through the BatchedSimulation."""
+
+        # Match ups get replaced on new generations, rebuild the simulation for them.
+        if self.simulation is None or self.simulation.source is not self.match_ups:
+            self.simulation = BatchedSimulation(self.match_ups)
+
+        if self.batched_inference:
+            self.simulation.inference = self.get_inference()
+
+        profiler = self.profiler
+        self.simulation.profiler = profiler
+
+        self.simulation.update(delta_time if USE_DELTA_TIME else 1)
+
+        if profiler is not None:
+            profiler.end_frame()
+
+    def export_trace(self):
+        """Writes the profiler's Chrome trace, if it keeps one."""
+        if self.profiler is not None and self.profiler.trace:
+            self.profiler.export_chrome_trace()
 
     def on_update(self, delta_time):
+        if self.seed is not None:
+            delta_time = FIXED_DELTA_TIME
+
         for i in range(1 if not self.speed_up else self.speed_up_cycles):
             self.do_logic(delta_time)
 
     def reset(self):
         """Calls reset on each MatchUp & resets start_time."""
+        self.current_gen_max_fitness = -1
+
         match_up: MatchUp
         for match_up in self.match_ups:
             match_up.reset()
 
         self.frame_count = 0
         self.all_dead = False
-        self.current_gen_max_fitness = -1
+        self.simulation = None
 
     def are_match_ups_still_going(self):
         return self.running_matches_count() > 0
 
     def running_matches_count(self):
+        if self.simulation is not None and self.simulation.source is self.match_ups:
+            return self.simulation.running_matches_count()
+
         running = 0
 
         match_up: MatchUp
@@ -243,7 +453,7 @@ class Environment(arcade.Window):
 
 
 if __name__ == '__main__':
-    match_ups = set()
+    match_ups = []
     match_up = MatchUp(
         Pawn(None, 100, 100),
         Pawn(None, 200, 100),
@@ -251,7 +461,7 @@ if __name__ == '__main__':
         Pawn(None, 200, 200)
     )
 
-    match_ups.add(match_up)
+    match_ups.append(match_up)
 
     env = Environment(match_ups)
     env.run()
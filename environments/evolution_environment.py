@@ -1,5 +1,9 @@
 from environments.environment import *
 from util.population import *
+from util.parallel_evaluation import *
+from util.checkpoint_writer import *
+from util.evaluation_cache import *
+from util.racing import *
 import matplotlib.pyplot as plt
 import atexit
 import time
@@ -9,19 +13,34 @@ class EvolutionEnvironment(Environment):
     population1: Population
     current_session_generation_count = 0
     max_iterations = 1
+    save_interval: int = 5  # Generations between population saves (0 to never save)
 
     generational_fitnesses = None
     alive_after_time = None
     start_time = None
     start_generation_time = None
 
-    def __init__(self, population1: Population):
+    # If True, headless generations are simulated across worker processes.
+    parallel = False
+    processes: int = None  # Defaults to the cpu count
+    evaluator: ParallelEvaluator = None
+
+    # Saves are snapshotted at generation boundaries & written in the background.
+    checkpoint_writer: CheckpointWriter = None
+
+    # If set, fitnesses of past evaluations are reused (or averaged) for unchanged genomes.
+    evaluation_cache: EvaluationCache = None
+
+    # If set, the worst match ups are stopped early at fractions of the max game length (not in parallel runs).
+    racing: RacingScheduler = None
+
+    def __init__(self, population1: Population, batched: bool = False):
         self.population1 = population1
         self.reset(build_new_gen=False)
         self.generational_fitnesses = []
         self.alive_after_time = []
         self.start_time = time.time()
-        super().__init__(*self.match_ups)
+        super().__init__(*self.match_ups, batched=batched)
 
     def build_iteration_report(self):
         s = 'Current Iteration: %i/%i (%.1f' % (
@@ -36,6 +55,16 @@ class EvolutionEnvironment(Environment):
         s += '\nETA: %.1f minutes' % ((self.max_iterations -
                                        self.current_session_generation_count) * gt / 60)
 
+        if self.profiler is not None:
+            s += '\n' + self.profiler.build_report()
+            s += '\n' + MatchUp.build_query_report(self.match_ups)
+
+        if self.evaluation_cache is not None:
+            s += '\n' + self.evaluation_cache.build_report()
+
+        if self.racing is not None:
+            s += '\n' + self.racing.build_report()
+
         return s
 
     def build_population_report(self, pop):
@@ -63,7 +92,7 @@ class EvolutionEnvironment(Environment):
         # plt.show()
 
         plt.plot(
-            self.population1.generational_fitnesses,
+            *downsample_min_max(self.population1.get_history()),
             label=self.population1.dir_name
         )
 
@@ -77,19 +106,201 @@ class EvolutionEnvironment(Environment):
 
         if build_new_gen:
             self.current_session_generation_count += 1
-            if pop.current_gen > 0 and pop.current_gen % 5 == 0:
-                pop.save_to_dir()
+            if self.profiler is not None:
+                self.profiler.end_generation()
+
+            if self.save_interval > 0 and pop.current_gen > 0 and \
+                    pop.current_gen % self.save_interval == 0:
+                self.save_population(pop)
 
-            pop.natural_selection()
+            if self.evaluation_cache is not None:
+                self.store_evaluations()
+
+            pop.natural_selection(
+                self.frame_count, time.time() - self.start_generation_time, self.end_racing_generation())
             pop.generate_creatures()
             pop.current_gen += 1
             super().reset()
             self.verbose()
 
-        self.match_ups = pop.build_match_ups()
-        self.calculate_best_match_up()
+        self.set_new_match_ups(pop.build_match_ups(), pop.current_gen)
         self.start_generation_time = time.time()
 
+    def set_new_match_ups(self, match_ups: List[MatchUp], generation: int):
+        """Seeds a new generation's match ups (if deterministic), then only keeps the ones the evaluation cache can't skip."""
+        if self.seed is not None:
+            self.seed_match_ups(generation, match_ups)
+
+        self.set_match_ups(self.apply_evaluation_cache(match_ups))
+
+    def do_logic(self, delta_time=FIXED_DELTA_TIME):
+        if self.racing is not None and self.racing.is_checkpoint(self.frame_count, self.max_game_length):
+            self.race()
+
+        return Environment.do_logic(self, delta_time)
+
+    def race(self):
+        """Stops the worst running match ups (see RacingScheduler)."""
+        simulation = self.simulation
+        batched = simulation is not None and simulation.source is self.match_ups
+
+        # Batched fitness counters are only written back to the pawns when needed.
+        if batched:
+            simulation.sync_pawns()
+
+        self.racing.race(self.match_ups, self.frame_count, self.max_game_length)
+
+        if batched:
+            simulation.compact()
+
+    def end_racing_generation(self) -> int:
+        """Closes the racing counts of the finished generation. Returns the match up frames it saved."""
+        if self.racing is None:
+            return 0
+
+        self.racing.end_generation(len(self.match_ups) * max(0, self.max_game_length))
+        return self.racing.last_saved_frames
+
+    def get_populations(self) -> List[Population]:
+        """Returns every population whose creatures take part in the match ups."""
+        return [self.population1]
+
+    def get_creature_network(self, pawn: Pawn) -> EvoNeuralNetwork:
+        """The network of a creature of any population (None for other pawns)."""
+        for population in self.get_populations():
+            net = population.get_network(pawn)
+
+            if net is not None:
+                return net
+
+        return None
+
+    def build_evaluation_key(self, match_up: MatchUp, creature: FitnessPawn) -> bytes:
+        """
+        Identifies a creature's evaluation by its genome & its opponents (genomes of creatures,
+        controller & stat bias of other pawns).
+
+        Match up seeds are left out: seeded runs derive new ones every generation, so keys holding
+        them would never repeat. Cached fitnesses stand in for any start, as in unseeded runs.
+        """
+
+        opponents = []
+
+        pawn: Pawn
+        for pawn in match_up.pawns:
+            if pawn is creature:
+                continue
+
+            net = self.get_creature_network(pawn)
+            if net is not None:
+                opponents.append(net.genome)
+            else:
+                opponents.append('%s/%s' % (
+                    type(pawn.controller).__qualname__, pawn.stat_bias.__qualname__))
+
+        return EvaluationCache.build_key(
+            self.get_creature_network(creature).genome,
+            type(creature.controller).__qualname__,
+            opponents
+        )
+
+    def store_evaluations(self):
+        """
+        Stores the fitness of every simulated creature in the evaluation cache.
+        With the AVERAGE policy, creatures get the mean of every sample of their key as fitness.
+        """
+
+        cache = self.evaluation_cache
+
+        match_up: MatchUp
+        for match_up in self.match_ups:
+            for pawn in match_up.pawns:
+                if self.get_creature_network(pawn) is None:
+                    continue
+
+                key = self.build_evaluation_key(match_up, pawn)
+
+                if cache.policy == AVERAGE:
+                    cache.lookup(key)
+
+                entry = cache.store(key, pawn.calculate_fitness())
+
+                if cache.policy == AVERAGE:
+                    pawn.set_fitness(entry.get_mean())
+
+        cache.end_generation()
+
+    def apply_evaluation_cache(self, match_ups: List[MatchUp]) -> List[MatchUp]:
+        """
+        With the REUSE policy, gives the creatures of every match up whose creatures were all
+        evaluated before their cached fitness & leaves that match up out.
+
+        Returns:
+            The match ups that still have to be simulated.
+        """
+
+        cache = self.evaluation_cache
+        if cache is None or cache.policy != REUSE:
+            return match_ups
+
+        remaining = []
+
+        match_up: MatchUp
+        for match_up in match_ups:
+            creatures = [pawn for pawn in match_up.pawns
+                         if self.get_creature_network(pawn) is not None]
+            entries = [cache.lookup(self.build_evaluation_key(match_up, creature))
+                       for creature in creatures]
+
+            if len(creatures) == 0 or any(entry is None for entry in entries):
+                remaining.append(match_up)
+                continue
+
+            for creature, entry in zip(creatures, entries):
+                creature.set_fitness(entry.get_mean())
+
+        return remaining
+
+    def save_population(self, pop: Population, path: str = None):
+        """Snapshots the population & hands it to the background checkpoint writer."""
+        if self.checkpoint_writer is None:
+            self.checkpoint_writer = CheckpointWriter()
+
+        print('\nSaving Population \"%s\" in the background...' % pop.dir_name)
+        self.checkpoint_writer.submit(pop.snapshot(path))
+
+    def close_checkpoint_writer(self):
+        """Waits for every pending save to be written."""
+        if self.checkpoint_writer is not None:
+            self.checkpoint_writer.close()
+
+    def do_parallel_generation(self):
+        """Simulates the whole current generation across worker processes, then builds the next."""
+        if self.evaluator is None:
+            self.evaluator = ParallelEvaluator(self.processes)
+
+        evaluator = self.evaluator
+        evaluator.batched = self.batched
+        evaluator.batched_inference = self.batched_inference
+        evaluator.pooled_lasers = self.pooled_lasers
+        evaluator.max_game_length = self.max_game_length
+
+        # Workers keep the decision schedules given here, so they match serial runs.
+        self.schedule_decisions()
+
+        # Fitness trackers are updated as the results are written onto the pawns.
+        frames = evaluator.evaluate(
+            self.match_ups,
+            self.get_populations(),
+            self.population1.opponent_factory
+        )
+
+        # Serial runs count the frame that ends the generation too.
+        self.frame_count = frames + 1
+
+        self.all_dead = not self.are_match_ups_still_going()
+        self.reset()
+
     def run(self, iterations=10):
         res = Environment.run(self)
         if res:
@@ -102,31 +313,45 @@ class EvolutionEnvironment(Environment):
         print('Running Sim Non-Graphically For %i iterations.' % iterations)
         # Run manual sim
         while self.current_session_generation_count <= iterations:
+            if self.parallel:
+                self.do_parallel_generation()
+                continue
+
             if self.frame_count > self.max_game_length and self.frame_count % 5000 == 0:
                 print('Exceeded max game length... Frame count: %i' %
                       self.frame_count)
             self.do_logic()
 
-    def on_draw(self):
-        super().on_draw()
+        if self.evaluator is not None:
+            self.evaluator.close()
+
+        self.export_trace()
+        self.close_checkpoint_writer()
 
-        if self.draw_networks:
-            # Draw best neural network graphically
-            if self.draw_best:
-                if self.best_match_up != None:
-                    best_creature = self.best_match_up.get_best_pawn_based_on_fitness(
-                        include_dead=True
-                    )
+    def get_drawn_networks(self) -> list:
+        # Draw best neural network graphically
+        if self.draw_best:
+            if self.best_match_up != None:
+                best_creature = self.best_match_up.get_best_pawn_based_on_fitness(
+                    include_dead=True
+                )
 
-                    if best_creature != None:
-                        net = self.population1.get_network(best_creature)
-                        if net != None:
-                            net.draw_weights()
-                            net.draw_neurons()
+                if best_creature != None:
+                    net = self.population1.get_network(best_creature)
+                    if net != None:
+                        return [(net, 0)]
+
+        return []
 
     def end(self):
-        arcade.close_window()
-        self.population1.save_to_dir()
+        self.close_graphics()
+
+        if self.evaluator is not None:
+            self.evaluator.close()
+
+        self.export_trace()
+        self.save_population(self.population1)
+        self.close_checkpoint_writer()
         Environment.end(self)
 
     def __str__(self):
@@ -0,0 +1,45 @@
+from environments.evolution_environment import *
+
+
+class IslandEnvironment(EvolutionEnvironment):
+    """
+    Headless EvolutionEnvironment for a single island of the island model.
+
+    Islands never save their own population (the coordinator checkpoints them),
+    and only print a one line report per generation.
+    """
+
+    island: int = 0
+    save_interval = 0
+
+    def __init__(self, population1: Population, island: int = 0, batched: bool = False):
+        self.island = island
+        super().__init__(population1, batched=batched)
+
+    def verbose(self):
+        pop = self.population1
+        print('Island %i | Generation: %i | Generational Max Fitness: %.1f | Max Overall Fitness: %.1f' % (
+            self.island,
+            pop.current_gen,
+            pop.generational_fitnesses[-1],
+            pop.max_overall_fitness
+        ))
+
+    def run_generations(self, generations: int):
+        """Simulates the given amount of generations."""
+        target = self.current_session_generation_count + generations
+
+        while self.current_session_generation_count < target:
+            if self.parallel:
+                self.do_parallel_generation()
+            else:
+                self.do_logic()
+
+    def immigrate(self, genomes: np.ndarray, layer_shapes):
+        """Inserts migrant genomes into the current generation."""
+        self.population1.immigrate([
+            EvoNeuralNetwork(genome=np.copy(genome), layer_shapes=layer_shapes)
+            for genome in genomes
+        ])
+
+        self.reset(build_new_gen=False)
@@ -6,6 +6,7 @@ from environments.adversarial_evolution_environment import *
 
 from util.match_up import *
 from util.population import *
+from util.island_model import *
 from actors.pawns.pawn import *
 from actors.actions import *
 from controllers.controller import *
@@ -143,15 +144,13 @@ def get_genome_to_load():
         else:
             print('\nInvalid choice.\n')
 
-    path = os.path.join(POPULATION_DIRECTORY, name)
-
     genome_number = get_int_choice(
         'Which genome would you like to sample?',
         min_range=0,
-        max_range=len(os.listdir(path))-2
+        max_range=Population.count_saved_networks(name)-1
     )
 
-    return NeuralNetwork.load_from_file(os.path.join(path, '%i.npy' % genome_number))
+    return Population.load_network(name, genome_number)
 
 
 def get_population_to_load(prompt: str):
@@ -238,6 +237,41 @@ def build_evolution_environment():
     return AdversarialEvolutionEnvironment(population1, population2)
 
 
+def build_island_coordinator():
+    name = input('Population Name?: ')
+    islands = get_int_choice(
+        'How many islands?', min_range=2, max_range=max(2, os.cpu_count())
+    )
+    size = get_int_choice(
+        'Island Population Size?', min_range=1, max_range=250
+    )
+
+    against = get_str_choice(
+        'Training Opponent', *training_opponent_types.keys()
+    )
+
+    populations = []
+    for i in range(islands):
+        population = Population('%s_%i' % (name, i), size=size)
+        population.set_opponent_factory(training_opponent_types[against])
+        populations.append(population)
+
+    selection = get_str_choice('Selection strategy?', *SELECTION_STRATEGIES)
+    for population in populations:
+        population.selection_strategy = selection
+
+    topology = get_str_choice('Migration topology?', RING_TOPOLOGY, RANDOM_TOPOLOGY)
+    coordinator = IslandCoordinator(populations, topology=topology)
+    coordinator.migration_interval = get_int_choice(
+        'Generations between migrations?', min_range=1, max_range=100
+    )
+    coordinator.migrants = get_int_choice(
+        'Migrants per island?', min_range=0, max_range=size - 1
+    )
+
+    return coordinator
+
+
 def build_player_pawn():
     pawn = Pawn()
     pawn.set_controller(PlayerController)
@@ -311,25 +345,79 @@ if __name__ == '__main__':
     spacer()
     # Get choice of simulation
     choice = get_str_choice(
-        'What simulation would you like to run?', 'freeplay', 'balance', 'evolution')
+        'What simulation would you like to run?', 'freeplay', 'balance', 'evolution', 'islands')
 
     env = None
 
     graphical = 'yes'
 
+    # Seeded runs are reproducible (fixed timestep & per match up random streams).
+    seed = 0
+    if choice != 'freeplay':
+        seed = get_int_choice(
+            'Deterministic seed? (0 for a random run)', 0, 2 ** 31 - 1)
+
+        if seed > 0:
+            seed_globals(seed)
+
     if choice == 'balance':
         env = build_balancing_environment()
         graphical = get_str_choice('Run graphically?', 'yes', 'no')
+        env.batched = get_str_choice(
+            'Use batched simulation?', 'yes', 'no') == 'yes'
 
     if choice == 'freeplay':
         env = build_freeplay_environment()
 
     if choice == 'evolution':
         env = build_evolution_environment()
+
+        selection = get_str_choice('Selection strategy?', *SELECTION_STRATEGIES)
+        for population in env.get_populations():
+            population.selection_strategy = selection
+
+        cache = get_str_choice(
+            'Cache fitness of unchanged genomes?', 'no', *CACHE_POLICIES)
+        if cache != 'no':
+            env.evaluation_cache = EvaluationCache(cache)
+
         graphical = get_str_choice('Run graphically?', 'yes', 'no')
+        env.batched = get_str_choice(
+            'Use batched simulation?', 'yes', 'no') == 'yes'
+        env.batched_inference = get_str_choice(
+            'Use batched network inference?', 'yes', 'no') == 'yes'
+        env.decision_interval = get_int_choice(
+            'Frames between creature decisions? (1 to decide every frame)', 1, 30)
+
+        if graphical == 'no':
+            env.parallel = get_str_choice(
+                'Simulate generations in parallel processes?', 'yes', 'no') == 'yes'
+
+        # Racing ranks every match up of a generation, which workers only see a shard of.
+        if not env.parallel and get_str_choice(
+                'Stop the worst match ups early (at 25/50/75% of each generation)?', 'no', 'yes') == 'yes':
+            env.racing = RacingScheduler()
+
+        # Worker processes aren't profiled.
+        if not env.parallel and get_str_choice(
+                'Time simulation phases?', 'yes', 'no') == 'yes':
+            trace = get_str_choice(
+                'Export a Chrome trace to \"%s\"?' % DEFAULT_TRACE_PATH, 'yes', 'no') == 'yes'
+            env.profiler = FrameProfiler(DEFAULT_TRACE_PATH if trace else None)
+
+    if choice == 'islands':
+        env = build_island_coordinator()
+        graphical = 'no'
+        env.batched = get_str_choice(
+            'Use batched simulation?', 'yes', 'no') == 'yes'
+        env.batched_inference = get_str_choice(
+            'Use batched network inference?', 'yes', 'no') == 'yes'
 
     assert env != None, 'Environment CANNOT be NoneType.'
 
+    if seed > 0:
+        env.set_seed(seed)
+
     iterations = 10
     if graphical == 'yes':
         env.init_graphics()
@@ -0,0 +1,357 @@
+from environments.environment import *
+from util.neural_network import *
+from controllers.player_controller import *
+import arcade
+import math
+
+# Highlights the imminent laser of any player pawn.
+DEBUG = True
+
+HALF_PI = math.pi / 2
+
+HEALTH_BAR_HEIGHT = 20
+HEALTH_BAR_MAX_WIDTH = 60
+
+# Determines how wide the base of the aiming cone should be.
+LEG_BASE = BODY_RADIUS * 0.75
+# Determines how far the end of the aiming cone should be.
+CONE_END = BODY_RADIUS * 1.4
+
+LASER_WIDTH = 5
+
+NEURON_DIST = 50
+VERBOSE_NEURON_SPACING_X = 60
+VERBOSE_NEURON_SPACING_Y = 18
+VERBOSE_NEURON_RADIUS = 8
+VERBOSE_NEURON_TEXT_SIZE = 5
+VERBOSE_MAX_SYNAPSE_THICKNESS = 2
+NETWORK_CENTER_HEIGHT = SCREEN_HEIGHT / 4
+
+DRAW_NEURON_LABELS = True
+
+
+def draw_laser(laser: Laser, specific_color=None):
+    if laser.is_dead:
+        return
+
+    color = laser.color
+
+    # If it has a min life span, color it differently when less than.
+    if laser.traveled < laser.min_life_span:
+        color = arcade.color.RED_DEVIL
+
+    if specific_color != None:
+        color = specific_color
+
+    hp = laser.get_head_position()
+    arcade.draw_line(laser.pos[0], laser.pos[1],
+                     hp[0], hp[1], color, LASER_WIDTH)
+
+
+def draw_lasers(pawn: Pawn, imminent_laser=None):
+    laser: Laser
+    for laser in pawn.get_lasers():
+        if laser == imminent_laser:
+            draw_laser(laser, specific_color=arcade.color.GREEN)
+        else:
+            draw_laser(laser)
+
+
+def draw_pawn(pawn: Pawn, color=arcade.color.WHITE, draw_tracers=False):
+    """
+    Creates the graphical representation for the pawn using a triangle & circle.
+    Sizing is relative to the BODY_RADIUS global variable.
+    """
+
+    if pawn.shield_on:
+        color = arcade.color.BLUE
+
+    if pawn.health <= 0:
+        color = arcade.color.RED
+
+    # Get triangle verticies relative to the rotation stored in the field variable 'direction'.
+    facing = (math.cos(pawn.direc) * CONE_END,
+              math.sin(pawn.direc) * CONE_END)
+
+    temp = pawn.direc+HALF_PI
+    leftLeg = (math.cos(temp) * LEG_BASE,
+               math.sin(temp) * LEG_BASE)
+
+    temp = pawn.direc-HALF_PI
+    rightLeg = (math.cos(temp) * LEG_BASE,
+                math.sin(temp) * LEG_BASE)
+
+    # Draw Ray Traces (Debugging)
+    if draw_tracers:
+        arcade.draw_line(pawn.pos[0], pawn.pos[1], facing[0]
+                         * 1000, facing[1] * 1000, arcade.color.RED_DEVIL, 3)
+
+    # Draw body circle
+    arcade.draw_circle_filled(
+        pawn.pos[0], pawn.pos[1], BODY_RADIUS * 0.7, color)
+
+    # Draw triangle according to the determined verticies.
+    arcade.draw_triangle_filled(pawn.pos[0]+facing[0], pawn.pos[1]+facing[1],
+                                pawn.pos[0] +
+                                leftLeg[0], pawn.pos[1]+leftLeg[1],
+                                pawn.pos[0] +
+                                rightLeg[0], pawn.pos[1]+rightLeg[1],
+                                color)
+
+    draw_health_bar(pawn)
+    draw_fitness_score(pawn)
+    draw_controller_paths(pawn)
+
+
+def draw_health_bar(pawn: Pawn):
+    """
+    Displays the pawns health above it's graphical representation.
+    Length is set in the global variable 'HEALTH_BAR_WIDTH'.
+    Height above it's body is set in the global variable 'HEALTH_BAR_HEIGHT'.
+    """
+
+    if pawn.health <= 0:
+        return
+
+    x = pawn.pos[0] - HEALTH_BAR_MAX_WIDTH / 2
+    y = pawn.pos[1] + BODY_RADIUS + HEALTH_BAR_HEIGHT
+
+    normal_health = pawn.health / pawn.stat_bias.max_health
+
+    color = arcade.color.GREEN
+
+    if normal_health <= 0.2:
+        color = arcade.color.RED
+    elif normal_health <= 0.5:
+        color = arcade.color.YELLOW
+    elif normal_health <= 0.7:
+        color = arcade.color.ORANGE
+
+    arcade.draw_line(x, y, x + (HEALTH_BAR_MAX_WIDTH *
+                                normal_health), y, color, 5)
+
+
+def draw_fitness_score(pawn: Pawn):
+    fit = pawn.calculate_fitness()
+    if fit <= -1:
+        return
+
+    arcade.draw_text(str(round(fit)),
+                     pawn.pos[0]-100, pawn.pos[1]-35, arcade.color.WHITE, align="center", width=200)
+
+
+def draw_controller_paths(pawn: Pawn):
+    """Draws the paths a controller tested during its last decision (if it logged any)."""
+    paths = getattr(pawn.controller, 'debug_paths', None)
+    if not paths:
+        return
+
+    for x1, y1, x2, y2 in paths:
+        arcade.draw_line(x1, y1, x2, y2, arcade.color.WHITE, 2)
+
+
+def draw_match_up(match_up: MatchUp, draw_dead=False, draw_tracers=False):
+    """Draws all pawns & lasers contained in the matchup."""
+
+    pawn_set = match_up.get_alive_pawns() if not draw_dead else match_up.pawns
+    pawn: Pawn
+
+    player_pawn: Pawn = None
+    imminent_laser: Laser = None
+
+    if DEBUG:
+        for pawn in pawn_set:
+            if issubclass(type(pawn.controller), PlayerController):
+                player_pawn = pawn
+                imminent_laser = match_up.get_most_imminent_laser(player_pawn)
+
+    # Draw all lasers first
+    for pawn in pawn_set:
+        draw_lasers(pawn, imminent_laser)
+
+    # Then draw all pawn bodies
+    for pawn in pawn_set:
+        draw_pawn(pawn, draw_tracers=draw_tracers)
+
+    # This way, pawn bodies will always overlay lasers.
+
+
+def get_neuron_locations(net: NeuralNetwork, offset_x=-70, offset_y=0):
+    """Returns the screen location of every neuron, per layer."""
+    x = SCREEN_WIDTH - len(net.neuron_weights) * \
+        VERBOSE_NEURON_SPACING_X + offset_x
+
+    locations = []
+
+    for layer in net.neuron_weights:
+        y = NETWORK_CENTER_HEIGHT - \
+            ((len(layer) / 2) * VERBOSE_NEURON_SPACING_Y) + offset_y
+
+        locations.append([])
+
+        for _ in range(len(layer)):
+            locations[-1].append((x, y))
+            y += VERBOSE_NEURON_SPACING_Y
+
+        x += VERBOSE_NEURON_SPACING_X
+
+    return locations
+
+
+def draw_network(net: NeuralNetwork, offset_x=-70, offset_y=0):
+    """Draws the weights & the last activations of the network (see 'ArcadeRenderer.capture_activations')."""
+
+    if net.neuron_weights == None:
+        return
+
+    locations = get_neuron_locations(net, offset_x, offset_y)
+    draw_weights(net, locations)
+    draw_neurons(net, locations)
+
+
+def draw_neurons(net: NeuralNetwork, locations: list):
+    for i, layer in enumerate(net.neuron_weights):
+        # All weights will be normalized. Use radial representation.
+        for j, weight in enumerate(np.nditer(layer)):
+            x, y = locations[i][j]
+
+            if DRAW_NEURON_LABELS:
+                if i == 0:  # input layer
+                    text = net.input_neuron_labels[j]
+                    arcade.draw_text(
+                        text,
+                        x-VERBOSE_NEURON_RADIUS * 2.5 -
+                        len(text) * (VERBOSE_NEURON_TEXT_SIZE/2.5),
+                        y,
+                        arcade.color.WHITE,
+                        font_size=VERBOSE_NEURON_TEXT_SIZE*1.5,
+                        align='center',
+                        anchor_x='center',
+                        anchor_y='center'
+                    )
+                elif i == len(net.neuron_weights) - 1:  # output layer
+                    text = net.output_neuron_labels[j]
+                    arcade.draw_text(
+                        text,
+                        x+VERBOSE_NEURON_RADIUS * 2.5,
+                        y,
+                        arcade.color.WHITE,
+                        font_size=VERBOSE_NEURON_TEXT_SIZE*1.5,
+                        anchor_y='center'
+                    )
+
+            arcade.draw_circle_filled(
+                x,
+                y,
+                VERBOSE_NEURON_RADIUS,
+                arcade.color.WHITE if i < len(
+                    net.neuron_weights)-1 or weight < REACTION_THRESHOLD else arcade.color.GREEN
+            )
+
+            arcade.draw_text(
+                '%.1f' % weight, x, y,
+                arcade.color.BLACK,
+                font_size=VERBOSE_NEURON_TEXT_SIZE,
+                align='center',
+                anchor_x='center',
+                anchor_y='center')
+
+
+def draw_weights(net: NeuralNetwork, locations: list):
+    for i, layer_weight_set in enumerate(net.layer_weights):
+        layer_weight_set = layer_weight_set.T
+        layer1_neuron_locations = locations[i]
+        layer2_neuron_locations = locations[i+1]
+
+        for j, weight_layer in enumerate(layer_weight_set):
+            neuron1 = layer1_neuron_locations[j]
+
+            for k, weight in enumerate(layer_weight_set[j]):
+                neuron2 = layer2_neuron_locations[k]
+
+                arcade.draw_line(
+                    neuron1[0],
+                    neuron1[1],
+                    neuron2[0],
+                    neuron2[1],
+                    arcade.color.WHITE,
+                    border_width=max(
+                        0.1, VERBOSE_MAX_SYNAPSE_THICKNESS * weight)
+                )
+
+
+class ArcadeRenderer(arcade.Window):
+    """
+    Arcade window that observes an Environment.
+
+    The environment runs without any knowledge of this window, which only
+    forwards updates & key presses to it & draws its current state.
+    """
+
+    environment: Environment
+
+    # Networks capturing their activations, as they are drawn.
+    captured_networks: list = None
+
+    def __init__(self, environment: Environment):
+        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT)
+        arcade.set_background_color(arcade.color.BLACK)
+        self.environment = environment
+        self.captured_networks = []
+
+    def run(self):
+        arcade.run()
+
+    def on_update(self, delta_time):
+        self.environment.on_update(delta_time)
+
+    def on_key_press(self, symbol, modifiers):
+        self.environment.on_key_press(symbol, modifiers)
+
+    def on_key_release(self, symbol, modifiers):
+        self.environment.on_key_release(symbol, modifiers)
+
+    def on_draw(self):
+        env = self.environment
+        env.prepare_draw()
+        arcade.start_render()
+
+        match_up: MatchUp
+        for match_up in env.get_drawn_match_ups():
+            draw_match_up(match_up, draw_dead=env.draw_dead,
+                          draw_tracers=env.draw_tracers)
+
+            if not env.draw_best and env.draw_match_connections:
+                prev = None
+
+                for pawn in match_up.get_alive_pawns():
+                    if prev != None:
+                        arcade.draw_line(
+                            prev.pos[0], prev.pos[1], pawn.pos[0], pawn.pos[1], arcade.color.RED_DEVIL)
+
+                    prev = pawn
+
+        arcade.draw_text(
+            env.print_str,
+            10,
+            SCREEN_HEIGHT - 20,
+            arcade.color.WHITE
+        )
+
+        drawn = env.get_drawn_networks() if env.draw_networks else []
+        self.capture_activations([net for net, _ in drawn])
+
+        for net, offset_y in drawn:
+            draw_network(net, offset_y=offset_y)
+
+    def capture_activations(self, networks: list):
+        """Makes only the given (drawn) networks capture their activations, releasing all others."""
+        for net in self.captured_networks:
+            if not any(net is drawn for drawn in networks):
+                net.capture_activations = False
+                net.neuron_weights = None
+
+        for net in networks:
+            net.capture_activations = True
+
+        self.captured_networks = networks
@@ -41,6 +41,60 @@ assert_near_equal(net2_children[0], net2_children[1], inverse=True)
 print('Assertion passed for children being different.')
 
 
+# Test mutations & crossovers of genome matrices.
+genomes = np.random.uniform(-WEIGHT_LIMIT, WEIGHT_LIMIT, (200, 500))
+mutated = np.copy(genomes)
+mutate_genomes(mutated, 0.2)
+
+assert abs(np.mean(mutated != genomes) - 0.2) < 0.01, 'Weights MUST be mutated at the mutation rate.'
+assert np.abs(mutated).max() <= WEIGHT_LIMIT, 'Mutated weights MUST stay within the weight limit.'
+
+mutated = np.full((10, 50), WEIGHT_LIMIT, dtype=float)
+mutate_genomes(mutated, 1)
+assert np.abs(mutated).max() <= WEIGHT_LIMIT and np.any(mutated < WEIGHT_LIMIT), \
+    'Weights mutated past the weight limit MUST be clipped.'
+
+mutated = np.copy(genomes)
+mutate_genomes(mutated, 0)
+assert np.array_equal(mutated, genomes), 'Nothing MUST be mutated at a mutation rate of 0.'
+print('Assertion passed for genome mutations.')
+
+parentsA = genomes[:100]
+parentsB = genomes[100:]
+childrenA, childrenB = crossover_genomes(parentsA, parentsB)
+
+assert np.all((childrenA == parentsA) | (childrenA == parentsB)), 'Every gene MUST come from one of the parents.'
+assert np.array_equal(childrenB, np.where(childrenA == parentsA, parentsB, parentsA)), \
+    'The second child MUST take every gene from the other parent.'
+
+cutoffs = np.random.randint(0, 500, 100)
+childrenA, _ = crossover_genomes(parentsA, parentsB, cutoffs)
+for child, a, b, cutoff in zip(childrenA, parentsA, parentsB, cutoffs):
+    assert np.array_equal(child[:cutoff + 1], a[:cutoff + 1]) and np.array_equal(child[cutoff + 1:], b[cutoff + 1:]), \
+        'Children MUST switch from parent A to parent B after the cutoff.'
+print('Assertion passed for genome crossovers.')
+
+
+# Test the layer views of flat genomes.
+net = EvoNeuralNetwork(dimensions=(14, 14, 9))
+net.set_genome(np.random.randn(net.genome.size), net.layer_shapes)
+assert all(np.shares_memory(layer, net.genome) for layer in net.layer_weights), \
+    'Layers MUST be views into the genome.'
+
+net.mutate(1)
+assert np.array_equal(np.concatenate([np.ravel(layer) for layer in net.layer_weights]), net.genome), \
+    'Mutating the genome MUST update the layers.'
+copied = EvoNeuralNetwork(layer_weights=[np.copy(layer) for layer in net.layer_weights])
+assert np.allclose(net.output(inputs1), copied.output(inputs1)), \
+    'Networks MUST output with their current genome.'
+
+net = EvoNeuralNetwork(layer_weights=[np.random.randn(3, 4), np.random.randn(2, 4)])
+net.flatten()
+net.genome[:] = 0
+assert not any(layer.any() for layer in net.layer_weights), 'Flattened layers MUST be views into the genome.'
+print('Assertion passed for genome layer views.')
+
+
 W = np.array([
     [-1.58686978,  1.40257049,  0.06003039, -0.36521968],
     [-2.20114997, -0.6549252, -0.32541635, -1.12067112],
@@ -75,6 +129,895 @@ assert np.allclose(
     YhatActual, Yhat, 0.0001), 'Fixed predictions & Lib Net predictions MUST be equal.'
 
 
+# Test batched outputs of networks.
+from util.batched_inference import *
+
+nets = [EvoNeuralNetwork(dimensions=(14, 14, 9)) for _ in range(10)]
+inference = BatchedInference(nets)
+inputs = np.random.randn(10, 14)
+
+batched_outputs = inference.output(inputs)
+single_outputs = np.array([net.output(list(x)) for net, x in zip(nets, inputs)])
+
+assert np.allclose(batched_outputs, single_outputs), \
+    'Batched outputs MUST match individual network outputs.'
+
+rows = np.array([3, 3, 7])
+assert np.allclose(inference.output(inputs[:3], rows), np.array(
+    [nets[3].output(list(inputs[0])), nets[3].output(list(inputs[1])), nets[7].output(list(inputs[2]))])), \
+    'Batched outputs MUST use the network of each given row.'
+
+rows = np.array([8, 2, 5])
+assert np.allclose(inference.output(inputs[rows], rows), single_outputs[rows]), \
+    'Batched outputs of a subset of the networks MUST match their individual outputs.'
+
+# Most networks are scattered into the full batch, few are evaluated on their own.
+rows = np.array([9, 1, 4, 4, 0, 7, 2, 3])
+assert rows.size > len(nets) * SPARSE_FRACTION and np.allclose(inference.output(inputs[:8], rows), np.array(
+    [nets[r].output(list(x)) for r, x in zip(rows, inputs)])), \
+    'Batched outputs of most of the networks MUST match their individual outputs.'
+assert np.array_equal(inference.output(inputs[:3], rows[:3]), inference.output(inputs[:8], rows)[:3]), \
+    'Evaluating few networks on their own MUST give the same outputs as the full batch.'
+print('Assertion passed for batched network outputs.')
+
+
+# Test selection strategies.
+from util.selection import *
+
+fitnesses = np.array([0, 1, 2, 3, 0.5, 4])
+expected = {
+    ROULETTE: fitnesses / fitnesses.sum(),
+    RANK: np.array([1, 3, 4, 5, 2, 6]) / 21,
+    # Chance of the best of 3 uniform ranks being each rank.
+    TOURNAMENT: np.array([1, 19, 37, 61, 7, 91]) / 216
+}
+
+for strategy, probabilities in expected.items():
+    picks = SelectionEngine(fitnesses, strategy).sample(200000)
+    assert np.allclose(np.bincount(picks, minlength=6) / 200000, probabilities, atol=0.01), \
+        'Selection frequencies MUST match the %s distribution.' % strategy
+
+assert np.all(SelectionEngine(np.zeros(4)).sample(100) < 4), \
+    'Roulette selection without any fitness MUST still pick valid indices.'
+print('Assertion passed for selection strategies.')
+
+
+# Test spatial hash queries.
+from util.spatial_hash import *
+from actors.actor import Actor
+
+spatial_hash = SpatialHash()
+points = np.random.uniform(-DEFAULT_BOUND, SCREEN_WIDTH + DEFAULT_BOUND, (500, 2))
+for i, point in enumerate(points):
+    spatial_hash.insert(i, point, i)
+
+query = Actor()
+for pos in points[:50]:
+    query.pos = list(pos)
+    for radius_squared in (BODY_RADIUS_SQUARED, 100 ** 2):
+        near = [i for i, point in enumerate(points)
+                if query.dist_squared(pos=tuple(point)) <= radius_squared]
+        candidates = spatial_hash.query(pos, radius_squared)
+
+        assert set(near) <= set(candidates), \
+            'Spatial hash queries MUST contain every point within the (donut-compensated) radius.'
+        assert candidates == sorted(candidates), \
+            'Spatial hash queries MUST be ordered by key.'
+print('Assertion passed for spatial hash queries.')
+
+
+# Test downsampling of histories.
+from util.generation_log import *
+
+history = np.random.randn(100000)
+x, y = downsample_min_max(history, 1000)
+
+assert len(x) <= 1000 and np.array_equal(history[x], y), \
+    'Downsampled points MUST be original points.'
+assert y.min() == history.min() and y.max() == history.max(), \
+    'Downsampling MUST keep the extremes of the history.'
+print('Assertion passed for downsampled histories.')
+
+
+
+# Test the evaluation cache.
+from util.evaluation_cache import *
+
+genome = np.random.randn(20)
+key = EvaluationCache.build_key(genome, 'CreatureController', ['DynamicController/Normal'])
+
+assert key == EvaluationCache.build_key(np.copy(genome), 'CreatureController', ['DynamicController/Normal']), \
+    'Equal genomes & opponents MUST share a key.'
+assert key != EvaluationCache.build_key(genome, 'CreatureController', ['DynamicController/Strong']), \
+    'Different opponents MUST have different keys.'
+
+cache = EvaluationCache(AVERAGE, capacity=2)
+cache.store(key, 2)
+cache.store(key, 4)
+assert cache.lookup(key).get_mean() == 3, 'Cached samples MUST be averaged.'
+
+cache.store(b'b', 1)
+cache.lookup(key)
+cache.store(b'c', 1)
+assert cache.lookup(b'b') is None and cache.lookup(key) is not None, \
+    'The least recently used entry MUST be evicted.'
+
+cache.end_generation()
+assert (cache.last_hits, cache.last_lookups) == (3, 4), 'Hits MUST be counted per generation.'
+print('Assertion passed for the evaluation cache.')
+
+
+# Test the vectorized geometry kernels.
+from util.geometry import *
+
+positions = np.random.uniform(-DEFAULT_BOUND, SCREEN_WIDTH + DEFAULT_BOUND, (40, 2))
+targets = np.random.uniform(-DEFAULT_BOUND, SCREEN_WIDTH + DEFAULT_BOUND, (30, 2))
+pairwise_dists = pairwise_donut_dist_squared(positions, targets)
+pairwise_angles = pairwise_angles_to(positions, targets)
+
+for i, pos in enumerate(positions):
+    query.pos = list(pos)
+
+    for j, target in enumerate(targets):
+        assert query.dist_squared(pos=tuple(target)) == pairwise_dists[i, j], \
+            'Vectorized distances MUST exactly match Actor.dist_squared.'
+        assert query.angle_to(pos=tuple(target)) == pairwise_angles[i, j], \
+            'Vectorized angles MUST exactly match Actor.angle_to.'
+print('Assertion passed for geometry kernels.')
+
+
+# Test the batched threat map.
+from util.threat_map import *
+
+threat_map = ThreatMap()
+queued = []
+for _ in range(20):
+    pos = tuple(np.random.uniform(0, SCREEN_WIDTH, 2))
+    lasers = [Laser(query, list(np.random.uniform(0, SCREEN_WIDTH, 2)), random.uniform(0, 2 * math.pi))
+              for _ in range(random.randint(0, 5))]
+    threat_map.add(pos, lasers)
+    queued.append((pos, lasers))
+
+for (pos, lasers), threats in zip(queued, threat_map.evaluate()):
+    if not lasers:
+        assert threats is None, 'Positions without lasers MUST have no threats.'
+        continue
+
+    expected = [max(laser.get_dist_if_in_path((pos[0] + ox, pos[1] + oy), BODY_RADIUS) for laser in lasers)
+                for ox, oy in CANDIDATE_OFFSETS]
+    assert np.allclose(threats, expected), \
+        'Batched threats MUST match the worst Laser.get_dist_if_in_path of every candidate move.'
+print('Assertion passed for the threat map.')
+
+
+# Test the match up query cache.
+from util.match_up import *
+
+pawns = [Pawn() for _ in range(3)]
+match_up = MatchUp(*pawns)
+
+assert match_up.get_lasers(pawns[0]) == [] and match_up.get_lasers(pawns[0]) == [], \
+    'Enemy lasers MUST start empty.'
+assert match_up.query_hits[LASERS_QUERY] == 1, 'Repeated queries MUST be answered from the cache.'
+
+pawns[1].long_attack()
+assert match_up.get_lasers(pawns[0]) == list(pawns[1].lasers), \
+    'Spawned lasers MUST invalidate the enemy lasers.'
+
+match_up.kill(pawns[1])
+assert match_up.get_opponents_for(pawns[0]) == [pawns[2]] and match_up.get_lasers(pawns[0]) == [], \
+    'Killed pawns MUST invalidate the opponents & enemy lasers.'
+print('Assertion passed for the match up query cache.')
+
+
+# Test the batched observations.
+from util.observations import *
+
+pawns = [Pawn() for _ in range(4)]
+for pawn in pawns:
+    pawn.pos = list(np.random.uniform(0, SCREEN_WIDTH, 2))
+pawns[1].long_attack()
+
+match_up = MatchUp(*pawns)
+controllers = [CreatureController(pawn) for pawn in pawns]
+observations = ObservationBuilder(capacity=1).build([(match_up, c) for c in controllers])
+
+for controller, row in zip(controllers, observations):
+    controller.look(match_up)
+    assert np.array_equal(row, controller.inputs + [1]), \
+        'Batched observations MUST exactly match CreatureController.look (plus the bias).'
+
+inference = BatchedInference([c.neural_network for c in controllers])
+assert np.allclose(inference.output_biased(observations), [c.neural_network.output(c.inputs) for c in controllers]), \
+    'Batched observations MUST be fed straight into batched inference.'
+print('Assertion passed for batched observations.')
+
+
+# Test the decoded actions.
+from util.action_decoding import *
+
+outputs = np.random.uniform(0, 1.4, (50, OUTPUT_NODES))
+scalar = [CreatureController(Pawn()) for _ in range(50)]
+decoded = [CreatureController(Pawn()) for _ in range(50)]
+
+for c1, c2 in zip(scalar, decoded):
+    active = {action for action in ACTION_LIST if random.random() < 0.5}
+    c1.active_actions = set(active)
+    c2.active_actions = set(active)
+
+for controller, row in zip(scalar, outputs.tolist()):
+    controller.outputs = row
+    controller.act()
+
+actions = DecodedActions.from_controllers(decoded, outputs)
+for i, controller in enumerate(decoded):
+    actions.apply(i, controller)
+
+for c1, c2 in zip(scalar, decoded):
+    assert (c1.pawn.vel, c1.pawn.looking, c1.active_actions, c1.pawn.shield_on) == \
+        (c2.pawn.vel, c2.pawn.looking, c2.active_actions, c2.pawn.shield_on), \
+        'Decoded actions MUST leave pawns in the same state as CreatureController.act.'
+
+from controllers.creature_shifting_stats_controller import *
+
+
+def build_shifting_match_up(seed: int) -> MatchUp:
+    pawns = [FitnessPawn() for _ in range(2)]
+    for pawn in pawns:
+        pawn.set_controller(CreatureShiftingController)
+
+    match_up = MatchUp(*pawns)
+    match_up.seed(seed)
+    return match_up
+
+
+scalar = build_shifting_match_up(3)
+batched = build_shifting_match_up(3)
+for a, b in zip(scalar.pawns, batched.pawns):
+    b.controller.neural_network = a.controller.neural_network
+
+inference = BatchedInference.from_match_ups([batched])
+for _ in range(5):
+    for pawn in scalar.pawns:
+        pawn.controller.look(scalar)
+        pawn.controller.think()
+        pawn.controller.act()
+
+    inference.decide([(batched, pawn) for pawn in batched.pawns])
+
+assert all(pawn.controller.current_index != -1 for pawn in batched.pawns), \
+    'Controllers overriding act MUST still act under batched inference.'
+assert [(p.controller.current_index, p.stat_bias) for p in scalar.pawns] == \
+    [(p.controller.current_index, p.stat_bias) for p in batched.pawns], \
+    'Shifting creatures MUST shift their stats identically under batched inference.'
+print('Assertion passed for decoded actions.')
+
+
+# Test the staggered decision schedules.
+creatures = [FitnessPawn() for _ in range(12)]
+for creature in creatures:
+    creature.set_controller(CreatureController)
+
+scripted = [Pawn() for _ in range(12)]
+env = Environment(*[MatchUp(a, b) for a, b in zip(creatures, scripted)])
+env.decision_interval = 4
+env.schedule_decisions()
+
+for frame in range(1, 9):
+    assert sum(c.controller.is_deciding(frame) for c in creatures) == 3, \
+        'Creature decisions MUST be spread evenly across frames.'
+assert all(pawn.controller.is_deciding(frame) for pawn in scripted for frame in range(1, 9)), \
+    'Controllers that do not repeat their actions MUST still decide every frame.'
+print('Assertion passed for staggered decision schedules.')
+
+
+# Test racing match ups.
+from util.racing import *
+
+for i, creature in enumerate(creatures):
+    creature.total_hits = i
+    creature.update_fitness()
+
+racing = RacingScheduler(cut_fraction=0.5)
+assert [f for f in range(1, 101) if racing.is_checkpoint(f, 100)] == [25, 50, 75], \
+    'Match ups MUST be raced at every checkpoint of the game length.'
+
+stopped = racing.race(env.match_ups, 25, 100)
+assert set(stopped) == set(env.match_ups[:6]), \
+    'Racing MUST stop the worst half of the running match ups.'
+assert all(not m.is_still_going() for m in stopped) and env.running_matches_count() == 6, \
+    'Stopped match ups MUST no longer be running.'
+
+racing.end_generation(len(env.match_ups) * 100)
+assert (racing.last_stopped, racing.last_saved_frames) == (6, 6 * 75), \
+    'Racing MUST count the frames saved by stopped match ups.'
+print('Assertion passed for racing match ups.')
+
+# Test pooled lasers against the object path.
+def build_laser_match_up(pooled: bool) -> MatchUp:
+    rng = random.Random(3)
+    pawns = [FitnessPawn() for _ in range(4)]
+    for pawn in pawns:
+        pawn.pos = [rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT)]
+
+    match_up = MatchUp(*pawns)
+    if pooled:
+        match_up.attach_laser_pool(LaserPool())
+
+    # Lasers around random targets, some close enough to hit them (& some not yet damaging).
+    for _ in range(60):
+        owner, target = rng.choice(pawns), rng.choice(pawns)
+        pos = owner.pos
+        owner.pos = [target.pos[0] + rng.uniform(-30, 30), target.pos[1] + rng.uniform(-30, 30)]
+        owner.direc = rng.uniform(0, 2 * math.pi)
+        owner.fire_laser(rng.uniform(1, 10), (rng.choice([0, 1000]), 2000), 1, None)
+        owner.pos = pos
+
+    return match_up
+
+
+objects = build_laser_match_up(pooled=False)
+pooled = build_laser_match_up(pooled=True)
+
+
+def get_laser_states(lasers) -> list:
+    return sorted((tuple(laser.pos), laser.direc) for laser in lasers)
+
+
+def get_imminent_state(laser) -> tuple:
+    return None if laser is None else (tuple(laser.pos), laser.direc)
+
+
+imminent = [get_imminent_state(objects.get_most_imminent_laser(pawn)) for pawn in objects.pawns]
+assert any(imminent), 'Some pawn MUST have an imminent laser.'
+
+for pawn1, pawn2, expected in zip(objects.pawns, pooled.pawns, imminent):
+    assert get_laser_states(objects.get_lasers(pawn1)) == get_laser_states(pooled.get_lasers(pawn2)), \
+        'Pooled enemy lasers MUST match the object lasers.'
+    assert get_imminent_state(pooled.get_most_imminent_laser(pawn2)) == expected, \
+        'Pooled imminent lasers MUST match the object path.'
+
+pooled.invalidate_queries()
+MatchUp.cache_imminent_lasers([(pooled, pawn) for pawn in pooled.pawns])
+assert [get_imminent_state(pooled.get_most_imminent_laser(pawn)) for pawn in pooled.pawns] == imminent, \
+    'Imminent lasers queried for all pawns at once MUST match the object path.'
+
+for pawn in objects.pawns:
+    if not pawn.update_collisions(objects):
+        objects.kill(pawn)
+MatchUp.resolve_pooled_hits([(pooled, pawn) for pawn in pooled.pawns])
+
+
+def get_hit_states(match_up: MatchUp) -> list:
+    return [(p.health, p.total_hits, p.total_hits_taken) for p in match_up.pawns]
+
+
+assert sum(pawn.total_hits for pawn in objects.pawns) > 0, 'Some lasers MUST hit.'
+assert get_hit_states(objects) == get_hit_states(pooled), \
+    'Pooled hits MUST damage & log exactly like the object path.'
+assert get_laser_states(l for p in objects.pawns for l in p.get_lasers() if not l.is_dead) == \
+    get_laser_states(l for p in pooled.pawns for l in p.get_lasers()), \
+    'Pooled hits MUST destroy the same lasers as the object path.'
+print('Assertion passed for pooled lasers.')
+
+# Test the batched simulation against the object engine.
+from controllers.dynamic_controller import *
+
+networks = [NeuralNetwork(NETWORK_DIMENSIONS) for _ in range(8)]
+
+
+def build_engine_environment(batched: bool) -> Environment:
+    creatures = [FitnessPawn() for _ in networks]
+    opponents = [Pawn() for _ in networks]
+
+    for creature, network in zip(creatures, networks):
+        creature.set_controller(CreatureController)
+        creature.controller.neural_network = network
+
+    for opponent in opponents:
+        opponent.set_controller(DynamicController)
+
+    env = Environment(*[MatchUp(a, b) for a, b in zip(creatures, opponents)], batched=batched)
+    env.max_game_length = 0
+    env.set_seed(11)
+    return env
+
+
+def get_engine_states(env: Environment) -> list:
+    if env.simulation is not None:
+        env.simulation.sync_pawns()
+
+    return [(tuple(p.pos), p.direc, p.health, p.is_dead, p.calculate_fitness())
+            for match_up in env.match_ups for p in match_up.pawns]
+
+
+objects = build_engine_environment(batched=False)
+objects.pooled_lasers = True
+batched = build_engine_environment(batched=True)
+
+for _ in range(300):
+    objects.do_logic()
+    batched.do_logic()
+
+states = get_engine_states(objects)
+assert any(health < BASE_MAX_HEALTH for _, _, health, _, _ in states), 'Some pawns MUST be hit.'
+assert states == get_engine_states(batched), \
+    'The batched simulation MUST move, damage & score pawns exactly like the (pooled) object engine.'
+print('Assertion passed for the batched simulation.')
+
+# Test the shared threat map of dynamic controllers (without batched inference).
+evaluated = []
+prepared = []
+evaluate = ThreatMap.evaluate
+think = DynamicController.think
+
+
+def record_evaluate(self: ThreatMap, *args) -> list:
+    evaluated.append(len(self))
+    return evaluate(self, *args)
+
+
+def record_think(self: DynamicController):
+    prepared.append(self.threats is not None)
+    return think(self)
+
+
+def build_dynamic_match_up() -> MatchUp:
+    pawns = [Pawn(), Pawn()]
+
+    for pawn in pawns:
+        pawn.set_controller(DynamicController)
+
+    return MatchUp(*pawns)
+
+
+env = Environment(*[build_dynamic_match_up() for _ in range(8)])
+env.max_game_length = 0
+env.set_seed(11)
+
+ThreatMap.evaluate = record_evaluate
+DynamicController.think = record_think
+shared = 0
+
+for _ in range(60):
+    evaluated.clear()
+    prepared.clear()
+    env.do_logic()
+
+    # Pawns of a match up decide one after the other, so every frame has one round per pawn.
+    assert len(evaluated) <= 2 and sum(evaluated) == sum(prepared), \
+        'Every threatened dynamic controller of a round MUST be prepared through one shared ThreatMap.'
+    shared = max([shared] + evaluated)
+
+ThreatMap.evaluate = evaluate
+DynamicController.think = think
+
+assert shared > 1, 'Several dynamic controllers MUST share a ThreatMap.'
+print('Assertion passed for shared threat maps.')
+
+# Test populations that were never saved.
+from util.population import *
+import shutil
+
+unsaved = Population('test_history_only', size=2)
+unsaved.log_generation({'generation': 0, 'max': 1.0})
+
+assert not Population.is_valid_population_directory(unsaved.dir_name) and \
+    unsaved.dir_name not in Population.get_valid_populations(), \
+    'Populations that were never saved MUST NOT be offered for loading.'
+assert Population.has_history(unsaved.dir_name), 'Unsaved populations MUST still have a history to visualize.'
+
+try:
+    Population.load_from_dir(unsaved.dir_name)
+    error = ''
+except Exception as e:
+    error = str(e)
+assert 'never saved' in error, 'Loading an unsaved population MUST report that it was never saved.'
+
+unsaved.save_to_dir()
+assert Population.is_valid_population_directory(unsaved.dir_name), 'Saved populations MUST be loadable.'
+shutil.rmtree(os.path.join(POPULATION_DIRECTORY, unsaved.dir_name))
+print('Assertion passed for unsaved populations.')
+
+# Test the evaluation keys of seeded runs.
+from environments.evolution_environment import *
+
+population = Population('test_seeded_keys', size=4)
+population.set_opponent_factory(Pawn)
+env = EvolutionEnvironment(population)
+env.set_seed(3)
+
+
+def get_evaluation_keys(env: EvolutionEnvironment) -> list:
+    return [env.build_evaluation_key(match_up, pawn) for match_up in env.match_ups
+            for pawn in match_up.pawns if env.get_creature_network(pawn) is not None]
+
+
+seeds = [match_up.seed_value for match_up in env.match_ups]
+keys = get_evaluation_keys(env)
+env.seed_match_ups(generation=1)
+
+assert seeds != [match_up.seed_value for match_up in env.match_ups] and keys == get_evaluation_keys(env), \
+    'Evaluation keys of seeded runs MUST repeat across generations.'
+print('Assertion passed for seeded evaluation keys.')
+
+# Test population checkpoints.
+from util.checkpoint_writer import *
+
+saved = Population('test_checkpoint', size=3)
+saved.log_generations = False
+saved.current_gen = 7
+saved.generational_fitnesses = [1.0, 2.5, 4.0]
+genomes = np.stack([net.genome.copy() for net in saved.neural_networks])
+
+writer = CheckpointWriter()
+writer.submit(saved.snapshot())
+
+# The population keeps evolving while the snapshot is written.
+saved.neural_networks[0].genome[:] = 0
+
+writer.flush()
+writer.close()
+
+loaded = Population.load_from_dir(saved.dir_name)
+checkpoint_path = Population.get_checkpoint_path(saved.dir_name)
+
+assert np.array_equal(np.stack([net.genome for net in loaded.neural_networks]), genomes), \
+    'Loaded genomes MUST equal the snapshot\'s.'
+assert loaded.current_gen == 7 and loaded.generational_fitnesses == [1.0, 2.5, 4.0], \
+    'Loaded populations MUST keep their generation & fitness history.'
+assert not os.path.exists(checkpoint_path + '.tmp'), 'Checkpoints MUST be renamed over the old one once written.'
+print('Assertion passed for checkpoint round trips.')
+
+# A write failing midway leaves the last checkpoint untouched.
+try:
+    PopulationCheckpoint.write_genomes(checkpoint_path, np.array(
+        [['not a genome']]), saved.neural_networks[0].layer_shapes)
+    failed = False
+except ValueError:
+    failed = True
+
+assert failed and os.path.exists(checkpoint_path + '.tmp'), 'The failed write MUST stop in the temporary file.'
+assert np.array_equal(PopulationCheckpoint(checkpoint_path).genomes, genomes), \
+    'Failed writes MUST NOT touch the last checkpoint.'
+print('Assertion passed for atomic checkpoint writes.')
+shutil.rmtree(os.path.join(POPULATION_DIRECTORY, saved.dir_name))
+
+# Populations saved one file per network are still loaded, then converted on save.
+legacy = Population('test_legacy', size=2)
+legacy_path = os.path.join(POPULATION_DIRECTORY, legacy.dir_name)
+os.makedirs(os.path.join(legacy_path, 'data'))
+
+for i, net in enumerate(legacy.neural_networks):
+    net.save_to_file(os.path.join(legacy_path, '%i' % i))
+
+with open(os.path.join(legacy_path, 'data/data.json'), 'w') as f:
+    json.dump({'current_gen': 5}, f)
+np.save(os.path.join(legacy_path, 'data/generational_fitnesses.npy'), np.array([3.0, 6.0]))
+
+loaded = Population.load_from_dir(legacy.dir_name)
+assert Population.open_checkpoint(legacy.dir_name) is None, 'Legacy populations MUST NOT have a checkpoint yet.'
+assert all(np.array_equal(a.genome, b.genome) for a, b in zip(loaded.neural_networks, legacy.neural_networks)) and \
+    loaded.current_gen == 5 and loaded.generational_fitnesses == [3.0, 6.0], \
+    'Legacy populations MUST load their networks, generation & fitness history.'
+
+loaded.log_generations = False
+loaded.save_to_dir()
+assert Population.list_legacy_networks(legacy_path) == [] and not os.path.isdir(os.path.join(legacy_path, 'data')), \
+    'Saving MUST replace the legacy files by a checkpoint.'
+assert np.array_equal(Population.open_checkpoint(legacy.dir_name).genomes, np.stack(
+    [net.genome for net in legacy.neural_networks])), 'Converted checkpoints MUST hold the legacy genomes.'
+shutil.rmtree(legacy_path)
+print('Assertion passed for legacy populations.')
+
+# Test seeded runs.
+from util.seeding import *
+
+
+class RecordingPopulation(Population):
+    """
+    Keeps the fitnesses (& the counters they are computed from, & deaths) of every generation it
+    selects from, & the frames each generation was simulated for.
+    """
+
+    fitnesses: list = None
+    frames: list = None
+
+    def natural_selection(self, frames: int = 0, *args):
+        self.frames.append(frames)
+        return Population.natural_selection(self, frames, *args)
+
+    def build_selection_engine(self) -> SelectionEngine:
+        counters = [(c.total_hits, c.total_attacks, c.total_hits_taken, c.is_dead)
+                    for c in self.creatures_to_nets.keys()]
+        self.fitnesses.append(np.column_stack((self.get_fitnesses(), counters)))
+        return Population.build_selection_engine(self)
+
+
+def build_dynamic_opponent() -> Pawn:
+    pawn = Pawn()
+    pawn.set_controller(DynamicController)
+    return pawn
+
+
+def run_seeded_generations(seed: int, batched: bool = False, batched_inference: bool = False,
+                           parallel: bool = False, game_length: int = 150) -> RecordingPopulation:
+    seed_globals(seed)
+
+    population = RecordingPopulation('test_seeded_run', size=6)
+    population.fitnesses = []
+    population.frames = []
+    population.log_generations = False
+    population.set_opponent_factory(build_dynamic_opponent)
+
+    env = EvolutionEnvironment(population, batched=batched)
+    env.batched_inference = batched_inference
+    env.max_game_length = game_length
+    env.save_interval = 0
+    env.verbose = lambda: None
+    env.parallel = parallel
+    env.processes = 2
+    env.set_seed(seed)
+
+    while env.current_session_generation_count < 2:
+        if parallel:
+            env.do_parallel_generation()
+        else:
+            env.do_logic()
+
+    if env.evaluator is not None:
+        env.evaluator.close()
+
+    return population
+
+
+for batched, batched_inference in ((False, False), (True, False), (False, True), (True, True)):
+    fitnesses = run_seeded_generations(4, batched, batched_inference).fitnesses
+
+    assert len(fitnesses) == 2 and all(f[:, 3].max() > 1 for f in fitnesses), 'Both generations MUST be simulated.'
+    assert all(np.array_equal(a, b) for a, b in zip(fitnesses, run_seeded_generations(4, batched, batched_inference).fitnesses)), \
+        'Runs with the same seed MUST score every generation the same (batched: %s, batched inference: %s).' % (
+            batched, batched_inference)
+
+assert not all(np.array_equal(a, b) for a, b in zip(fitnesses, run_seeded_generations(5, True, True).fitnesses)), \
+    'Runs with different seeds MUST differ.'
+print('Assertion passed for seeded runs.')
+
+# Test parallel evaluation.
+from util.parallel_evaluation import *
+
+# Long enough for pawns to die & every match up to end before the max game length.
+for batched in (False, True):
+    serial = run_seeded_generations(4, batched, game_length=1500)
+    parallel = run_seeded_generations(4, batched, parallel=True, game_length=1500)
+
+    assert all(f[:, 4].any() for f in serial.fitnesses) and max(serial.frames) < 1500, \
+        'Pawns MUST die in both generations.'
+
+    assert all(np.array_equal(a, b) for a, b in zip(serial.fitnesses, parallel.fitnesses)), \
+        'Seeded parallel runs MUST give every pawn the counters & death of the serial run (batched: %s).' % batched
+    assert serial.frames == parallel.frames, \
+        'Seeded parallel runs MUST simulate as many frames as the serial run (batched: %s).' % batched
+
+creature = FitnessPawn()
+opponent = Pawn()
+match_up = MatchUp(creature, opponent)
+env = Environment(match_up)
+
+apply_results(match_up, creature, (False, (6, 4, 1)))
+assert (creature.total_hits, creature.total_attacks, creature.total_hits_taken) == (6, 4, 1) and \
+    creature.fitness == creature.compute_fitness() > 0, 'Applied counters MUST update the fitness.'
+assert match_up.best_pawn is creature and env.best_match_up_fitness == creature.fitness, \
+    'Applied fitnesses MUST reach the fitness listeners.'
+
+apply_results(match_up, opponent, (True, None))
+assert opponent.is_dead and opponent in match_up.dead_pawns and not match_up.is_still_going(), \
+    'Applied deaths MUST kill the pawn in its match up.'
+print('Assertion passed for parallel evaluation.')
+
+# Test the island model.
+from util.island_model import *
+import queue
+
+islands = [Population('test_island_%i' % i, size=4) for i in range(3)]
+for island in islands:
+    island.log_generations = False
+    island.set_opponent_factory(Pawn)
+
+
+def build_island_report(island: int, current_gen: int, fitnesses: list, done: bool = False) -> dict:
+    pop = islands[island]
+
+    return {
+        'island': island,
+        'done': done,
+        'current_gen': current_gen,
+        'fitnesses': fitnesses,
+        'max_overall_fitness': max(fitnesses),
+        'layer_shapes': pop.get(0).layer_shapes,
+        'migrants': np.array([net.genome for net in pop.neural_networks[:2]]),
+        'genomes': np.stack([net.genome for net in pop.neural_networks])
+    }
+
+
+def build_coordinator(topology: str) -> IslandCoordinator:
+    coordinator = IslandCoordinator(islands, topology)
+    coordinator.inboxes = [queue.Queue() for _ in islands]
+    coordinator.checkpoint_writer = CheckpointWriter()
+    coordinator.checkpoint_interval = 2
+    return coordinator
+
+
+ring = build_coordinator(RING_TOPOLOGY)
+assert [ring.get_destination(i) for i in range(3)] == [1, 2, 0], 'Rings MUST send migrants to the next island.'
+
+ring.handle_report(build_island_report(2, 1, [1.0]), {0, 1, 2})
+migrants, layer_shapes = ring.inboxes[0].get_nowait()
+assert np.array_equal(migrants, [net.genome for net in islands[2].neural_networks[:2]]) and \
+    ring.inboxes[1].empty() and ring.inboxes[2].empty(), 'Reported migrants MUST only reach the destination.'
+
+ring.handle_report(build_island_report(0, 1, [1.0]), {0, 2})
+assert ring.inboxes[1].empty(), 'Finished islands MUST NOT take in migrants.'
+
+random.seed(3)
+destinations = [build_coordinator(RANDOM_TOPOLOGY).get_destination(1) for _ in range(100)]
+assert set(destinations) == {0, 2}, 'Random topologies MUST send migrants to any other island.'
+
+# Islands send their top genomes as migrants (see 'run_island').
+migrating = Population('test_island_migrants', size=4)
+migrating.log_generations = False
+networks = list(migrating.creatures_to_nets.values())
+
+for creature, fitness in zip(migrating.creatures_to_nets.keys(), (1, 4, 2, 3)):
+    creature.set_fitness(fitness)
+
+migrating.natural_selection()
+assert migrating.ranked_networks[:2] == [networks[1], networks[3]], 'Migrants MUST be the fittest networks.'
+print('Assertion passed for island topologies.')
+
+# Migrants only replace the last networks (the plain clones of natural selection).
+networks = list(islands[0].neural_networks)
+islands[0].immigrate([net.clone() for net in islands[1].neural_networks[:2]])
+assert islands[0].neural_networks[:2] == networks[:2] and all(
+    np.array_equal(a.genome, b.genome) for a, b in zip(islands[0].neural_networks[2:], islands[1].neural_networks[:2])), \
+    'Migrants MUST replace the last networks.'
+
+islands[0].immigrate([net.clone() for net in islands[2].neural_networks])
+assert islands[0].neural_networks[0] is networks[0], 'Migrants MUST NOT replace the best network.'
+
+env = IslandEnvironment(islands[1])
+env.immigrate(np.array([net.genome for net in islands[2].neural_networks[:1]]), islands[2].get(0).layer_shapes)
+migrant = islands[1].neural_networks[-1]
+assert np.array_equal(migrant.genome, islands[2].get(0).genome) and \
+    not np.shares_memory(migrant.genome, islands[2].get(0).genome), 'Islands MUST take in copies of the migrants.'
+assert any(env.get_creature_network(pawn) is migrant for match_up in env.match_ups for pawn in match_up.pawns), \
+    'Migrants MUST take part in the current generation.'
+print('Assertion passed for immigration.')
+
+coordinator = build_coordinator(RING_TOPOLOGY)
+coordinator.handle_report(build_island_report(1, 2, [1.0, 2.0]), {0, 1, 2})
+assert not os.path.exists(Population.get_checkpoint_path('test_island_1')), \
+    'Islands MUST only be checkpointed every checkpoint interval.'
+
+coordinator.handle_report(build_island_report(1, 4, [3.0, 4.0]), {0, 1, 2})
+coordinator.checkpoint_writer.close()
+checkpoint = Population.open_checkpoint('test_island_1')
+
+assert checkpoint.metadata['current_gen'] == 4 and checkpoint.generational_fitnesses.tolist() == [1.0, 2.0, 3.0, 4.0], \
+    'Island checkpoints MUST keep the reported generation & the whole history.'
+assert coordinator.generational_fitnesses() == [1.0, 2.0, 3.0, 4.0], 'Coordinators MUST keep the island histories.'
+
+for island in islands:
+    shutil.rmtree(os.path.join(POPULATION_DIRECTORY, island.dir_name), ignore_errors=True)
+print('Assertion passed for island checkpoints.')
+
+# Test the frame profiler.
+from util.frame_profiler import *
+import tempfile
+
+trace_path = os.path.join(tempfile.mkdtemp(), DEFAULT_TRACE_PATH)
+profiler = FrameProfiler(trace_path)
+profiler.max_trace_events = 6
+
+
+def time_phase(phase: str, seconds: float):
+    """Times a span that started the given amount of seconds ago."""
+    profiler.stop(phase, profiler.start() - seconds)
+
+
+time_phase(MOVEMENT, 1)
+time_phase(MOVEMENT, 2)
+time_phase(THINK, 0.5)
+profiler.end_frame()
+time_phase(THINK, 1)
+profiler.end_frame()
+profiler.end_generation()
+
+assert profiler.last_generation_frames == 2 and profiler.frames == 2, 'Frames MUST be counted per generation.'
+assert abs(profiler.totals[MOVEMENT] - 3) < 0.01 and abs(profiler.totals[THINK] - 1.5) < 0.01, \
+    'Phase times MUST add up over frames & generations.'
+
+time_phase(LOOK, 4)
+profiler.end_frame()
+report = profiler.build_report()
+assert '(2 frames' in report and THINK in report and LOOK not in report, \
+    'Reports MUST describe the last finished generation.'
+
+profiler.end_generation()
+assert abs(profiler.totals[MOVEMENT] - 3) < 0.01 and abs(profiler.totals[LOOK] - 4) < 0.01 and \
+    profiler.last_generation_frames == 1, 'Generation totals MUST be folded into the totals.'
+assert len(profiler.trace_events) == 6, 'Trace events MUST stop at the max trace events.'
+
+profiler.export_chrome_trace()
+with open(trace_path) as f:
+    trace = json.load(f)
+
+assert [event['name'] for event in trace['traceEvents']] == [MOVEMENT, MOVEMENT, THINK, 'frame', THINK, 'frame'] and \
+    all(event['ph'] == 'X' and event['dur'] >= 0 for event in trace['traceEvents']), \
+    'Exported traces MUST hold every kept span as a complete trace event.'
+shutil.rmtree(os.path.dirname(trace_path))
+print('Assertion passed for the frame profiler.')
+
+# Test the generation log.
+log = GenerationLog(os.path.join(tempfile.mkdtemp(), HISTORY_DIRECTORY))
+for generation in range(3):
+    log.append({'generation': generation, 'max': generation * 2, 'saved_frames': 1})
+
+# Logs started before a column existed.
+os.remove(log.get_column_path('saved_frames'))
+assert len(log) == 3, 'Missing columns MUST NOT shorten the log.'
+
+log.append({'generation': 3, 'max': 6, 'saved_frames': 5})
+assert log.read('saved_frames').tolist() == [0, 0, 0, 5], 'Columns added later MUST be filled with 0.'
+
+# A crash after writing some of the columns of a record.
+with open(log.get_column_path('generation'), 'ab') as f:
+    f.write(np.array([99], dtype='<i8').tobytes())
+with open(log.get_column_path('max'), 'ab') as f:
+    f.write(b'\x00\x00\x00')
+assert len(log) == 4, 'Partial records MUST NOT be read.'
+
+log.append({'generation': 4, 'max': 8})
+assert log.read('generation').tolist() == [0, 1, 2, 3, 4] and log.read('max').tolist() == [0, 2, 4, 6, 8] and \
+    all(os.path.getsize(log.get_column_path(column)) == 5 * np.dtype(dtype).itemsize for column, dtype in COLUMNS), \
+    'Appending MUST drop the partial record of an interrupted append.'
+
+log.truncate_from(2)
+assert log.read('generation').tolist() == [0, 1] and len(log) == 2, \
+    'Truncating MUST drop the given generation & later ones.'
+
+log.truncate_from(5)
+assert len(log) == 2, 'Truncating after the last generation MUST keep the log.'
+shutil.rmtree(os.path.dirname(log.directory))
+print('Assertion passed for the generation log.')
+
+# Logs started by populations with a history are backfilled with it.
+logged = Population('test_generation_log', size=2)
+logged.generational_fitnesses = [5.0, 6.0]
+logged.current_gen = 2
+
+
+def log_logged_generation(fitness: float):
+    logged.generational_fitnesses.append(fitness)
+    logged.log_generation(build_generation_record(logged.current_gen, np.array([fitness]), 1))
+    logged.current_gen += 1
+
+
+log_logged_generation(7.0)
+assert logged.get_history().tolist() == [5.0, 6.0, 7.0] and \
+    logged.get_history('generation').tolist() == [0, 1, 2], 'New logs MUST start with the known history.'
+
+# Generations logged after the last checkpoint are simulated again once it is loaded.
+logged.save_to_dir()
+log_logged_generation(8.0)
+log_logged_generation(9.0)
+
+loaded = Population.load_from_dir(logged.dir_name)
+assert loaded.current_gen == 3 and loaded.get_history('generation').tolist() == [0, 1, 2] and \
+    loaded.generational_fitnesses == [5.0, 6.0, 7.0], 'Loading a checkpoint MUST cut the log back to its generation.'
+shutil.rmtree(os.path.join(POPULATION_DIRECTORY, logged.dir_name))
+print('Assertion passed for logged populations.')
+
 # ----------------------------------------
 #             End Assertions
 # ----------------------------------------
@@ -0,0 +1,143 @@
+from controllers.creature_controller import *
+from typing import List
+import numpy as np
+
+ACTION_COLUMNS = {action: i for i, action in enumerate(ACTION_LIST)}
+
+# Opposite actions, in the order 'CreatureController.act' handles them: an inactive action is only
+# undone if its opposite is not active, & each action sets its axis to the given value.
+MOVE_X = (Actions.MOVE_LEFT, -1, Actions.MOVE_RIGHT, 1)
+MOVE_Y = (Actions.MOVE_UP, 1, Actions.MOVE_DOWN, -1)
+LOOK = (Actions.LOOK_LEFT, -1, Actions.LOOK_RIGHT, 1)
+
+
+def decode_opposites(fired: np.ndarray, active: np.ndarray, opposites: tuple):
+    """
+    Decodes a pair of opposite actions exactly like the sequential 'CreatureController.act'.
+
+    Args:
+        fired: (n, actions) outputs above REACTION_THRESHOLD.
+        active: (n, actions) active actions before acting, updated in place.
+
+    Returns:
+        (n,) value of the axis & (n,) mask of the rows whose axis is left unchanged.
+    """
+
+    first, first_value, second, second_value = opposites
+    a = ACTION_COLUMNS[first]
+    b = ACTION_COLUMNS[second]
+
+    fa = fired[:, a]
+    fb = fired[:, b]
+
+    # The first action stays active if it fired, or (undo skipped) if the second one still is.
+    a_active = fa | (active[:, a] & active[:, b])
+    b_active = fb | (a_active & active[:, b])
+
+    value = np.where(fb, second_value, np.where(
+        a_active & fa, first_value, 0))
+    unchanged = ~fb & a_active & ~fa
+
+    active[:, a] = a_active
+    active[:, b] = b_active
+
+    return value, unchanged
+
+
+class DecodedActions:
+    """
+    The actions of many CreatureControllers decoded at once from their (n, OUTPUT_NODES) outputs,
+    as velocities, look directions, shield requests & attack masks.
+
+    Decoding preserves the opposite-direction tie-breaking of 'CreatureController.act', so
+    applying row i (see 'apply') leaves a pawn in the same state as its controller's 'act'.
+    """
+
+    vel_x: list = None
+    vel_y: list = None
+    looking: list = None
+
+    # Rows whose axis is left as it was.
+    keep_vel_x: list = None
+    keep_vel_y: list = None
+    keep_looking: list = None
+
+    use_shield: list = None
+    long_attack: list = None
+    short_attack: list = None
+
+    # (n, actions) active actions after acting.
+    active: np.ndarray = None
+    active_rows: list = None
+
+    def __init__(self, outputs: np.ndarray, active: np.ndarray):
+        """
+        Args:
+            outputs: (n, OUTPUT_NODES) network outputs.
+            active: (n, OUTPUT_NODES) mask of the active actions (see 'Controller.active_actions').
+        """
+
+        fired = np.asarray(outputs) > REACTION_THRESHOLD
+        active = np.array(active, dtype=bool)
+
+        vel_x, keep_vel_x = decode_opposites(fired, active, MOVE_X)
+        vel_y, keep_vel_y = decode_opposites(fired, active, MOVE_Y)
+        looking, keep_looking = decode_opposites(fired, active, LOOK)
+
+        # Every other action is simply active if it fired.
+        for action in (Actions.USE_SHIELD, Actions.LONG_ATTACK, Actions.SHORT_ATTACK):
+            i = ACTION_COLUMNS[action]
+            active[:, i] = fired[:, i]
+
+        self.vel_x = vel_x.tolist()
+        self.vel_y = vel_y.tolist()
+        self.looking = looking.tolist()
+        self.keep_vel_x = keep_vel_x.tolist()
+        self.keep_vel_y = keep_vel_y.tolist()
+        self.keep_looking = keep_looking.tolist()
+
+        self.use_shield = fired[:, ACTION_COLUMNS[Actions.USE_SHIELD]].tolist()
+        self.long_attack = fired[:, ACTION_COLUMNS[Actions.LONG_ATTACK]].tolist()
+        self.short_attack = fired[:, ACTION_COLUMNS[Actions.SHORT_ATTACK]].tolist()
+
+        self.active = active
+        self.active_rows = active.tolist()
+
+    def from_controllers(controllers: List[CreatureController], outputs: np.ndarray) -> 'DecodedActions':
+        active = [[action in c.active_actions for action in ACTION_LIST]
+                  for c in controllers]
+        return DecodedActions(outputs, np.array(active, dtype=bool).reshape(len(controllers), len(ACTION_LIST)))
+
+    def apply(self, i: int, controller: CreatureController):
+        """Applies row i to the controller's pawn, same as its 'act'."""
+        p: Pawn = controller.pawn
+
+        # Dead pawns ignore submitted actions, which the decoding does not model.
+        if p.is_dead:
+            controller.act()
+            return
+
+        if not self.keep_vel_x[i]:
+            p.vel[0] = self.vel_x[i]
+
+        if not self.keep_vel_y[i]:
+            p.vel[1] = self.vel_y[i]
+
+        if not self.keep_looking[i]:
+            p.looking = self.looking[i]
+
+        if self.use_shield[i]:
+            p.use_shield()
+
+        if self.long_attack[i]:
+            p.long_attack()
+        else:
+            p.clear_attack()
+
+        if self.short_attack[i]:
+            p.short_attack()
+        else:
+            p.clear_attack()
+
+        controller.active_actions = {action for action, on in zip(
+            ACTION_LIST, self.active_rows[i]) if on}
@@ -0,0 +1,231 @@
+from controllers.creature_controller import *
+from util.observations import *
+from util.action_decoding import *
+from typing import List, Tuple
+import numpy as np
+
+# Below this fraction of the networks, selected networks are evaluated on their own (see 'output_biased').
+SPARSE_FRACTION = 0.5
+
+
+def get_rounds(rows: np.ndarray) -> List[np.ndarray]:
+    """Splits the indices of 'rows' into rounds in which every row value appears at most once."""
+    order = np.argsort(rows, kind='stable')
+    ordered = rows[order]
+
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    rank = np.empty(rows.size, dtype=np.int64)
+    rank[order] = np.arange(rows.size) - np.repeat(starts, np.diff(np.r_[starts, rows.size]))
+
+    return [np.flatnonzero(rank == r) for r in range(int(rank.max()) + 1)]
+
+
+class BatchedInference:
+    """
+    Evaluates many NeuralNetworks of identical dimensions at once.
+
+    Each layer's weights of every network are stacked into a single
+    (networks, outputs, inputs) tensor, so a whole population is evaluated
+    with one batched matmul & one vectorized activation per layer.
+    """
+
+    networks: List[NeuralNetwork]
+    layer_weights: List[np.ndarray]
+    indices: dict = None
+    observer: ObservationBuilder = None
+    batch: np.ndarray = None  # (networks, inputs + 1) observations, see 'output_biased'
+
+    def __init__(self, networks: List[NeuralNetwork]):
+        self.networks = list(networks)
+        self.indices = {id(net): i for i, net in enumerate(self.networks)}
+        self.observer = ObservationBuilder(max(1, len(self.networks)))
+
+        self.layer_weights = [
+            np.stack([net.layer_weights[i] for net in self.networks])
+            for i in range(len(self.networks[0].layer_weights))
+        ] if self.networks else []
+
+    def from_match_ups(match_ups) -> 'BatchedInference':
+        """Builds a batch out of every CreatureController network found in the match ups."""
+        networks = []
+        seen = set()
+
+        for match_up in match_ups:
+            for pawn in match_up.pawns:
+                controller = pawn.controller
+
+                if isinstance(controller, CreatureController):
+                    net = controller.neural_network
+
+                    if id(net) not in seen:
+                        seen.add(id(net))
+                        networks.append(net)
+
+        return BatchedInference(networks)
+
+    def handles(self, controller: Controller) -> bool:
+        return isinstance(controller, CreatureController) and \
+            id(controller.neural_network) in self.indices
+
+    def decodes(self, controller: Controller) -> bool:
+        """Whether the controller's actions can be decoded in bulk (subclasses overriding 'act' run their own)."""
+        return self.handles(controller) and type(controller).act is CreatureController.act
+
+    def output(self, X: np.ndarray, rows: np.ndarray = None) -> np.ndarray:
+        """
+        Args:
+            X (np.ndarray): (k, inputs) observations, without the bias.
+            rows (np.ndarray): Which network evaluates each observation. Defaults to all, in order.
+
+        Returns:
+            (k, outputs) array, identical to calling 'output' on each network.
+        """
+
+        k = len(X)
+        Z = np.ones((k, X.shape[1] + 1))
+        Z[:, :-1] = X
+
+        return self.output_biased(Z, rows)
+
+    def output_biased(self, Z: np.ndarray, rows: np.ndarray = None) -> np.ndarray:
+        """
+        Same as 'output', for (k, inputs + 1) observations whose last column is the bias (1).
+
+        Observations are scattered into a batch over every network (one batch per round of repeated
+        networks) & their output rows read back. Only when few networks are selected (e.g. decisions
+        staggered over frames), their stacked weights are gathered instead, so just those are evaluated.
+        """
+        n = len(self.networks)
+
+        if rows is None or (rows.size == n and np.array_equal(rows, np.arange(n))):
+            return self.output_stacked(Z)
+
+        if rows.size == 0:
+            return np.empty((0, self.layer_weights[-1].shape[1]))
+
+        if rows.size <= n * SPARSE_FRACTION:
+            return self.output_stacked(Z, [W[rows] for W in self.layer_weights])
+
+        # Rows of networks without an observation keep older (finite) observations.
+        if self.batch is None or self.batch.shape[1] != Z.shape[1]:
+            self.batch = np.zeros((n, Z.shape[1]))
+
+        if np.bincount(rows, minlength=n).max() == 1:
+            self.batch[rows] = Z
+            return self.output_stacked(self.batch)[rows]
+
+        Y = np.empty((len(Z), self.layer_weights[-1].shape[1]))
+        for selected in get_rounds(rows):
+            network_rows = rows[selected]
+            self.batch[network_rows] = Z[selected]
+            Y[selected] = self.output_stacked(self.batch)[network_rows]
+
+        return Y
+
+    def output_stacked(self, Z: np.ndarray, layer_weights: List[np.ndarray] = None) -> np.ndarray:
+        """Evaluates the i'th biased observation with the i'th network (of the given stacked weights, defaults to all)."""
+        layer_weights = self.layer_weights if layer_weights is None else layer_weights
+        last = len(layer_weights) - 1
+        for i, W in enumerate(layer_weights):
+            Z = np.matmul(W, Z[:, :, None])[:, :, 0]
+
+            if i < last:
+                NeuralNetwork.activate_batch(Z)
+
+        return Z
+
+    def get_rows(self, controllers: List[CreatureController]) -> np.ndarray:
+        return np.array([self.indices[id(c.neural_network)] for c in controllers], dtype=np.int64)
+
+    def think(self, controllers: List[CreatureController], observations: np.ndarray = None) -> np.ndarray:
+        """
+        Evaluates every controller's inputs & scatters the outputs back to them.
+        Returns the (controllers, outputs) array of outputs.
+
+        Args:
+            observations: (controllers, INPUT_NODES + 1) biased inputs (see 'ObservationBuilder'),
+                used instead of each controller's 'inputs' if given.
+        """
+        if not controllers:
+            return np.empty((0, len(ACTION_LIST)))
+
+        rows = self.get_rows(controllers)
+
+        if observations is None:
+            Y = self.output(np.array([c.inputs for c in controllers], dtype=float), rows)
+        else:
+            Y = self.output_biased(observations, rows)
+
+        for controller, outputs in zip(controllers, Y.tolist()):
+            controller.outputs = outputs
+
+        return Y
+
+    def decide(self, pairs: List[Tuple[MatchUp, Pawn]], profiler: FrameProfiler = None):
+        """
+        Runs look, think & act for every (match up, pawn) pair in three phases,
+        so all networks known to this batch think at once.
+        Each phase is timed if a profiler is given.
+        """
+
+        # Match ups may have ended after their pawns were queued.
+        pairs = [(match_up, pawn) for match_up, pawn in pairs
+                 if not pawn.is_dead and match_up.is_still_going()]
+
+        if profiler is not None:
+            start = profiler.start()
+
+        # Handled controllers are observed all at once, straight into the batch's inputs.
+        observed = []
+        for match_up, pawn in pairs:
+            controller = pawn.controller
+
+            if self.handles(controller):
+                observed.append((match_up, controller))
+            else:
+                controller.look(match_up)
+
+        observations = self.observer.build(observed)
+
+        if profiler is not None:
+            profiler.stop(LOOK, start)
+            start = profiler.start()
+
+        # Thinking has no side effects on other pawns, so it can be prepared per controller class.
+        classes = dict()
+        for _, pawn in pairs:
+            classes.setdefault(type(pawn.controller), []).append(pawn.controller)
+
+        for controller_class, controllers in classes.items():
+            controller_class.prepare_thinking(controllers)
+
+        for _, pawn in pairs:
+            controller = pawn.controller
+
+            if not self.handles(controller):
+                controller.think()
+
+        handled = [controller for _, controller in observed]
+        outputs = self.think(handled, observations)
+
+        if profiler is not None:
+            profiler.stop(THINK, start)
+            start = profiler.start()
+
+        # Decodable controllers' actions are decoded at once, then applied in the original order.
+        decodable = [i for i, controller in enumerate(handled) if self.decodes(controller)]
+        decoded = DecodedActions.from_controllers(
+            [handled[i] for i in decodable], outputs[decodable])
+        i = 0
+
+        for _, pawn in pairs:
+            controller = pawn.controller
+
+            if self.decodes(controller):
+                decoded.apply(i, controller)
+                i += 1
+            else:
+                controller.act()
+
+        if profiler is not None:
+            profiler.stop(ACT, start)
@@ -0,0 +1,476 @@
+from util.match_up import *
+from actors.pawns.fitness_pawn import *
+from util.cooldown import *
+from util.laser_pool import *
+from typing import List
+import numpy as np
+
+# Attack codes used for the held attack & laser kind arrays.
+NO_ATTACK = 0
+SHORT_ATTACK = 1
+LONG_ATTACK = 2
+
+
+def get_attack_code(pawn: Pawn) -> int:
+    """Converts the pawn's held attack function into an attack code."""
+    attack = pawn.current_attack
+
+    if attack is None:
+        return NO_ATTACK
+
+    if attack.__name__ == 'short_attack':
+        return SHORT_ATTACK
+
+    return LONG_ATTACK
+
+
+class BatchedSimulation:
+    """
+    Struct-of-arrays simulation engine for a set of MatchUps.
+
+    Every pawn's physical state is held in contiguous numpy arrays & the whole set of
+    match ups is advanced with a handful of vectorized operations per frame. Lasers are
+    kept in a LaserPool shared by every match up. Controllers still run on the Pawn
+    objects, which are synced before & after each decision, & their imminent laser queries
+    are answered for every deciding pawn at once.
+
+    Frames go through the same phases as 'Environment.do_pooled_logic', so both engines
+    advance the same match ups identically.
+    """
+
+    match_ups: List[MatchUp]
+    source = None
+    pawns: List[Pawn]
+    laser_pool: LaserPool
+
+    # If set (to a BatchedInference), creature networks think in a single batch.
+    inference = None
+
+    # If set, every phase of each frame is timed.
+    profiler: FrameProfiler = None
+
+    active_match_ups: np.ndarray = None
+    active_pawns: np.ndarray = None
+    frames: int = 0
+
+    def __init__(self, match_ups):
+        self.source = match_ups
+        self.match_ups = list(match_ups)
+        self.pawns = []
+
+        counts = []
+        pawn_match = []
+
+        for m, match_up in enumerate(self.match_ups):
+            pawns = list(match_up.pawns)
+            self.pawns.extend(pawns)
+            counts.append(len(pawns))
+            pawn_match.extend([m] * len(pawns))
+
+        n = len(self.pawns)
+
+        self.match_counts = np.array(counts, dtype=np.int64)
+        self.match_offsets = np.concatenate(
+            ([0], np.cumsum(self.match_counts)[:-1])).astype(np.int64)
+        self.max_match_size = int(self.match_counts.max()) if n > 0 else 0
+        self.pawn_match = np.array(pawn_match, dtype=np.int64)
+
+        # Physical state
+        self.pos = np.zeros((n, 2))
+        self.vel = np.zeros((n, 2))
+        self.direc = np.zeros(n)
+        self.looking = np.zeros(n)
+        self.movement_speed = np.zeros(n)
+        self.directional_speed = np.zeros(n)
+        self.outward_bound = np.zeros(n)
+
+        # Combat state
+        self.health = np.zeros(n)
+        self.is_dead = np.zeros(n, dtype=bool)
+        self.shield_on = np.zeros(n, dtype=bool)
+        self.shield_dura = np.zeros(n)
+        self.shield_count = np.zeros(n)
+        self.shield_strength = np.zeros(n)
+        self.frame = np.zeros(n, dtype=np.int64)
+        self.cooldown_start = np.zeros(n)
+        self.cooldown_length = np.zeros(n)
+        self.held_attack = np.zeros(n, dtype=np.int8)
+
+        # Per attack code stats: [unused, short, long]
+        self.stat_biases = [None] * n
+        self.attack_speed = np.zeros((n, 3))
+        self.attack_min = np.zeros((n, 3))
+        self.attack_max = np.zeros((n, 3))
+        self.attack_damage = np.zeros((n, 3))
+        self.attack_cooldown = np.ones((n, 3))
+        self.attack_colors = [None] * n
+
+        # Fitness counters
+        self.is_fitness = np.array(
+            [isinstance(p, FitnessPawn) for p in self.pawns], dtype=bool)
+        self.total_hits = np.zeros(n, dtype=np.int64)
+        self.total_attacks = np.ones(n, dtype=np.int64)
+        self.total_hits_taken = np.ones(n, dtype=np.int64)
+
+        # Pool owner ids match the pawn indices.
+        self.laser_pool = LaserPool()
+        for match_up in self.match_ups:
+            match_up.attach_laser_pool(self.laser_pool)
+
+        for i, pawn in enumerate(self.pawns):
+            self.movement_speed[i] = pawn.get_movement_speed()
+            self.directional_speed[i] = pawn.get_directional_speed()
+            self.outward_bound[i] = pawn.max_outward_bound
+            self.pull_pawn(i)
+            self.pos[i] = pawn.pos
+            self.direc[i] = pawn.direc
+            self.health[i] = pawn.health
+            self.is_dead[i] = pawn.is_dead
+            self.frame[i] = pawn.frame
+
+        self.compact()
+
+    # ----------------------------------------
+    #               Pawn Syncing
+    # ----------------------------------------
+
+    def pull_pawn(self, i: int):
+        """Reads every controller writable field from the pawn object into the arrays."""
+        pawn = self.pawns[i]
+
+        self.vel[i] = pawn.vel
+        self.looking[i] = pawn.looking
+        self.held_attack[i] = get_attack_code(pawn)
+
+        self.shield_on[i] = pawn.shield_on
+        self.shield_dura[i] = pawn.shield_dura
+        self.shield_count[i] = pawn.shield_count
+
+        if pawn.laser_cooldown is None:
+            self.cooldown_start[i] = -10000
+            self.cooldown_length[i] = 1
+        else:
+            self.cooldown_start[i] = pawn.laser_cooldown.start
+            self.cooldown_length[i] = pawn.laser_cooldown.length
+
+        if self.is_fitness[i]:
+            self.total_hits[i] = pawn.total_hits
+            self.total_attacks[i] = pawn.total_attacks
+            self.total_hits_taken[i] = pawn.total_hits_taken
+
+        sb: StatBias = pawn.stat_bias
+        if sb is not self.stat_biases[i]:
+            self.stat_biases[i] = sb
+            self.shield_strength[i] = sb.shield_strength
+            self.attack_speed[i] = (0, sb.short_attack_speed, sb.long_attack_speed)
+            self.attack_min[i] = (
+                0, sb.short_attack_range[0], sb.long_attack_range[0])
+            self.attack_max[i] = (
+                0, sb.short_attack_range[1], sb.long_attack_range[1])
+            self.attack_damage[i] = (
+                0, sb.short_attack_damage, sb.long_attack_damage)
+            self.attack_cooldown[i] = (
+                1, sb.short_attack_cooldown, sb.long_attack_cooldown)
+            self.attack_colors[i] = (
+                None, sb.short_attack_color, sb.long_attack_color)
+
+    def push_pawns(self, indices: np.ndarray):
+        """Writes the array state of the given pawns back onto their objects."""
+        if indices.size == 0:
+            return
+
+        pos = self.pos[indices].tolist()
+        vel = self.vel[indices].tolist()
+        direc = self.direc[indices].tolist()
+        health = self.health[indices].tolist()
+        shield_on = self.shield_on[indices].tolist()
+        shield_dura = self.shield_dura[indices].tolist()
+        shield_count = self.shield_count[indices].tolist()
+        frame = self.frame[indices].tolist()
+        cd_start = self.cooldown_start[indices].tolist()
+        cd_length = self.cooldown_length[indices].tolist()
+        hits = self.total_hits[indices].tolist()
+        attacks = self.total_attacks[indices].tolist()
+        hits_taken = self.total_hits_taken[indices].tolist()
+
+        for j, i in enumerate(indices.tolist()):
+            pawn = self.pawns[i]
+            pawn.pos = pos[j]
+            pawn.vel = vel[j]
+            pawn.direc = direc[j]
+            pawn.health = health[j]
+            pawn.shield_on = shield_on[j]
+            pawn.shield_dura = shield_dura[j]
+            pawn.shield_count = shield_count[j]
+            pawn.frame = frame[j]
+
+            if cd_start[j] > -10000:
+                if pawn.laser_cooldown is None:
+                    pawn.laser_cooldown = Cooldown(cd_length[j])
+                pawn.laser_cooldown.start = cd_start[j]
+                pawn.laser_cooldown.length = cd_length[j]
+
+            # Only changed counters are written, as each write fires a fitness change event.
+            if self.is_fitness[i] and (pawn.total_hits != hits[j] or
+                                       pawn.total_attacks != attacks[j] or
+                                       pawn.total_hits_taken != hits_taken[j]):
+                pawn.total_hits = hits[j]
+                pawn.total_attacks = attacks[j]
+                pawn.total_hits_taken = hits_taken[j]
+                pawn.update_fitness()
+
+    def sync_pawns(self):
+        """Writes the state of every pawn back onto its object."""
+        self.push_pawns(np.arange(len(self.pawns)))
+
+    # ----------------------------------------
+    #                 Frame
+    # ----------------------------------------
+
+    def compact(self):
+        """Drops finished (or stopped) match ups (& their lasers) out of the active set."""
+        alive_counts = np.bincount(
+            self.pawn_match[~self.is_dead], minlength=len(self.match_ups))
+        going = (alive_counts > 1) & ~np.array(
+            [match_up.stopped for match_up in self.match_ups], dtype=bool)
+
+        if self.active_match_ups is not None:
+            finished = self.active_match_ups[~going[self.active_match_ups]]
+
+            # Leave the objects of finished matches fully synced.
+            self.push_pawns(np.flatnonzero(np.isin(self.pawn_match, finished)))
+
+        self.active_match_ups = np.flatnonzero(going)
+        self.active_pawns = np.flatnonzero(going[self.pawn_match] & ~self.is_dead)
+
+    def move_pawns(self, movers: np.ndarray, delta_time):
+        """Equivalent to 'Actor.update' without the attack, for every mover."""
+        temp = self.movement_speed[movers] * delta_time
+
+        pos = self.pos[movers] + self.vel[movers] * temp[:, None]
+        wrap_positions(pos, self.outward_bound[movers])
+        self.pos[movers] = pos
+
+        self.direc[movers] = np.mod(
+            self.direc[movers] + self.directional_speed[movers] *
+            -self.looking[movers] * delta_time,
+            TWO_PI
+        )
+
+    def fire_held_attacks(self, movers: np.ndarray):
+        """Equivalent to 'Pawn.check_attack_capability_and_set_cooldown' for held attacks."""
+        holding = movers[self.held_attack[movers] != NO_ATTACK]
+        if holding.size == 0:
+            return
+
+        ready = self.frame[holding] - self.cooldown_start[holding] >= \
+            self.cooldown_length[holding]
+        firing = holding[ready]
+        if firing.size == 0:
+            return
+
+        kinds = self.held_attack[firing].astype(np.int64)
+        self.cooldown_length[firing] = self.attack_cooldown[firing, kinds]
+        self.cooldown_start[firing] = self.frame[firing]
+        self.total_attacks[firing] += self.is_fitness[firing]
+
+        self.laser_pool.spawn_many(
+            firing,
+            self.pos[firing],
+            self.direc[firing],
+            self.attack_speed[firing, kinds],
+            self.attack_min[firing, kinds],
+            self.attack_max[firing, kinds],
+            self.attack_damage[firing, kinds],
+            [self.attack_colors[i][k]
+                for i, k in zip(firing.tolist(), kinds.tolist())]
+        )
+
+    def find_hits(self, live: np.ndarray):
+        """Returns (laser, pawn) index pairs for every enemy laser touching a living pawn."""
+        if live.size == 0 or self.max_match_size == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        pool = self.laser_pool
+        match = pool.match[live]
+        lasers = []
+        targets = []
+
+        # Match ups are small, so test each laser against every slot of its match up.
+        for k in range(self.max_match_size):
+            valid = k < self.match_counts[match]
+            candidates = live[valid]
+            pawns = self.match_offsets[match[valid]] + k
+
+            keep = (pawns != pool.owner[candidates]) & ~self.is_dead[pawns]
+            candidates = candidates[keep]
+            pawns = pawns[keep]
+
+            touching = donut_dist_squared(
+                pool.pos[candidates], self.pos[pawns]) <= BODY_RADIUS_SQUARED
+
+            lasers.append(candidates[touching])
+            targets.append(pawns[touching])
+
+        return np.concatenate(lasers), np.concatenate(targets)
+
+    def resolve_hits(self, lasers: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """
+        Applies damage, shields & hit logging for each (laser, pawn) pair.
+        Hits on the same pawn are applied in rounds so they stay sequential.
+
+        Returns:
+            The indices of all pawns killed.
+        """
+
+        pool = self.laser_pool
+        killed = []
+        if lasers.size == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        order = np.lexsort((lasers, targets))
+        lasers = lasers[order]
+        targets = targets[order]
+
+        # Rank of each hit within its pawn's group.
+        starts = np.flatnonzero(np.r_[True, targets[1:] != targets[:-1]])
+        rank = np.arange(targets.size) - np.repeat(starts, np.diff(np.r_[starts, targets.size]))
+
+        for r in range(int(rank.max()) + 1):
+            sel = rank == r
+            l = lasers[sel]
+            p = targets[sel]
+
+            # Pawns killed by an earlier hit no longer collide.
+            alive = ~self.is_dead[p]
+            l = l[alive]
+            p = p[alive]
+
+            damaging = pool.get_damage(l) > 0
+
+            # Harmless lasers are simply destroyed.
+            pool.kill(l[~damaging])
+            l = l[damaging]
+            p = p[damaging]
+
+            self.total_hits_taken[p] += self.is_fitness[p]
+
+            # Pawn.hit_shield
+            shielded = p[self.shield_on[p]]
+            self.shield_dura[shielded] -= 1
+            broken = shielded[self.shield_dura[shielded] <= 0]
+            self.shield_on[broken] = False
+            self.shield_dura[broken] = self.shield_count[broken]
+
+            blocked = self.shield_on[p]
+            self.health[p[~blocked]] -= pool.damage[l[~blocked]]
+
+            dead = ~blocked & (self.health[p] < 0)
+            self.is_dead[p[dead]] = True
+            self.health[p[dead]] = 0
+            killed.append(p[dead])
+
+            # The killing laser is neither logged nor destroyed.
+            l = l[~dead]
+            owners = pool.owner[l]
+            np.add.at(self.total_hits, owners, self.is_fitness[owners])
+            pool.kill(l)
+
+        return np.concatenate(killed)
+
+    def update(self, delta_time):
+        """Advances every active match up by one frame."""
+        self.frames += 1
+        movers = self.active_pawns
+
+        if movers.size == 0:
+            return
+
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.start()
+
+        self.move_pawns(movers, delta_time)
+        self.fire_held_attacks(movers)
+        self.frame[movers] += 1
+
+        if profiler is not None:
+            profiler.stop(MOVEMENT, start)
+            start = profiler.start()
+
+        pool = self.laser_pool
+        live = pool.live_slots()
+        killed = self.resolve_hits(*self.find_hits(live))
+
+        if profiler is not None:
+            profiler.stop(COLLISION, start)
+            start = profiler.start()
+
+        pool.update(delta_time, live[pool.alive[live]])
+
+        if profiler is not None:
+            profiler.stop(LASERS, start)
+            start = profiler.start()
+
+        for i in killed.tolist():
+            pawn = self.pawns[i]
+            pawn.kill()
+            self.match_ups[self.pawn_match[i]].kill(pawn)
+
+        if killed.size > 0:
+            self.push_pawns(killed)
+            self.compact()
+
+        self.push_pawns(self.active_pawns)
+
+        if profiler is not None:
+            profiler.stop(SYNC, start)
+
+        self.decide()
+
+    def decide(self):
+        """Runs look, think & act for every living pawn of the active match ups."""
+        pairs = []
+
+        for m in self.active_match_ups.tolist():
+            match_up = self.match_ups[m]
+            match_up.frames += 1
+            frame = match_up.frames
+
+            start = self.match_offsets[m]
+            for i in range(start, start + self.match_counts[m]):
+                if not self.is_dead[i]:
+                    pawn = self.pawns[i]
+
+                    if pawn.controller.is_deciding(frame):
+                        pairs.append((match_up, pawn))
+
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.start()
+
+        MatchUp.cache_imminent_lasers(pairs)
+
+        if profiler is not None:
+            profiler.stop(LOOK, start)
+
+        if self.inference is not None:
+            self.inference.decide(pairs, profiler)
+        else:
+            MatchUp.decide_pawns(pairs, profiler)
+
+        if profiler is not None:
+            start = profiler.start()
+
+        for i in self.active_pawns.tolist():
+            self.pull_pawn(i)
+
+        if profiler is not None:
+            profiler.stop(SYNC, start)
+
+    # ----------------------------------------
+    #                Queries
+    # ----------------------------------------
+
+    def running_matches_count(self):
+        return self.active_match_ups.size
@@ -0,0 +1,170 @@
+from util.evolutionary_neural_network import *
+from typing import List, Tuple
+import numpy as np
+import struct
+import shutil
+import json
+import os
+
+CHECKPOINT_FILE = 'population.ckpt'
+CHECKPOINT_MAGIC = b'EVOPOP\x00\x00'
+CHECKPOINT_VERSION = 1
+
+# magic, version, metadata length, genome count, genome size, genome offset, history length, history offset
+HEADER = struct.Struct('<8sIIQQQQQ')
+
+# Arrays start at multiples of this, so they can be mapped straight into memory.
+ALIGNMENT = 64
+
+DTYPE = np.dtype('<f8')
+
+
+def align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class PopulationCheckpoint:
+    """
+    A whole population in one versioned file.
+
+    Layout: a fixed binary header, JSON metadata (layer shapes, current generation, ...),
+    every genome as one row of a contiguous little-endian float64 matrix & the
+    generational fitness history. Opening a checkpoint only reads the header & metadata,
+    the genome matrix is memory mapped (copy on write), so genomes are paged in once used.
+
+    Checkpoints are written to a temporary file first, then renamed over the old one,
+    so a crash mid-save never leaves a partial checkpoint behind.
+    """
+
+    path: str
+    version: int = CHECKPOINT_VERSION
+    metadata: dict = None
+    layer_shapes: List[Tuple[int, int]] = None
+
+    genomes: np.ndarray = None  # (count, genome size), a plain view of the memory map
+    generational_fitnesses: np.ndarray = None
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            assert len(header) == HEADER.size, 'Checkpoint %s is truncated.' % path
+
+            magic, self.version, metadata_length, count, genome_size, genome_offset, \
+                history_length, history_offset = HEADER.unpack(header)
+
+            assert magic == CHECKPOINT_MAGIC, '%s is not a population checkpoint.' % path
+            assert self.version <= CHECKPOINT_VERSION, \
+                'Checkpoint %s has version %i, only versions up to %i are supported.' % (
+                    path, self.version, CHECKPOINT_VERSION)
+
+            self.metadata = json.loads(f.read(metadata_length).decode('utf-8'))
+
+        self.layer_shapes = [tuple(shape)
+                             for shape in self.metadata['layer_shapes']]
+
+        if count > 0:
+            # Slicing plain arrays is much cheaper than slicing memmaps (same pages either way).
+            self.genomes = np.memmap(path, dtype=DTYPE, mode='c', offset=genome_offset,
+                                     shape=(count, genome_size)).view(np.ndarray)
+        else:
+            self.genomes = np.zeros((0, genome_size), dtype=DTYPE)
+
+        self.generational_fitnesses = np.fromfile(
+            path, dtype=DTYPE, count=history_length, offset=history_offset) \
+            if history_length > 0 else np.zeros(0, dtype=DTYPE)
+
+    def __len__(self):
+        return self.genomes.shape[0]
+
+    def get_network(self, i: int) -> EvoNeuralNetwork:
+        """The network of the i'th genome (using its row of the mapped matrix in place)."""
+        return EvoNeuralNetwork(genome=self.genomes[i], layer_shapes=self.layer_shapes)
+
+    def get_networks(self) -> List[EvoNeuralNetwork]:
+        return [self.get_network(i) for i in range(len(self))]
+
+    def write_genomes(path: str, genomes: np.ndarray, layer_shapes: List[Tuple[int, int]],
+                      metadata: dict = None, generational_fitnesses: List[float] = None):
+        """Atomically writes a genome matrix (one genome per row) & metadata to a checkpoint."""
+        metadata = dict(metadata or {})
+        metadata['layer_shapes'] = [list(shape) for shape in layer_shapes]
+        encoded = json.dumps(metadata).encode('utf-8')
+
+        count, genome_size = genomes.shape
+        history = np.asarray(
+            generational_fitnesses if generational_fitnesses is not None else [], dtype=DTYPE)
+
+        genome_offset = align(HEADER.size + len(encoded))
+        history_offset = align(genome_offset + count * genome_size * DTYPE.itemsize)
+
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, len(encoded), count,
+                                genome_size, genome_offset, history.size, history_offset))
+            f.write(encoded)
+            f.write(b'\x00' * (genome_offset - f.tell()))
+            f.write(np.ascontiguousarray(genomes, dtype=DTYPE))
+            f.write(b'\x00' * (history_offset - f.tell()))
+            f.write(history)
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_path, path)
+
+
+def remove_legacy_files(directory: str):
+    """Removes the one file per network format (replaced by a checkpoint) from a population directory."""
+    for fname in os.listdir(directory):
+        if fname.endswith('.npy'):
+            os.remove(os.path.join(directory, fname))
+
+    if os.path.isdir(os.path.join(directory, 'data')):
+        shutil.rmtree(os.path.join(directory, 'data'))
+
+
+class CheckpointSnapshot:
+    """
+    Read-only copy of everything a population checkpoint holds, taken at a generation boundary.
+    The population can keep evolving while a snapshot is written (see CheckpointWriter).
+    """
+
+    directory: str
+    name: str
+    genomes: np.ndarray
+    layer_shapes: List[Tuple[int, int]]
+    metadata: dict
+    generational_fitnesses: np.ndarray
+
+    def __init__(self, directory: str, name: str, networks: List[EvoNeuralNetwork],
+                 metadata: dict, generational_fitnesses: List[float]):
+        self.directory = directory
+        self.name = name
+        self.layer_shapes = list(networks[0].layer_shapes) if networks else []
+        self.metadata = dict(metadata)
+
+        assert all(net.layer_shapes == self.layer_shapes for net in networks), \
+            'Every network of a checkpoint MUST have the same layer shapes.'
+
+        genome_size = sum(rows * cols for rows, cols in self.layer_shapes)
+        self.genomes = np.stack([net.genome for net in networks]) if networks else \
+            np.zeros((0, genome_size), dtype=DTYPE)
+        self.generational_fitnesses = np.array(generational_fitnesses, dtype=DTYPE)
+
+        self.genomes.setflags(write=False)
+        self.generational_fitnesses.setflags(write=False)
+
+    def write(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+        PopulationCheckpoint.write_genomes(
+            os.path.join(self.directory, CHECKPOINT_FILE),
+            self.genomes,
+            self.layer_shapes,
+            self.metadata,
+            self.generational_fitnesses
+        )
+
+        remove_legacy_files(self.directory)
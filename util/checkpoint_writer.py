@@ -0,0 +1,83 @@
+from util.checkpoint import *
+import threading
+import queue
+
+# Snapshots that may wait for the writer before 'submit' blocks the simulation.
+MAX_PENDING_CHECKPOINTS = 2
+
+
+class CheckpointWriter:
+    """
+    Writes CheckpointSnapshots on a background thread, while the next generation is simulated.
+
+    Snapshots are queued in submission order. Once 'max_pending' snapshots are waiting,
+    'submit' blocks until the writer catches up (so memory can't grow without bounds).
+    Errors of the writer thread are raised on the next 'submit' or 'flush'.
+    """
+
+    max_pending: int = MAX_PENDING_CHECKPOINTS
+    pending: queue.Queue = None
+    thread: threading.Thread = None
+    error: Exception = None
+
+    def __init__(self, max_pending: int = MAX_PENDING_CHECKPOINTS):
+        assert max_pending > 0, 'The checkpoint writer MUST allow at least one pending snapshot.'
+        self.max_pending = max_pending
+        self.pending = queue.Queue(maxsize=max_pending)
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        # Daemon, so a forgotten writer never keeps the program alive. Call 'close' to finish writing.
+        self.thread = threading.Thread(
+            target=self.work, name='checkpoint-writer', daemon=True)
+        self.thread.start()
+
+    def work(self):
+        while True:
+            snapshot: CheckpointSnapshot = self.pending.get()
+
+            try:
+                if snapshot is None:
+                    return
+
+                snapshot.write()
+            except Exception as e:
+                self.error = e
+            finally:
+                self.pending.task_done()
+
+    def raise_error(self):
+        if self.error is not None:
+            error = self.error
+            self.error = None
+            raise error
+
+    def submit(self, snapshot: CheckpointSnapshot):
+        """Queues the snapshot to be written, waiting first if the writer fell behind."""
+        self.raise_error()
+        self.start()
+
+        try:
+            self.pending.put_nowait(snapshot)
+        except queue.Full:
+            print('Waiting for %i pending checkpoints to be written...' %
+                  self.pending.qsize())
+            self.pending.put(snapshot)
+
+    def flush(self):
+        """Blocks until every submitted snapshot was written."""
+        if self.thread is not None:
+            self.pending.join()
+
+        self.raise_error()
+
+    def close(self):
+        """Writes every pending snapshot, then stops the writer thread."""
+        if self.thread is not None and self.thread.is_alive():
+            self.pending.put(None)
+            self.thread.join()
+
+        self.thread = None
+        self.raise_error()
@@ -0,0 +1,10 @@
+"""RGB colours used by the simulation (same values as arcade.color)."""
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+BLUE = (0, 0, 255)
+RED = (255, 0, 0)
+RED_DEVIL = (134, 1, 17)
+GREEN = (0, 255, 0)
+YELLOW = (255, 255, 0)
+ORANGE = (255, 165, 0)
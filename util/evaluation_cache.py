@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from typing import List, Union
+import numpy as np
+import hashlib
+
+REUSE = 'reuse'  # Skip simulating match ups whose creatures were all evaluated before
+AVERAGE = 'average'  # Simulate again, then average the stored samples with the fresh one
+
+CACHE_POLICIES = (REUSE, AVERAGE)
+
+DEFAULT_CACHE_CAPACITY = 4096
+
+
+class CachedEvaluation:
+    """Every fitness sample of one (genome, opponents, scenario) key."""
+
+    fitness_sum: float = 0
+    samples: int = 0
+
+    def add(self, fitness: float):
+        self.fitness_sum += fitness
+        self.samples += 1
+
+    def get_mean(self) -> float:
+        return self.fitness_sum / self.samples
+
+
+class EvaluationCache:
+    """
+    LRU cache of past fitness evaluations, keyed by the content of a genome & its opponents.
+
+    Lookups & hits are counted per generation, see 'end_generation'.
+    """
+
+    policy: str = REUSE
+    capacity: int = DEFAULT_CACHE_CAPACITY
+    entries: 'OrderedDict[bytes, CachedEvaluation]' = None
+
+    lookups: int = 0
+    hits: int = 0
+
+    # Counts of the last finished generation & of the whole run.
+    last_lookups: int = 0
+    last_hits: int = 0
+    total_lookups: int = 0
+    total_hits: int = 0
+
+    def __init__(self, policy: str = REUSE, capacity: int = DEFAULT_CACHE_CAPACITY):
+        assert policy in CACHE_POLICIES, 'Unknown cache policy %s.' % policy
+        assert capacity > 0, 'The evaluation cache MUST hold at least one entry.'
+
+        self.policy = policy
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def build_key(genome: np.ndarray, controller: str, opponents: List[Union[np.ndarray, str]]) -> bytes:
+        """
+        Args:
+            controller: Name of the controller class running the genome.
+            opponents: The genome of every opponent creature, or a description of scripted opponents.
+        """
+
+        h = hashlib.blake2b(np.ascontiguousarray(genome).tobytes(), digest_size=16)
+        h.update(b'controller:' + controller.encode('utf-8'))
+
+        for opponent in opponents:
+            if isinstance(opponent, np.ndarray):
+                h.update(b'genome:' + np.ascontiguousarray(opponent).tobytes())
+            else:
+                h.update(b'pawn:' + opponent.encode('utf-8'))
+
+        return h.digest()
+
+    def lookup(self, key: bytes) -> CachedEvaluation:
+        """Returns the cached evaluation (None if there is none) & counts the lookup."""
+        self.lookups += 1
+        entry = self.entries.get(key)
+
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+
+        return entry
+
+    def store(self, key: bytes, fitness: float) -> CachedEvaluation:
+        """Adds a fitness sample to the key's entry, evicting the least recently used entry if full."""
+        entry = self.entries.get(key)
+
+        if entry is None:
+            entry = CachedEvaluation()
+            self.entries[key] = entry
+
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+
+        entry.add(fitness)
+        return entry
+
+    def end_generation(self):
+        self.last_lookups = self.lookups
+        self.last_hits = self.hits
+        self.total_lookups += self.lookups
+        self.total_hits += self.hits
+        self.lookups = 0
+        self.hits = 0
+
+    def build_report(self) -> str:
+        """Hit rate of the last finished generation."""
+        return 'Evaluation Cache (%s): %i/%i hits (%.1f%%) | Overall: %.1f%% | Entries: %i/%i' % (
+            self.policy,
+            self.last_hits,
+            self.last_lookups,
+            self.last_hits / max(1, self.last_lookups) * 100,
+            self.total_hits / max(1, self.total_lookups) * 100,
+            len(self.entries),
+            self.capacity
+        )
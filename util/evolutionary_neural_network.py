@@ -3,68 +3,66 @@ import random
 import numpy as np
 from typing import Tuple
 
+MUTATION_RATE = 0.1
+MUTATION_SCALE = 0.1
+WEIGHT_LIMIT = 1
 
-class EvoNeuralNetwork(NeuralNetwork):
-    def crossover(self, other: 'EvoNeuralNetwork') -> Tuple['EvoNeuralNetwork']:
-        child1_layers = []
-        child2_layers = []
 
-        parentA_layer: np.ndarray
-        for i, parentA_layer in enumerate(self.layer_weights):
-            parentB_layer = other.layer_weights[i]
-            rows = len(parentA_layer)
-            cols = len(parentA_layer[0])
+def mutate_genomes(genomes: np.ndarray, mutation_rate=MUTATION_RATE):
+    """
+    Mutates a genome (or a matrix of genomes, one per row) in place.
 
-            cutoff = (
-                np.random.randint(0, high=rows),
-                np.random.randint(0, high=cols)
-            )
+    Each weight is perturbed with probability 'mutation_rate' by Gaussian noise.
+    Mutated weights are clipped to [-WEIGHT_LIMIT, WEIGHT_LIMIT].
+    """
 
-            child1_layer = np.zeros((rows, cols))
-            child2_layer = np.zeros((rows, cols))
+    mask = np.random.random(genomes.shape) < mutation_rate
+    mutated = genomes[mask] + \
+        np.random.normal(loc=0, scale=MUTATION_SCALE, size=np.count_nonzero(mask))
+    genomes[mask] = np.clip(mutated, -WEIGHT_LIMIT, WEIGHT_LIMIT)
 
-            for j in range(rows):
-                for k in range(cols):
 
-                    # This will copy all nodes from parent 1 until the cutoff is reached,
-                    # then it will switch over to parent 2.
-                    # does this for both children, which will effectively have the inverse of
-                    # each other's genes with respect to the parents.
+def crossover_genomes(parentsA: np.ndarray, parentsB: np.ndarray,
+                      cutoffs: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Single point crossover of matching rows of two genome matrices.
 
-                    if j < cutoff[0] or (j == cutoff[0] and k <= cutoff[1]):
-                        child1_layer[j, k] = parentA_layer[j, k]
-                        child2_layer[j, k] = parentB_layer[j, k]
-                    else:
-                        child1_layer[j, k] = parentB_layer[j, k]
-                        child2_layer[j, k] = parentA_layer[j, k]
+    Children copy parent A up to & including each row's cutoff, then switch over
+    to parent B (the second child is the inverse). Cutoffs are random if not given.
+    """
 
-            child1_layers.append(child1_layer)
-            child2_layers.append(child2_layer)
+    count, size = parentsA.shape
 
-        return (
-            EvoNeuralNetwork(layer_weights=child1_layers),
-            EvoNeuralNetwork(layer_weights=child2_layers)
-        )
+    if cutoffs is None:
+        cutoffs = np.random.randint(0, high=size, size=count)
 
-    def clone(self):
-        copied_weights = []
+    from_a = np.arange(size) <= cutoffs[:, None]
+
+    return (
+        np.where(from_a, parentsA, parentsB),
+        np.where(from_a, parentsB, parentsA)
+    )
 
-        for layer in self.layer_weights:
-            copied_weights.append(np.copy(layer))
 
-        out = EvoNeuralNetwork(
-            layer_weights=copied_weights
+class EvoNeuralNetwork(NeuralNetwork):
+    def crossover(self, other: 'EvoNeuralNetwork') -> Tuple['EvoNeuralNetwork']:
+        # Swaps the genome slices after a single random cutoff.
+        child1, child2 = crossover_genomes(
+            self.genome[None, :], other.genome[None, :])
+
+        return (
+            EvoNeuralNetwork(genome=child1[0], layer_shapes=self.layer_shapes),
+            EvoNeuralNetwork(genome=child2[0], layer_shapes=self.layer_shapes)
         )
 
-        return out
+    def clone(self):
+        return EvoNeuralNetwork(
+            genome=np.copy(self.genome),
+            layer_shapes=self.layer_shapes
+        )
 
-    def mutate(self, mutation_rate=0.1):
-        for layer in self.layer_weights:
-            for x in np.nditer(layer, op_flags=['readwrite']):
-                if random.random() < mutation_rate:
-                    ox = float(x)
-                    nx = x + np.random.normal(loc=0, scale=0.1)
-                    x[...] = min(1, max(-1, nx))
+    def mutate(self, mutation_rate=MUTATION_RATE):
+        mutate_genomes(self.genome, mutation_rate)
         return self
 
     def load_from_file(path: str):
@@ -0,0 +1,170 @@
+from typing import Dict, List
+import json
+import time
+import os
+
+MOVEMENT = 'movement'
+COLLISION = 'collision'
+LASERS = 'lasers'
+LOOK = 'look'
+THINK = 'think'
+ACT = 'act'
+SYNC = 'sync'  # Batched simulation <-> pawn object copies
+
+# Report order. Any other phase is reported after these.
+PHASES = [MOVEMENT, COLLISION, LASERS, LOOK, THINK, ACT, SYNC]
+
+# Trace viewers get slow beyond this many events.
+MAX_TRACE_EVENTS = 1000000
+DEFAULT_TRACE_PATH = 'trace.json'
+
+
+class FrameProfiler:
+    """
+    Accumulates wall time per simulation phase, per frame & per generation.
+
+    Code paths only time themselves when a profiler is handed to them, so an
+    environment without one ('Environment.profiler' is None) pays a None check at most.
+    If a 'trace_path' is given, every timed span is also kept as a Chrome trace event
+    (see 'export_chrome_trace', viewable in chrome://tracing or Perfetto).
+    """
+
+    trace = False
+    trace_path: str = None
+    max_trace_events: int = MAX_TRACE_EVENTS
+    trace_events: List[dict] = None
+
+    frame_totals: Dict[str, float] = None
+    generation_totals: Dict[str, float] = None
+    totals: Dict[str, float] = None
+
+    frames: int = 0
+    generation: int = 0
+    generation_frames: int = 0
+
+    # Kept after 'end_generation', so reports can be built once the next generation began.
+    last_generation_totals: Dict[str, float] = None
+    last_generation_frames: int = 0
+    last_generation_max_frame: float = 0
+
+    max_frame_time: float = 0
+
+    origin: float = 0
+    frame_start: float = 0
+    generation_start: float = 0
+
+    def __init__(self, trace_path: str = None):
+        self.trace_path = trace_path
+        self.trace = trace_path is not None
+        self.trace_events = []
+        self.frame_totals = dict()
+        self.generation_totals = dict()
+        self.totals = dict()
+        self.last_generation_totals = dict()
+
+        self.origin = time.perf_counter()
+        self.frame_start = self.origin
+        self.generation_start = self.origin
+
+    def start(self) -> float:
+        return time.perf_counter()
+
+    def stop(self, phase: str, start: float):
+        """Adds the time since 'start' to the given phase of the current frame."""
+        end = time.perf_counter()
+        self.frame_totals[phase] = self.frame_totals.get(phase, 0) + end - start
+
+        if self.trace:
+            self.add_trace_event(phase, start, end)
+
+    def add_trace_event(self, name: str, start: float, end: float):
+        if len(self.trace_events) >= self.max_trace_events:
+            return
+
+        self.trace_events.append({
+            'name': name,
+            'ph': 'X',
+            'ts': (start - self.origin) * 1e6,
+            'dur': (end - start) * 1e6,
+            'pid': os.getpid(),
+            'tid': 0
+        })
+
+    def end_frame(self):
+        """Folds the current frame's phase times into the generation's."""
+        end = time.perf_counter()
+
+        for phase, elapsed in self.frame_totals.items():
+            self.generation_totals[phase] = \
+                self.generation_totals.get(phase, 0) + elapsed
+
+        self.max_frame_time = max(self.max_frame_time, end - self.frame_start)
+
+        if self.trace:
+            self.add_trace_event('frame', self.frame_start, end)
+
+        self.frame_totals = dict()
+        self.frames += 1
+        self.generation_frames += 1
+        self.frame_start = end
+
+    def end_generation(self):
+        """Folds the generation's phase times into the totals & begins the next generation."""
+        end = time.perf_counter()
+
+        for phase, elapsed in self.generation_totals.items():
+            self.totals[phase] = self.totals.get(phase, 0) + elapsed
+
+        if self.trace:
+            self.add_trace_event('generation %i' % self.generation,
+                                 self.generation_start, end)
+
+        self.last_generation_totals = self.generation_totals
+        self.last_generation_frames = self.generation_frames
+        self.last_generation_max_frame = self.max_frame_time
+
+        self.generation_totals = dict()
+        self.generation_frames = 0
+        self.max_frame_time = 0
+        self.generation += 1
+        self.generation_start = end
+        self.frame_start = end
+
+    def build_report(self) -> str:
+        """Returns the phase breakdown of the last finished generation."""
+        totals = self.last_generation_totals
+        frames = max(1, self.last_generation_frames)
+        timed = sum(totals.values())
+
+        if timed <= 0:
+            return 'Phase Times: Nothing timed yet.'
+
+        s = 'Phase Times (%i frames, %.2fms/frame, slowest frame %.2fms):' % (
+            self.last_generation_frames,
+            timed / frames * 1000,
+            self.last_generation_max_frame * 1000
+        )
+
+        phases = [p for p in PHASES if p in totals] + \
+            sorted(p for p in totals if p not in PHASES)
+
+        for phase in phases:
+            s += '\n  %-13s %8.3fs | %5.1f%% | %8.1fus/frame' % (
+                phase,
+                totals[phase],
+                totals[phase] / timed * 100,
+                totals[phase] / frames * 1e6
+            )
+
+        return s
+
+    def export_chrome_trace(self, path: str = None):
+        """Writes every traced span as Chrome trace-event JSON (to 'trace_path' by default)."""
+        path = self.trace_path if path is None else path
+
+        print('Writing %i trace events to \"%s\"...' % (len(self.trace_events), path))
+        with open(path, 'w') as f:
+            json.dump({
+                'traceEvents': self.trace_events,
+                'displayTimeUnit': 'ms'
+            }, f)
@@ -0,0 +1,177 @@
+from typing import Tuple
+import numpy as np
+import json
+import os
+
+HISTORY_DIRECTORY = 'history'
+HISTORY_FORMAT_FILE = 'format.json'
+HISTORY_VERSION = 1
+
+# One append-only file per column, so reading a column never pages in the others.
+COLUMNS = [
+    ('generation', '<i8'),
+    ('max', '<f8'),
+    ('mean', '<f8'),
+    ('std', '<f8'),
+    ('p10', '<f8'),
+    ('p25', '<f8'),
+    ('median', '<f8'),
+    ('p75', '<f8'),
+    ('p90', '<f8'),
+    ('alive', '<i8'),
+    ('wall_time', '<f8'),  # Seconds spent simulating the generation
+    ('frames', '<i8'),
+    ('saved_frames', '<i8')  # Match up frames cut short by racing (see RacingScheduler)
+]
+
+PERCENTILES = [10, 25, 50, 75, 90]
+
+# Points kept by 'downsample_min_max' by default (about one per pixel of a wide plot).
+PLOT_POINTS = 4000
+
+
+def build_generation_record(generation: int, fitnesses: np.ndarray, alive: int,
+                            wall_time: float = 0, frames: int = 0, saved_frames: int = 0) -> dict:
+    """Summarizes a generation's fitnesses (& how it was simulated) as one log record."""
+    p10, p25, median, p75, p90 = np.percentile(fitnesses, PERCENTILES)
+
+    return {
+        'generation': generation,
+        'max': fitnesses.max(),
+        'mean': fitnesses.mean(),
+        'std': fitnesses.std(),
+        'p10': p10,
+        'p25': p25,
+        'median': median,
+        'p75': p75,
+        'p90': p90,
+        'alive': alive,
+        'wall_time': wall_time,
+        'frames': frames,
+        'saved_frames': saved_frames
+    }
+
+
+def downsample_min_max(y: np.ndarray, points: int = PLOT_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduces a series to about 'points' points, keeping the minimum & maximum of every bucket
+    (at their original positions), so peaks & dips survive the downsampling.
+
+    Returns:
+        (x, y): The kept indices & their values.
+    """
+
+    count = len(y)
+    if count <= points:
+        return np.arange(count), np.asarray(y)
+
+    buckets = max(1, points // 2)
+    size = -(-count // buckets)
+
+    # Pad the last bucket with the last value, so every bucket has the same size.
+    padded = np.empty(buckets * size, dtype=y.dtype)
+    padded[:count] = y
+    padded[count:] = y[-1]
+    padded = padded.reshape(buckets, size)
+
+    start = np.arange(buckets) * size
+    indices = np.concatenate([
+        start + padded.argmin(axis=1),
+        start + padded.argmax(axis=1)
+    ])
+    indices = np.unique(np.minimum(indices, count - 1))
+
+    return indices, np.asarray(y[indices])
+
+
+class GenerationLog:
+    """
+    Columnar, append-only history with one record per generation (see COLUMNS).
+
+    Every column is a raw little-endian file in '<population dir>/history', so appending a
+    generation writes a few bytes per column instead of rewriting the whole history, and
+    columns are read back as memory maps. If a crash interrupted an append, the columns
+    are cut to their shortest length. Columns added after a log was started are filled
+    with 0 for its earlier records.
+    """
+
+    directory: str
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def exists(directory: str) -> bool:
+        return os.path.isfile(os.path.join(directory, HISTORY_FORMAT_FILE))
+
+    def get_column_path(self, column: str) -> str:
+        return os.path.join(self.directory, '%s.bin' % column)
+
+    def create(self):
+        if GenerationLog.exists(self.directory):
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, HISTORY_FORMAT_FILE), 'w') as f:
+            json.dump({'version': HISTORY_VERSION, 'columns': COLUMNS}, f)
+
+    def append(self, record: dict):
+        """Appends one generation's record (missing columns are logged as 0)."""
+        self.create()
+        length = len(self)
+
+        for column, dtype in COLUMNS:
+            path = self.get_column_path(column)
+
+            # Drop the partial record of an interrupted append first.
+            if os.path.isfile(path) and os.path.getsize(path) > length * np.dtype(dtype).itemsize:
+                os.truncate(path, length * np.dtype(dtype).itemsize)
+
+            # New columns start out with 0 for every earlier record.
+            elif not os.path.isfile(path):
+                with open(path, 'wb') as f:
+                    f.write(np.zeros(length, dtype=dtype).tobytes())
+
+            with open(path, 'ab') as f:
+                f.write(np.array([record.get(column, 0)], dtype=dtype).tobytes())
+
+    def __len__(self):
+        """Amount of complete records."""
+        lengths = []
+
+        for column, dtype in COLUMNS:
+            path = self.get_column_path(column)
+
+            # Columns added after the log was started are filled on the next append.
+            if os.path.isfile(path):
+                lengths.append(os.path.getsize(path) // np.dtype(dtype).itemsize)
+
+        return min(lengths) if lengths else 0
+
+    def read(self, column: str) -> np.ndarray:
+        """Returns a read-only memory map of a column (covering the complete records)."""
+        dtype = np.dtype(dict(COLUMNS)[column])
+        length = len(self)
+
+        if length == 0 or not os.path.isfile(self.get_column_path(column)):
+            return np.zeros(length, dtype=dtype)
+
+        return np.memmap(self.get_column_path(column), dtype=dtype, mode='r', shape=(length,))
+
+    def truncate_from(self, generation: int):
+        """Drops every record of the given generation & later ones (e.g. when resuming an older checkpoint)."""
+        if not GenerationLog.exists(self.directory):
+            return
+
+        generations = self.read('generation')
+        length = int(np.searchsorted(generations, generation))
+
+        if length == len(generations):
+            return
+
+        del generations
+
+        for column, dtype in COLUMNS:
+            path = self.get_column_path(column)
+
+            if os.path.isfile(path):
+                os.truncate(path, length * np.dtype(dtype).itemsize)
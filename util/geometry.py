@@ -0,0 +1,113 @@
+"""
+Geometry kernels of the wrapping screen.
+
+Every kernel works elementwise on both floats & (broadcastable) numpy arrays, so the Actor
+methods (floats) & the batched versions below ((N, 2) position arrays) share the exact same
+arithmetic & produce identical results.
+"""
+
+from environments.environment import *
+import numpy as np
+import math
+
+# Donut-compensated distances wrap around the largest screen dimension.
+WRAP_DIST_SQUARED = max(SCREEN_WIDTH, SCREEN_HEIGHT) ** 2
+
+TWO_PI = math.pi * 2
+
+# Scales how far ahead of a moving target 'aim_lead' aims.
+AIM_LEAD_BIAS = 100
+
+
+def raw_dist_squared(x1, y1, x2, y2):
+    """Raw distance squared between (x1, y1) & (x2, y2). Squares by multiplying (exact, unlike pow)."""
+    dx = x1 - x2
+    dy = y1 - y2
+    return dx * dx + dy * dy
+
+
+def compensate_dist_squared(raw):
+    """
+    Donut-compensated distance squared of a raw distance squared: the smaller of it & its
+    difference to WRAP_DIST_SQUARED (see 'Actor.dist_squared').
+    """
+
+    alt = abs(WRAP_DIST_SQUARED - raw)
+
+    if isinstance(raw, np.ndarray):
+        return np.minimum(raw, alt)
+
+    return raw if raw <= alt else alt
+
+
+def angle_between(x1, y1, x2, y2):
+    """Direction (radians in [0, 2Pi)) to look at from (x1, y1) to face (x2, y2), see 'Actor.angle_to'."""
+    vx = x1 - x2
+    vy = y1 - y2
+    raw = vx * vx + vy * vy
+
+    # Behind the wrap, the shorter way points the other way around.
+    if isinstance(raw, np.ndarray):
+        d = np.arctan2(vy, vx) + math.pi
+        d = np.where(WRAP_DIST_SQUARED - raw < raw, d + math.pi, d)
+        return np.mod(d, TWO_PI)
+
+    # numpy's arctan2 (not always equal to math.atan2 in the last bit), so floats match arrays.
+    d = float(np.arctan2(vy, vx)) + math.pi
+
+    if WRAP_DIST_SQUARED - raw < raw:
+        d += math.pi
+
+    return d % TWO_PI
+
+
+def aim_lead(x, y, vx, vy, dist, short_range_end, short_speed, long_speed, bias=AIM_LEAD_BIAS):
+    """
+    Position to aim at to hit a target at (x, y) moving with (vx, vy), given its distance squared
+    (see 'Pawn.get_best_aim_position'). Targets nearer than 'short_range_end' are aimed at with
+    the short attack's speed, others with the long attack's speed.
+
+    Returns:
+        (x, y) of the aim position.
+    """
+
+    if isinstance(dist, np.ndarray):
+        speed = np.where(dist < short_range_end, short_speed, long_speed)
+    else:
+        speed = short_speed if dist < short_range_end else long_speed
+
+    scalar = dist / speed ** 2 * bias
+    return x + vx * scalar, y + vy * scalar
+
+
+def donut_dist_squared(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Vectorized version of 'Actor.dist_squared' for (broadcastable) (N, 2) position arrays."""
+    return compensate_dist_squared(
+        raw_dist_squared(a[..., 0], a[..., 1], b[..., 0], b[..., 1]))
+
+
+def pairwise_donut_dist_squared(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Donut-compensated distance squared between every pair of (N, 2) & (M, 2) positions, as an (N, M) array."""
+    return donut_dist_squared(a[:, None, :], b[None, :, :])
+
+
+def angles_to(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Vectorized version of 'Actor.angle_to' for (broadcastable) (N, 2) position arrays."""
+    return angle_between(a[..., 0], a[..., 1], b[..., 0], b[..., 1])
+
+
+def pairwise_angles_to(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Direction from every one of (N, 2) positions to face every one of (M, 2) positions, as an (N, M) array."""
+    return angles_to(a[:, None, :], b[None, :, :])
+
+
+def aim_positions(pos: np.ndarray, vel: np.ndarray, dist: np.ndarray, short_range_end,
+                  short_speed, long_speed, bias=AIM_LEAD_BIAS) -> np.ndarray:
+    """
+    Vectorized version of 'Pawn.get_best_aim_position' for (N, 2) target positions & velocities,
+    their (N,) distances squared & the (scalar or (N,)) attack ranges & speeds of the aiming pawns.
+    """
+
+    x, y = aim_lead(pos[:, 0], pos[:, 1], vel[:, 0], vel[:, 1], dist,
+                    short_range_end, short_speed, long_speed, bias)
+    return np.stack([x, y], axis=1)
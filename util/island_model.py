@@ -0,0 +1,207 @@
+from environments.island_environment import *
+from util.seeding import *
+from typing import List
+import multiprocessing
+import queue
+import random
+import os
+
+RING_TOPOLOGY = 'ring'
+RANDOM_TOPOLOGY = 'random'
+
+
+def run_island(island: int, population: Population, settings: dict, generations: int,
+               inbox: multiprocessing.Queue, outbox: multiprocessing.Queue):
+    """
+    Island process entry point. Evolves the population in its own EvolutionEnvironment loop.
+
+    Every 'migration_interval' generations, a report with the island's top genomes
+    is sent to the coordinator & any migrants that have arrived are taken in.
+    Islands never wait on each other.
+    """
+
+    # Forked islands would otherwise all share the same random state.
+    seed = settings['seed']
+    if seed is None:
+        random.seed()
+        np.random.seed()
+    else:
+        seed_globals(derive_seed(seed, island))
+
+    env = IslandEnvironment(population, island=island, batched=settings['batched'])
+    env.batched_inference = settings['batched_inference']
+    env.pooled_lasers = settings['pooled_lasers']
+    env.max_game_length = settings['max_game_length']
+
+    if seed is not None:
+        env.set_seed(derive_seed(seed, island))
+
+    done = 0
+    while done < generations:
+        epoch = min(settings['migration_interval'], generations - done)
+        env.run_generations(epoch)
+        done += epoch
+
+        pop = env.population1
+        outbox.put({
+            'island': island,
+            'done': done >= generations,
+            'current_gen': pop.current_gen,
+            'fitnesses': pop.generational_fitnesses[-epoch:],
+            'max_overall_fitness': pop.max_overall_fitness,
+            'layer_shapes': pop.get(0).layer_shapes,
+            'migrants': np.array([net.genome for net in pop.ranked_networks[:settings['migrants']]]),
+            'genomes': np.stack([net.genome for net in pop.neural_networks])
+        })
+
+        while True:
+            try:
+                migrants, layer_shapes = inbox.get_nowait()
+            except queue.Empty:
+                break
+
+            env.immigrate(migrants, layer_shapes)
+
+
+class IslandCoordinator:
+    """
+    Evolves several populations (islands) in separate processes.
+
+    Islands only synchronize with the coordinator every 'migration_interval' generations,
+    when they report their fitness history & send their top genomes. The coordinator
+    forwards those migrants through the topology, checkpoints the islands in the background
+    (see CheckpointWriter) & keeps the aggregate generational fitness history.
+    """
+
+    populations: List[Population]
+    topology: str = RING_TOPOLOGY
+    migration_interval: int = 5
+    migrants: int = 2
+    checkpoint_interval: int = 1  # Reports between checkpoints of an island
+
+    batched = False
+    batched_inference = False
+    pooled_lasers = False
+    max_game_length: int = 1500
+
+    # Seeds every island's own streams. Since migrants arrive asynchronously,
+    # only runs without migration are fully reproducible.
+    seed: int = None
+
+    island_fitnesses: List[List[float]] = None
+    reports: List[int] = None
+    inboxes: list = None
+    checkpoint_writer: CheckpointWriter = None
+
+    def __init__(self, populations: List[Population], topology: str = RING_TOPOLOGY):
+        assert len(populations) > 0, 'The island model MUST have at least one island.'
+        assert topology in (RING_TOPOLOGY, RANDOM_TOPOLOGY), 'Unknown topology %s.' % topology
+
+        self.populations = populations
+        self.topology = topology
+        self.island_fitnesses = [[] for _ in populations]
+        self.reports = [0 for _ in populations]
+
+    def settings(self) -> dict:
+        return {
+            'batched': self.batched,
+            'batched_inference': self.batched_inference,
+            'pooled_lasers': self.pooled_lasers,
+            'max_game_length': self.max_game_length,
+            'migration_interval': self.migration_interval,
+            'migrants': self.migrants,
+            'seed': self.seed
+        }
+
+    def set_seed(self, seed: int):
+        self.seed = seed
+
+    def get_destination(self, island: int) -> int:
+        """Returns the island that receives the given island's migrants."""
+        count = len(self.populations)
+
+        if self.topology == RING_TOPOLOGY:
+            return (island + 1) % count
+
+        return random.choice([i for i in range(count) if i != island])
+
+    def generational_fitnesses(self) -> List[float]:
+        """Returns the max generational fitness across all islands, per generation."""
+        longest = max(len(fitnesses) for fitnesses in self.island_fitnesses)
+
+        return [
+            max(fitnesses[i] for fitnesses in self.island_fitnesses if i < len(fitnesses))
+            for i in range(longest)
+        ]
+
+    def checkpoint(self, report: dict):
+        """Snapshots the reported island population for the background checkpoint writer."""
+        pop = self.populations[report['island']]
+
+        pop.neural_networks = [
+            EvoNeuralNetwork(genome=genome, layer_shapes=report['layer_shapes'])
+            for genome in report['genomes']
+        ]
+        pop.current_gen = report['current_gen']
+        pop.max_overall_fitness = report['max_overall_fitness']
+        pop.generational_fitnesses.extend(report['fitnesses'])
+        self.checkpoint_writer.submit(pop.snapshot())
+
+    def handle_report(self, report: dict, running: set):
+        island = report['island']
+        self.island_fitnesses[island].extend(report['fitnesses'])
+        self.reports[island] += 1
+
+        if report['done'] or self.reports[island] % self.checkpoint_interval == 0:
+            self.checkpoint(report)
+        else:
+            self.populations[island].generational_fitnesses.extend(report['fitnesses'])
+
+        if report['done']:
+            running.discard(island)
+
+        if len(self.populations) > 1 and self.migrants > 0:
+            destination = self.get_destination(island)
+
+            # Finished islands no longer take in migrants.
+            if destination in running:
+                self.inboxes[destination].put(
+                    (report['migrants'], report['layer_shapes']))
+
+    def run(self, iterations=10):
+        """Evolves every island for the given amount of generations."""
+        assert iterations > 0, 'Generation count MUST be larger than 0.'
+
+        print('Running %i islands for %i iterations.' %
+              (len(self.populations), iterations))
+
+        outbox = multiprocessing.Queue()
+        self.inboxes = [multiprocessing.Queue() for _ in self.populations]
+        settings = self.settings()
+
+        processes = []
+        for island, population in enumerate(self.populations):
+            # Migrants left for an island that already finished are dropped.
+            self.inboxes[island].cancel_join_thread()
+
+            process = multiprocessing.Process(
+                target=run_island,
+                args=(island, population, settings, iterations,
+                      self.inboxes[island], outbox)
+            )
+            process.start()
+            processes.append(process)
+
+        self.checkpoint_writer = CheckpointWriter()
+
+        running = set(range(len(self.populations)))
+        while running:
+            self.handle_report(outbox.get(), running)
+
+        for process in processes:
+            process.join()
+
+        self.checkpoint_writer.close()
+
+        print('Max Fitness Per Generation: %s' %
+              ', '.join('%.1f' % f for f in self.generational_fitnesses()))
@@ -0,0 +1,21 @@
+"""Key codes used by the simulation (same values as arcade.key)."""
+
+W = 119
+A = 97
+S = 115
+D = 100
+
+RIGHT = 65363
+LEFT = 65361
+
+SPACE = 32
+LSHIFT = 65505
+Q = 113
+
+ESCAPE = 65307
+BACKSPACE = 65288
+BRACKETLEFT = 91
+BRACKETRIGHT = 93
+BACKSLASH = 92
+N = 110
+P = 112
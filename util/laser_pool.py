@@ -0,0 +1,430 @@
+from actors.laser import *
+from typing import List
+from itertools import chain
+import numpy as np
+import math
+
+# Lasers use the default Actor outward bound when wrapping.
+LASER_OUTWARD_BOUND = Actor.max_outward_bound
+
+DEFAULT_CAPACITY = 2048
+
+NO_SLOTS = np.zeros(0, dtype=np.int64)
+
+
+def wrap_positions(pos: np.ndarray, bound):
+    """
+    Vectorized version of 'Actor.wrapX' followed by 'Actor.wrapY'.
+    Modifies the (N, 2) position array in place.
+    """
+
+    x = pos[:, 0]
+    y = pos[:, 1]
+    bound = np.broadcast_to(bound, x.shape)
+
+    low = x < -bound
+    high = x > SCREEN_WIDTH + bound
+    x[low] = SCREEN_WIDTH + bound[low]
+    x[high] = -bound[high]
+    flip = low | high
+    y[flip] = SCREEN_HEIGHT - y[flip]
+
+    low = y < -bound
+    high = y > SCREEN_HEIGHT + bound
+    y[low] = SCREEN_HEIGHT + bound[low]
+    y[high] = -bound[high]
+    flip = low | high
+    x[flip] = SCREEN_WIDTH - x[flip]
+
+
+class PooledLaser(Laser):
+    """Read-only snapshot of a pooled laser with the same interface as a Laser."""
+
+    pool: 'LaserPool'
+    slot: int
+
+    def __init__(self, pool: 'LaserPool', slot: int, owner: int, pos: list, origin: list,
+                 direc: float, speed: float, min_life_span: float, max_life_span: float,
+                 damage: float, traveled: float):
+        super().__init__(
+            pool.owners[owner],
+            pos,
+            direc,
+            speed=speed,
+            min_life_span=min_life_span,
+            max_life_span=max_life_span,
+            damage=damage,
+            color=pool.colors[slot]
+        )
+
+        self.pool = pool
+        self.slot = slot
+        self.start_pos = tuple(origin)
+        self.traveled = traveled
+
+    def kill(self):
+        self.pool.kill(self.slot)
+        self.is_dead = True
+
+    def __eq__(self, other):
+        return isinstance(other, PooledLaser) and \
+            other.pool is self.pool and other.slot == self.slot
+
+    def __hash__(self):
+        return hash((id(self.pool), self.slot))
+
+
+class LaserPool:
+    """
+    Preallocated storage for every laser of an environment.
+
+    Lasers live in fixed-capacity arrays & dead slots are reused through a free list.
+    All live lasers are moved, wrapped & expired in one vectorized pass per frame.
+    If the capacity is ever exhausted, it is doubled.
+
+    Hits & imminent lasers can be queried for many pawns at once (see 'find_hits' & 'most_imminent_slots').
+    """
+
+    capacity: int = 0
+    owners: List = None
+    match_slots: List[List[int]] = None
+
+    # Bumped whenever a laser of the match up is spawned or killed, & whenever the lasers move.
+    match_versions: List[int] = None
+    moves: int = 0
+
+    # Snapshots of the live slots, kept until the lasers move (see 'views').
+    cached_views: dict = None
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+
+        self.origin = np.zeros((capacity, 2))
+        self.pos = np.zeros((capacity, 2))
+        self.direc = np.zeros(capacity)
+        self.direction = np.zeros((capacity, 2))  # (cos, sin) of direc
+        self.speed = np.zeros(capacity)
+        self.traveled = np.zeros(capacity)
+        self.min_life_span = np.zeros(capacity)
+        self.max_life_span = np.zeros(capacity)
+        self.damage = np.zeros(capacity)
+        self.owner = np.zeros(capacity, dtype=np.int64)
+        self.match = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.colors = [None] * capacity
+
+        # Stack of free slots, popped from the end.
+        self.free_slots = np.arange(capacity - 1, -1, -1, dtype=np.int64)
+        self.free_count = capacity
+
+        self.owners = []
+        self.owner_match = []
+        self.match_slots = []
+        self.match_versions = []
+        self.cached_views = dict()
+
+    def reset(self):
+        """Kills every laser & forgets all owners & match ups."""
+        self.kill(np.flatnonzero(self.alive))
+        self.owners = []
+        self.owner_match = []
+        self.match_slots = []
+        self.match_versions = []
+        self.cached_views.clear()
+
+    def register_match(self) -> int:
+        """Returns the id for a new match up."""
+        self.match_slots.append([])
+        self.match_versions.append(0)
+        return len(self.match_slots) - 1
+
+    def get_match_key(self, match: int) -> tuple:
+        """Changes whenever a laser of the match up is spawned, killed or moved."""
+        return (self.match_versions[match], self.moves)
+
+    def register_owner(self, pawn, match: int) -> int:
+        """Returns the owner id for a pawn within the given match up."""
+        self.owners.append(pawn)
+        self.owner_match.append(match)
+        return len(self.owners) - 1
+
+    def grow(self):
+        """Doubles the capacity, keeping all existing lasers."""
+        old = self.capacity
+        new = old * 2
+
+        for name in ('origin', 'pos', 'direc', 'direction', 'speed', 'traveled',
+                     'min_life_span', 'max_life_span', 'damage', 'owner', 'match', 'alive'):
+            arr = getattr(self, name)
+            grown = np.zeros((new,) + arr.shape[1:], dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+
+        self.colors.extend([None] * old)
+
+        free = np.zeros(new, dtype=np.int64)
+        free[:self.free_count] = self.free_slots[:self.free_count]
+        free[self.free_count:self.free_count + old] = np.arange(new - 1, old - 1, -1)
+        self.free_slots = free
+        self.free_count += old
+        self.capacity = new
+
+    def spawn(self, owner: int, pos, direc: float, speed: float, min_life_span: float,
+              max_life_span: float, damage: float, color=None) -> int:
+        """Spawns a single laser & returns its slot."""
+        return int(self.spawn_many(
+            np.array([owner]),
+            np.array([pos], dtype=float),
+            np.array([direc], dtype=float),
+            np.array([speed], dtype=float),
+            np.array([min_life_span], dtype=float),
+            np.array([max_life_span], dtype=float),
+            np.array([damage], dtype=float),
+            [color]
+        )[0])
+
+    def spawn_many(self, owners: np.ndarray, pos: np.ndarray, direc: np.ndarray,
+                   speed: np.ndarray, min_life_span: np.ndarray, max_life_span: np.ndarray,
+                   damage: np.ndarray, colors: list) -> np.ndarray:
+        """Spawns one laser per owner & returns their slots."""
+        k = owners.size
+        if k == 0:
+            return NO_SLOTS
+
+        while self.free_count < k:
+            self.grow()
+
+        slots = self.free_slots[self.free_count - k:self.free_count][::-1].copy()
+        self.free_count -= k
+
+        self.origin[slots] = pos
+        self.pos[slots] = pos
+        self.direc[slots] = direc
+        self.direction[slots, 0] = np.cos(direc)
+        self.direction[slots, 1] = np.sin(direc)
+        self.speed[slots] = speed
+        self.traveled[slots] = 0
+        self.min_life_span[slots] = min_life_span
+        self.max_life_span[slots] = max_life_span
+        self.damage[slots] = damage
+        self.owner[slots] = owners
+        self.alive[slots] = True
+
+        for slot, owner, color in zip(slots.tolist(), owners.tolist(), colors):
+            match = self.owner_match[owner]
+            self.match[slot] = match
+            self.colors[slot] = color
+            self.match_slots[match].append(slot)
+            self.match_versions[match] += 1
+
+        return slots
+
+    def kill(self, slots):
+        """Frees the given slots (already dead slots are ignored)."""
+        slots = np.atleast_1d(np.asarray(slots, dtype=np.int64))
+        slots = np.unique(slots[self.alive[slots]])
+
+        if slots.size == 0:
+            return
+
+        self.alive[slots] = False
+
+        for slot in slots.tolist():
+            match = self.match[slot]
+            self.match_slots[match].remove(slot)
+            self.match_versions[match] += 1
+            self.colors[slot] = None
+            self.cached_views.pop(slot, None)
+
+        self.free_slots[self.free_count:self.free_count + slots.size] = slots
+        self.free_count += slots.size
+
+    def kill_match(self, match: int):
+        """Frees every laser of the given match up."""
+        self.kill(self.match_slots[match][:])
+
+    def kill_owner(self, owner: int):
+        """Frees every laser of the given owner."""
+        self.kill(self.owned_slots(owner))
+
+    def live_slots(self) -> np.ndarray:
+        return np.flatnonzero(self.alive)
+
+    def update(self, delta_time, slots: np.ndarray = None):
+        """Moves, wraps & expires every live laser (or only the given ones) in one pass."""
+        live = self.live_slots() if slots is None else slots
+        self.moves += 1
+        self.cached_views.clear()
+
+        if live.size == 0:
+            return
+
+        step = self.speed[live] * delta_time
+
+        pos = self.pos[live] + self.direction[live] * step[:, None]
+        wrap_positions(pos, LASER_OUTWARD_BOUND)
+        self.pos[live] = pos
+
+        traveled = self.traveled[live] + np.abs(step)
+        self.traveled[live] = traveled
+
+        self.kill(live[traveled > self.max_life_span[live]])
+
+    # ----------------------------------------
+    #                Queries
+    # ----------------------------------------
+
+    def owned_slots(self, owner: int) -> np.ndarray:
+        """Returns the slots of every live laser fired by the given owner."""
+        slots = self.match_slots[self.owner_match[owner]]
+        if not slots:
+            return NO_SLOTS
+
+        slots = np.array(slots, dtype=np.int64)
+        return slots[self.owner[slots] == owner]
+
+    def enemy_slots(self, owner: int) -> np.ndarray:
+        """Returns the slots of every live laser in the owner's match up not fired by them."""
+        slots = self.match_slots[self.owner_match[owner]]
+        if not slots:
+            return NO_SLOTS
+
+        slots = np.array(slots, dtype=np.int64)
+        return slots[self.owner[slots] != owner]
+
+    def enemy_pairs(self, owners: np.ndarray):
+        """
+        Returns (owner index, slot) pairs for every enemy laser of each of the given owners.
+        The slots of each owner are in the order of 'enemy_slots'.
+        """
+
+        owner_match = self.owner_match
+        match_slots = self.match_slots
+        lists = [match_slots[owner_match[owner]] for owner in owners.tolist()]
+        counts = np.array([len(slots) for slots in lists], dtype=np.int64)
+
+        slots = np.fromiter(chain.from_iterable(lists), dtype=np.int64, count=int(counts.sum()))
+        indices = np.repeat(np.arange(owners.size), counts)
+
+        enemy = self.owner[slots] != owners[indices]
+        return indices[enemy], slots[enemy]
+
+    def find_hits(self, owners: np.ndarray, pos: np.ndarray, radius_squared: float):
+        """
+        Returns (owner index, slot) pairs for every enemy laser within the given radius of each
+        owner's (n, 2) position, ordered by owner index & then like 'enemy_slots'.
+        """
+
+        indices, slots = self.enemy_pairs(owners)
+        touching = donut_dist_squared(self.pos[slots], pos[indices]) <= radius_squared
+        return indices[touching], slots[touching]
+
+    def get_damage(self, slots: np.ndarray) -> np.ndarray:
+        """Vectorized 'Laser.get_damage'."""
+        return np.where(
+            self.traveled[slots] < self.min_life_span[slots], 0, self.damage[slots])
+
+    def get_head_positions(self, slots: np.ndarray) -> np.ndarray:
+        """Vectorized 'Laser.get_head_position'."""
+        return self.pos[slots] + self.direction[slots] * LENGTH
+
+    def get_dist_if_in_path(self, slots: np.ndarray, C, r: float) -> np.ndarray:
+        """Vectorized 'Laser.get_dist_if_in_path' for a single circle, or one (n, 2) center per slot."""
+        C = np.asarray(C, dtype=float)
+        cx = C[..., 0]
+        cy = C[..., 1]
+
+        cos = self.direction[slots, 0]
+        sin = self.direction[slots, 1]
+
+        ex = self.pos[slots, 0] + cos * LENGTH
+        ey = self.pos[slots, 1] + sin * LENGTH
+        dx = cos * SCREEN_WIDTH
+        dy = sin * SCREEN_HEIGHT
+        fx = ex - cx
+        fy = ey - cy
+
+        a = dx * dx + dy * dy
+        b = 2 * (fx * dx + fy * dy)
+        c = fx * fx + fy * fy - r * r
+
+        discriminant = b * b - 4 * a * c
+
+        # Note: the y term is measured against C[0], matching Laser.
+        dist = fx * fx + (ey - cx) ** 2
+        return np.where(discriminant >= 0, dist, -1)
+
+    def most_imminent_slot(self, owner: int, C, r: float) -> int:
+        """Vectorized 'MatchUp.get_most_imminent_laser'. Returns -1 if there is none."""
+        slots = self.enemy_slots(owner)
+        if slots.size == 0:
+            return -1
+
+        dist = self.get_dist_if_in_path(slots, C, r)
+        on_route = dist > 0
+        if not on_route.any():
+            return -1
+
+        # First minimum, matching the strict comparison of the scalar scan.
+        return int(slots[on_route][np.argmin(dist[on_route])])
+
+    def most_imminent_slots(self, owners: np.ndarray, C: np.ndarray, r: float) -> np.ndarray:
+        """
+        'most_imminent_slot' for many owners at once, each with its (n, 2) center.
+        Returns one slot per owner (-1 if there is none).
+        """
+
+        imminent = np.full(owners.size, -1, dtype=np.int64)
+        indices, slots = self.enemy_pairs(owners)
+
+        dist = self.get_dist_if_in_path(slots, C[indices], r)
+        on_route = dist > 0
+        indices = indices[on_route]
+        slots = slots[on_route]
+        dist = dist[on_route]
+
+        if indices.size == 0:
+            return imminent
+
+        # Stable, so the first minimum of each owner comes first, as in the scalar scan.
+        order = np.lexsort((dist, indices))
+        indices = indices[order]
+        first = np.r_[True, indices[1:] != indices[:-1]]
+
+        imminent[indices[first]] = slots[order][first]
+        return imminent
+
+    def view(self, slot: int) -> PooledLaser:
+        view = self.cached_views.get(slot)
+        return view if view is not None else self.views(np.array([slot]))[0]
+
+    def views(self, slots: np.ndarray) -> List[PooledLaser]:
+        """Returns Laser compatible snapshots of the given slots (shared until the lasers move)."""
+        if slots.size == 0:
+            return []
+
+        cached = self.cached_views
+        slot_list = slots.tolist()
+        missing = np.array([slot for slot in slot_list if slot not in cached], dtype=np.int64)
+
+        if missing.size > 0:
+            self.build_views(missing)
+
+        return [cached[slot] for slot in slot_list]
+
+    def build_views(self, slots: np.ndarray):
+        fields = zip(
+            slots.tolist(),
+            self.owner[slots].tolist(),
+            self.pos[slots].tolist(),
+            self.origin[slots].tolist(),
+            self.direc[slots].tolist(),
+            self.speed[slots].tolist(),
+            self.min_life_span[slots].tolist(),
+            self.max_life_span[slots].tolist(),
+            self.damage[slots].tolist(),
+            self.traveled[slots].tolist()
+        )
+
+        for f in fields:
+            self.cached_views[f[0]] = PooledLaser(self, *f)
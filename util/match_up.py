@@ -2,115 +2,623 @@ from environments.environment import *
 from actors.pawns.pawn import *
 from controllers.controller import *
 from controllers.player_controller import *
+from util.frame_profiler import *
+from util.spatial_hash import *
+import random
 
-DEBUG = True
-FRAMES_BETWEEN_DECISIONS = 1
+# Match ups with at least this many pawns index their pawns & lasers in a SpatialHash.
+SPATIAL_HASH_MIN_PAWNS = 16
+
+# Queries whose answers MatchUps keep until they are invalidated (see 'count_query').
+ALIVE_QUERY = 'alive'
+OPPONENTS_QUERY = 'opponents'
+LASERS_QUERY = 'lasers'
+IMMINENT_QUERY = 'imminent'
+CLOSEST_QUERY = 'closest'
+
+QUERIES = [ALIVE_QUERY, OPPONENTS_QUERY, LASERS_QUERY, IMMINENT_QUERY, CLOSEST_QUERY]
 
 
 class MatchUp:
     """Defines the structure for a set of pawns that will be aware of each other's presence."""
 
-    pawns: set
+    pawns: list  # Stable iteration order
     dead_pawns: set
     frames: int = 0
 
+    # If True, this match up was ended early (see 'stop') & its pawns keep their current fitness.
+    stopped = False
+
+    # Own RNG stream, if seeded.
+    rng: random.Random = None
+    seed_value: int = None
+
+    laser_pool: LaserPool = None
+    laser_pool_id: int = -1
+
+    # Living pawn with the highest fitness, kept up to date by fitness change events.
+    best_pawn: Pawn = None
+    best_fitness: float = -1
+
+    # Notified with 'get_best_fitness' whenever a pawn's fitness changes or a pawn dies (its Environment).
+    fitness_listener = None
+
+    # Living pawns & their (non pooled) lasers by position, for large match ups.
+    # Rebuilt on the first query of every frame, then kept up to date as pawns are updated.
+    pawn_hash: SpatialHash = None
+    laser_hash: SpatialHash = None
+    hashed_frame: int = -1
+    hashed_lasers: Dict[Pawn, Dict[Laser, None]] = None
+    pawn_order: Dict[Pawn, int] = None
+    laser_count: int = 0  # Keys lasers in the order they were first indexed.
+
+    # Answers of repeated queries. Alive pawns & opponents are kept until a pawn dies, enemy lasers
+    # until an opponent's lasers change (see 'Pawn.laser_version'), closest opponents & imminent
+    # lasers until anything moves ('motion' counts the updates of the current frame).
+    motion: int = 0
+    alive_pawns: list = None
+    opponents: Dict[Pawn, list] = None
+    enemy_lasers: Dict[Pawn, tuple] = None  # pawn -> (laser key, lasers)
+    closest_opponents: Dict[Pawn, tuple] = None  # pawn -> (stamp, opponent)
+    imminent_lasers: Dict[Pawn, tuple] = None  # pawn -> (stamp, laser key, laser)
+
+    # Cached answers (hits) & computed answers (misses) per query.
+    query_hits: Dict[str, int] = None
+    query_misses: Dict[str, int] = None
+
     def __init__(self, *pawns: Pawn):
-        self.pawns = set(pawns)
+        self.pawns = list(pawns)
         self.dead_pawns = set()
 
+        self.opponents = dict()
+        self.enemy_lasers = dict()
+        self.closest_opponents = dict()
+        self.imminent_lasers = dict()
+        self.query_hits = {query: 0 for query in QUERIES}
+        self.query_misses = {query: 0 for query in QUERIES}
+
+        pawn: Pawn
+        for pawn in self.pawns:
+            pawn.fitness_listener = self
+
+        if len(self.pawns) >= SPATIAL_HASH_MIN_PAWNS:
+            self.pawn_hash = SpatialHash()
+            self.laser_hash = SpatialHash()
+            self.hashed_lasers = dict()
+            self.pawn_order = {pawn: i for i, pawn in enumerate(self.pawns)}
+
+        self.find_best_pawn()
+
     def is_still_going(self):
-        """Checks if this match up has a winner yet."""
-        return len(self.pawns) - len(self.dead_pawns) > 1
+        """Checks if this match up has a winner yet (& wasn't stopped)."""
+        return not self.stopped and len(self.pawns) - len(self.dead_pawns) > 1
+
+    def stop(self):
+        """Ends this match up early, freezing the fitness of its pawns (e.g. by a RacingScheduler)."""
+        if self.stopped:
+            return
+
+        self.stopped = True
+        self.invalidate_queries()
+        self.notify_fitness_listener()
+
+        if self.laser_pool is not None:
+            self.laser_pool.kill_match(self.laser_pool_id)
+
+    def seed(self, seed: int):
+        """
+        Gives this match up (& its pawns) its own RNG stream,
+        then re-rolls every random start from it.
+        """
+        self.seed_value = seed
+        self.rng = random.Random(seed)
+
+        pawn: Pawn
+        for pawn in self.pawns:
+            pawn.rng = self.rng
+            pawn.reset()
+            pawn.controller.reseed()
+
+        self.hashed_frame = -1
+        self.invalidate_queries()
+        self.find_best_pawn()
+
+    def attach_laser_pool(self, pool: LaserPool):
+        """Makes every pawn in this match up fire their lasers into the given pool."""
+        self.laser_pool = pool
+        self.laser_pool_id = pool.register_match()
+
+        pawn: Pawn
+        for pawn in self.pawns:
+            pawn.laser_pool = pool
+            pawn.laser_owner = pool.register_owner(pawn, self.laser_pool_id)
 
     def kill(self, pawn: Pawn):
         self.dead_pawns.add(pawn)
+        self.invalidate_queries()
+
+        if self.pawn_hash is not None:
+            self.unhash_pawn(pawn)
+
+        if pawn is self.best_pawn:
+            self.find_best_pawn()
+
+        self.notify_fitness_listener()
+
+        if self.laser_pool is not None:
+            # Dead pawns' lasers & finished matches' lasers are no longer relevant.
+            if self.is_still_going():
+                self.laser_pool.kill_owner(pawn.laser_owner)
+            else:
+                self.laser_pool.kill_match(self.laser_pool_id)
+
+    # ----------------------------------------
+    #              Query Cache
+    # ----------------------------------------
+
+    def invalidate_queries(self):
+        """Drops every cached query answer. MUST be called whenever a pawn dies or is revived."""
+        self.alive_pawns = None
+        self.opponents.clear()
+        self.enemy_lasers.clear()
+        self.closest_opponents.clear()
+        self.imminent_lasers.clear()
+
+    def count_query(self, query: str, hit: bool):
+        if hit:
+            self.query_hits[query] += 1
+        else:
+            self.query_misses[query] += 1
+
+    def get_motion_stamp(self) -> tuple:
+        """Changes whenever a pawn or laser of this match up may have moved."""
+        return (self.frames, self.motion)
+
+    def get_laser_key(self, pawn: Pawn) -> tuple:
+        """Changes whenever the set of enemy lasers of the pawn changes (or, if pooled, any laser of this match up)."""
+        if self.laser_pool is not None:
+            return self.laser_pool.get_match_key(self.laser_pool_id)
+
+        return tuple(opponent.laser_version for opponent in self.get_opponents_for(pawn))
+
+    def build_query_report(match_ups: list) -> str:
+        """Sums the query counters of the given match ups."""
+        s = 'Query Cache (saved/computed):'
+
+        for query in QUERIES:
+            s += ' %s %i/%i' % (
+                query,
+                sum(match_up.query_hits[query] for match_up in match_ups),
+                sum(match_up.query_misses[query] for match_up in match_ups)
+            )
+
+        return s
+
+    def get_lasers(self, pawn: Pawn):
+        """
+        Returns all lasers in their match that are not owned by the given pawn.
+        The list is shared until the enemy lasers change, so it MUST NOT be modified.
+        """
+
+        key = self.get_laser_key(pawn)
+        cached = self.enemy_lasers.get(pawn)
+
+        if cached is not None and cached[0] == key:
+            self.count_query(LASERS_QUERY, True)
+            return cached[1]
+
+        self.count_query(LASERS_QUERY, False)
+        lasers = self.compute_lasers(pawn)
+        self.enemy_lasers[pawn] = (key, lasers)
+        return lasers
 
-    def get_lasers(self, pawn: Pawn) -> set:
-        """Returns a set of all lasers in their match that are not owned by the given pawn."""
+    def compute_lasers(self, pawn: Pawn) -> list:
+        if self.laser_pool is not None:
+            return self.laser_pool.views(
+                self.laser_pool.enemy_slots(pawn.laser_owner))
 
-        opponents: set = self.get_opponents_for(pawn)
+        opponents: list = self.get_opponents_for(pawn)
         opponent: Pawn
-        lasers = set()
+        lasers = []
 
         for opponent in opponents:
-            lasers.update(opponent.get_lasers())
+            lasers.extend(opponent.get_lasers())
 
         return lasers
 
-    def get_alive_pawns(self):
-        return self.pawns.copy().difference(self.dead_pawns)
+    def get_alive_pawns(self) -> list:
+        """Returns the living pawns. The list is shared until a pawn dies, so it MUST NOT be modified."""
+        if self.alive_pawns is not None:
+            self.count_query(ALIVE_QUERY, True)
+            return self.alive_pawns
 
-    def get_opponents_for(self, pawn: Pawn) -> set:
-        """Returns all ALIVE pawns that are not the given one."""
+        self.count_query(ALIVE_QUERY, False)
+        self.alive_pawns = [
+            pawn for pawn in self.pawns if pawn not in self.dead_pawns]
+        return self.alive_pawns
 
-        # Remove implicitly raises an exception if pawn is not contained.
-        alive = self.get_alive_pawns()
-        alive.remove(pawn)
-        return alive
+    def get_opponents_for(self, pawn: Pawn) -> list:
+        """Returns all ALIVE pawns that are not the given one (shared, so it MUST NOT be modified)."""
+        opponents = self.opponents.get(pawn)
 
-    def draw(self, draw_dead=False, draw_tracers=False):
-        """Draws all pawns & lasers contained in this matchup."""
+        if opponents is not None:
+            self.count_query(OPPONENTS_QUERY, True)
+            return opponents
 
-        pawn_set = self.get_alive_pawns() if not draw_dead else self.pawns
-        pawn: Pawn
+        self.count_query(OPPONENTS_QUERY, False)
 
-        player_pawn: Pawn = None
-        imminent_laser: Laser = None
+        # Remove implicitly raises an exception if pawn is not contained.
+        opponents = list(self.get_alive_pawns())
+        opponents.remove(pawn)
 
-        if DEBUG:
-            for pawn in pawn_set:
-                if issubclass(type(pawn.controller), PlayerController):
-                    player_pawn = pawn
-                    imminent_laser = self.get_most_imminent_laser(player_pawn)
+        self.opponents[pawn] = opponents
+        return opponents
 
-        # Draw all lasers first
-        for pawn in pawn_set:
-            pawn.draw_lasers(imminent_laser)
+    def update(self, delta_time, update_dead=False, decide=True, profiler: FrameProfiler = None) -> list:
+        """
+        Updates all pawns & lasers contained in this matchup.
 
-        # Then draw all pawn bodies
-        for pawn in pawn_set:
-            pawn.draw(draw_tracers=draw_tracers)
+        Args:
+            decide (bool): If False, controllers are not run. The pawns due a decision
+                are returned instead, so they can be decided in a batch.
+            profiler (FrameProfiler): If given, every phase of the update is timed.
+        """
+        if profiler is not None:
+            return self.profiled_update(delta_time, profiler, update_dead, decide)
 
-        # This way, pawn bodies will always overlay lasers.
+        deciding = []
 
-    def update(self, delta_time, update_dead=False):
-        """Updates all pawns & lasers contained in this matchup."""
         if not self.is_still_going():
-            return
+            return deciding
 
         self.frames += 1
+        self.motion = 0
         pawn_set = self.get_alive_pawns() if not update_dead else self.pawns
         pawn: Pawn
         controller: Controller
 
+        hashed = self.pawn_hash is not None
+        if hashed:
+            self.refresh_spatial_hash()
+
         for pawn in pawn_set:
             # Returns false if pawn is KIA
+            self.motion += 1
             if not pawn.update(self, delta_time):
                 self.kill(pawn)
                 break
 
+            self.motion += 1
+            pawn.update_lasers(self, delta_time)
+
+            if pawn.controller.is_deciding(self.frames):
+                if decide:
+                    controller = pawn.controller
+
+                    controller.look(self)
+                    controller.think()
+                    controller.act()
+                else:
+                    deciding.append(pawn)
+
+            if hashed:
+                self.hash_pawn(pawn)
+
+        return deciding
+
+    def profiled_update(self, delta_time, profiler: FrameProfiler, update_dead=False, decide=True) -> list:
+        """Same as 'update', but times movement, collisions, lasers, look, think & act separately."""
+        deciding = []
+
+        if not self.is_still_going():
+            return deciding
+
+        self.frames += 1
+        self.motion = 0
+        pawn_set = self.get_alive_pawns() if not update_dead else self.pawns
+        pawn: Pawn
+        controller: Controller
+
+        hashed = self.pawn_hash is not None
+        if hashed:
+            self.refresh_spatial_hash()
+
+        for pawn in pawn_set:
+            self.motion += 1
+            if not pawn.is_dead:
+                start = profiler.start()
+                pawn.move(delta_time)
+                profiler.stop(MOVEMENT, start)
+
+                start = profiler.start()
+                alive = pawn.update_collisions(self)
+                profiler.stop(COLLISION, start)
+
+                if not alive:
+                    self.kill(pawn)
+                    break
+
+            self.motion += 1
+            start = profiler.start()
             pawn.update_lasers(self, delta_time)
+            profiler.stop(LASERS, start)
+
+            if pawn.controller.is_deciding(self.frames):
+                if decide:
+                    controller = pawn.controller
+
+                    start = profiler.start()
+                    controller.look(self)
+                    profiler.stop(LOOK, start)
+
+                    start = profiler.start()
+                    controller.think()
+                    profiler.stop(THINK, start)
+
+                    start = profiler.start()
+                    controller.act()
+                    profiler.stop(ACT, start)
+                else:
+                    deciding.append(pawn)
+
+            if hashed:
+                self.hash_pawn(pawn)
+
+        return deciding
+
+    # ----------------------------------------
+    #              Pooled Lasers
+    # ----------------------------------------
+
+    def resolve_pooled_hits(pairs: list):
+        """
+        Finds the pooled lasers hitting any of the given (match up, pawn) pairs in one pass over
+        their laser pool, then applies the hits in pair order (killing pawns like 'update').
+        """
+        pairs = [(match_up, pawn) for match_up, pawn in pairs if not pawn.is_dead]
+        if not pairs:
+            return
+
+        pool: LaserPool = pairs[0][1].laser_pool
+        owners = np.array([pawn.laser_owner for _, pawn in pairs], dtype=np.int64)
+        pos = np.array([pawn.pos for _, pawn in pairs], dtype=float)
+        targets, slots = pool.find_hits(owners, pos, BODY_RADIUS_SQUARED)
+
+        match_up: MatchUp
+        pawn: Pawn
+        for i, slot in zip(targets.tolist(), slots.tolist()):
+            match_up, pawn = pairs[i]
+
+            # Pawns killed by an earlier hit (& lasers killed by one, or by their match up ending) no longer collide.
+            if pawn.is_dead or not pool.alive[slot]:
+                continue
+
+            if not pawn.take_pooled_hit(slot):
+                match_up.kill(pawn)
+
+    def cache_imminent_lasers(pairs: list):
+        """
+        Answers 'get_most_imminent_laser' for every given (match up, pawn) pair in one pass over
+        their laser pool. The answers are kept in each match up's query cache.
+        """
+        pairs = [(match_up, pawn) for match_up, pawn in pairs if match_up.laser_pool is not None]
+        if not pairs:
+            return
+
+        pool: LaserPool = pairs[0][0].laser_pool
+        owners = np.array([pawn.laser_owner for _, pawn in pairs], dtype=np.int64)
+        C = np.array([pawn.get_pos() for _, pawn in pairs], dtype=float)
+        slots = pool.most_imminent_slots(owners, C, BODY_RADIUS)
+        found = slots[slots >= 0]
+        views = dict(zip(found.tolist(), pool.views(found)))
+
+        match_up: MatchUp
+        pawn: Pawn
+        for (match_up, pawn), slot in zip(pairs, slots.tolist()):
+            match_up.count_query(IMMINENT_QUERY, False)
+            match_up.imminent_lasers[pawn] = (
+                match_up.get_motion_stamp(),
+                match_up.get_laser_key(pawn),
+                views.get(slot)
+            )
+
+    def decide_pawns(pairs: list, profiler: FrameProfiler = None):
+        """
+        Runs look, think & act for every given (match up, pawn) pair, as if in order.
+
+        Match ups don't affect each other, so the pairs are decided in rounds holding at most one
+        pawn of every match up. Every pawn of a round looks, then the controllers of each class
+        prepare their thinking at once (e.g. one ThreatMap for every DynamicController), think & act.
+        Pawns of the same match up still decide one after the other.
+        """
+        for decision_round in MatchUp.get_decision_rounds(pairs):
+            MatchUp.decide_round(decision_round, profiler)
+
+    def get_decision_rounds(pairs: list) -> list:
+        """Splits (match up, pawn) pairs into rounds, the i'th round holding the i'th pawn of each match up."""
+        rounds = []
+        counts = dict()
+
+        for pair in pairs:
+            i = counts.get(pair[0], 0)
+            counts[pair[0]] = i + 1
+
+            if i == len(rounds):
+                rounds.append([])
+
+            rounds[i].append(pair)
+
+        return rounds
+
+    def decide_round(pairs: list, profiler: FrameProfiler = None):
+        """Decides (match up, pawn) pairs of different match ups: all of them look, then think, then act."""
+        controller: Controller
+
+        if profiler is not None:
+            start = profiler.start()
+
+        classes = dict()
+        for match_up, pawn in pairs:
+            controller = pawn.controller
+            controller.look(match_up)
+            classes.setdefault(type(controller), []).append(controller)
+
+        if profiler is not None:
+            profiler.stop(LOOK, start)
+            start = profiler.start()
+
+        for controller_class, controllers in classes.items():
+            controller_class.prepare_thinking(controllers)
 
-            # For now, look, think, and act every frame.
+        for _, pawn in pairs:
+            pawn.controller.think()
 
-            if self.frames % FRAMES_BETWEEN_DECISIONS == 0:
-                controller = pawn.controller
+        if profiler is not None:
+            profiler.stop(THINK, start)
+            start = profiler.start()
 
-                controller.look(self)
-                controller.think()
-                controller.act()
+        for _, pawn in pairs:
+            pawn.controller.act()
+
+        if profiler is not None:
+            profiler.stop(ACT, start)
+
+    # ----------------------------------------
+    #              Spatial Hash
+    # ----------------------------------------
+
+    def refresh_spatial_hash(self):
+        """Rebuilds the spatial hashes, unless they are already up to date for the current frame."""
+        if self.hashed_frame == self.frames:
+            return
+
+        self.hashed_frame = self.frames
+        self.pawn_hash.clear()
+        self.laser_hash.clear()
+        self.hashed_lasers.clear()
+
+        for pawn in self.pawns:
+            if not pawn.is_dead and pawn not in self.dead_pawns:
+                self.hash_pawn(pawn)
+
+    def hash_pawn(self, pawn: Pawn):
+        """Moves the pawn & its lasers to their current cells (removing expired lasers)."""
+        if pawn.is_dead or pawn in self.dead_pawns:
+            return
+
+        self.pawn_hash.insert(pawn, pawn.get_pos(), self.pawn_order[pawn])
+
+        if self.laser_pool is not None:
+            return
+
+        lasers = pawn.get_lasers()
+        hashed = self.hashed_lasers.setdefault(pawn, dict())
+        laser_hash = self.laser_hash
+        laser: Laser
+
+        for laser in [laser for laser in hashed if laser not in lasers]:
+            laser_hash.remove(laser)
+            del hashed[laser]
+
+        for laser in lasers:
+            if laser in hashed:
+                laser_hash.move(laser, laser.pos)
+            else:
+                self.laser_count += 1
+                laser_hash.insert(laser, laser.pos, (
+                    self.pawn_order[pawn], self.laser_count))
+                hashed[laser] = None
+
+    def unhash_pawn(self, pawn: Pawn):
+        """Removes the (dead) pawn & its lasers from the spatial hashes."""
+        self.pawn_hash.remove(pawn)
+
+        for laser in self.hashed_lasers.pop(pawn, ()):
+            self.laser_hash.remove(laser)
+
+    def get_hashed_lasers_near(self, pawn: Pawn, radius_squared: float) -> list:
+        """Returns every enemy laser that may be within the radius, in the order of 'get_lasers'."""
+        self.refresh_spatial_hash()
+        return [laser for laser in self.laser_hash.query(pawn.get_pos(), radius_squared)
+                if laser.firing_actor is not pawn]
+
+    def get_laser_candidates(self, pawn: Pawn, radius_squared: float) -> list:
+        """
+        Returns the enemy lasers that may be within the (donut-compensated) radius of the pawn.
+        Every enemy laser, unless this match up has a spatial hash.
+        """
+        if self.laser_hash is not None and self.laser_pool is None:
+            return self.get_hashed_lasers_near(pawn, radius_squared)
+
+        return self.get_lasers(pawn)
+
+    def find_best_pawn(self):
+        """Rescans the living pawns for the best one (only needed once the best one died or lost fitness)."""
+        alive = self.get_alive_pawns()
+        self.best_pawn = max(
+            alive, key=lambda p: p.calculate_fitness()) if alive else None
+        self.best_fitness = self.best_pawn.calculate_fitness() if alive else -1
+
+    def on_fitness_changed(self, pawn: Pawn):
+        """Called by a pawn of this match up whenever its fitness changes."""
+        if pawn.is_dead or pawn in self.dead_pawns:
+            return
+
+        fitness = pawn.calculate_fitness()
+
+        if pawn is self.best_pawn:
+            if fitness < self.best_fitness:
+                self.find_best_pawn()
+            else:
+                self.best_fitness = fitness
+
+        elif self.best_pawn is None or fitness > self.best_fitness:
+            self.best_pawn = pawn
+            self.best_fitness = fitness
+
+        self.notify_fitness_listener()
+
+    def notify_fitness_listener(self):
+        if self.fitness_listener is not None:
+            self.fitness_listener.on_fitness_changed(self, self.get_best_fitness())
+
+    def get_best_fitness(self) -> float:
+        """Fitness of the best living pawn (-1 if this match up is over)."""
+        return self.best_fitness if self.is_still_going() else -1
 
     def get_best_pawn_based_on_fitness(self, include_dead=False):
-        if not self.is_still_going() and not include_dead:
+        if include_dead:
+            return max(self.pawns, key=lambda p: p.calculate_fitness())
+
+        if not self.is_still_going():
             return None
 
-        pawn_set = self.get_alive_pawns() if not include_dead else self.pawns
-        return max(pawn_set, key=lambda p: p.calculate_fitness())
+        return self.best_pawn
 
     def get_closest_opponent(self, pawn: Pawn) -> Pawn:
+        """Returns the closest living opponent (computed once until anything moves or dies)."""
+        stamp = self.get_motion_stamp()
+        cached = self.closest_opponents.get(pawn)
+
+        if cached is not None and cached[0] == stamp:
+            self.count_query(CLOSEST_QUERY, True)
+            return cached[1]
+
+        self.count_query(CLOSEST_QUERY, False)
+        closest = self.compute_closest_opponent(pawn)
+        self.closest_opponents[pawn] = (stamp, closest)
+        return closest
+
+    def compute_closest_opponent(self, pawn: Pawn) -> Pawn:
+        if self.pawn_hash is not None:
+            return self.get_hashed_closest_opponent(pawn)
+
         opponents = self.get_opponents_for(pawn)
         opponent: Pawn
 
+        if len(opponents) == 1:
+            return opponents[0]
+
         closest = None
         closest_dist = float('inf')
 
@@ -122,7 +630,95 @@ class MatchUp:
 
         return closest
 
+    def get_hashed_closest_opponent(self, pawn: Pawn) -> Pawn:
+        """Same as 'get_closest_opponent', but only searches the cells around the pawn (doubling the radius until found)."""
+        self.refresh_spatial_hash()
+
+        pawn_hash = self.pawn_hash
+        radius = pawn_hash.cell_size
+
+        while True:
+            radius_squared = radius * radius
+            closest = None
+            closest_dist = float('inf')
+
+            opponent: Pawn
+            for opponent in pawn_hash.query(pawn.get_pos(), radius_squared):
+                if opponent is pawn:
+                    continue
+
+                dist = pawn.dist_squared(actor=opponent)
+                if closest_dist > dist:
+                    closest_dist = dist
+                    closest = opponent
+
+            # Anything closer would have been within the radius.
+            if closest_dist <= radius_squared or radius_squared >= pawn_hash.max_dist_squared:
+                return closest
+
+            radius *= 2
+
+    def get_hashed_most_imminent_laser(self, pawn: Pawn) -> Laser:
+        """
+        Same as 'get_most_imminent_laser', but visits the laser cells closest first.
+        The distances of 'Laser.get_dist_if_in_path' are measured from the laser heads to
+        (C[0], C[0]), so no laser in a cell further away than the closest found can beat it.
+        """
+        self.refresh_spatial_hash()
+
+        C = pawn.get_pos()
+        keys = self.laser_hash.keys
+
+        imminent: Laser = None
+        min_dist = float('inf')
+        laser: Laser
+
+        for lasers, cell_dist in self.laser_hash.cells_by_distance((C[0], C[0]), LENGTH):
+            if cell_dist > min_dist:
+                break
+
+            for laser in lasers:
+                if laser.firing_actor is pawn:
+                    continue
+
+                dist = laser.get_dist_if_in_path(C, BODY_RADIUS)
+
+                # Ties go to the laser the linear scan would have visited first.
+                if dist > 0 and (dist < min_dist or (
+                        dist == min_dist and keys[laser] < keys[imminent])):
+                    imminent = laser
+                    min_dist = dist
+
+        return imminent
+
     def get_most_imminent_laser(self, pawn: Pawn) -> Laser:
+        """
+        Returns the closest enemy laser heading towards the pawn (computed once until anything
+        moves, dies or the enemy lasers change).
+        """
+
+        stamp = self.get_motion_stamp()
+        key = self.get_laser_key(pawn)
+        cached = self.imminent_lasers.get(pawn)
+
+        if cached is not None and cached[0] == stamp and cached[1] == key:
+            self.count_query(IMMINENT_QUERY, True)
+            return cached[2]
+
+        self.count_query(IMMINENT_QUERY, False)
+        imminent = self.compute_most_imminent_laser(pawn)
+        self.imminent_lasers[pawn] = (stamp, key, imminent)
+        return imminent
+
+    def compute_most_imminent_laser(self, pawn: Pawn) -> Laser:
+        if self.laser_pool is not None:
+            slot = self.laser_pool.most_imminent_slot(
+                pawn.laser_owner, pawn.get_pos(), BODY_RADIUS)
+            return self.laser_pool.view(slot) if slot >= 0 else None
+
+        if self.laser_hash is not None:
+            return self.get_hashed_most_imminent_laser(pawn)
+
         lasers = self.get_lasers(pawn)
         laser: Laser
 
@@ -154,12 +750,16 @@ class MatchUp:
 
     def reset(self):
         self.dead_pawns.clear()
+        self.stopped = False
 
         pawn: Pawn
         for pawn in self.pawns:
             pawn.reset()
 
         self.frames = 0
+        self.hashed_frame = -1
+        self.invalidate_queries()
+        self.find_best_pawn()
 
     def on_key_press(self, symbol):
         pawn: Pawn
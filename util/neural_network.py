@@ -1,24 +1,13 @@
 import numpy as np
 import math
 import random
-import arcade
 from enum import Enum
 from typing import List, Tuple
 from environments.environment import *
 from actors.actions import Actions
 
-NEURON_DIST = 50
-VERBOSE_NEURON_SPACING_X = 60
-VERBOSE_NEURON_SPACING_Y = 18
-VERBOSE_NEURON_RADIUS = 8
-VERBOSE_NEURON_TEXT_SIZE = 5
-VERBOSE_MAX_SYNAPSE_THICKNESS = 2
-NETWORK_CENTER_HEIGHT = SCREEN_HEIGHT / 4
-
 REACTION_THRESHOLD = 0.7
 
-DRAW_NEURON_LABELS = True
-
 # Reason for redefinition: __dict__ is not constant ordering
 ACTION_LIST = [
     Actions.MOVE_LEFT,
@@ -66,23 +55,38 @@ class NeuralNetwork:
 
     output_neuron_labels = [a.name for a in ACTION_LIST]
 
-    layer_weights: list
+    layer_weights: list  # Views into 'genome'
+    genome: np.ndarray = None  # Every weight, stored contiguously
+    layer_shapes: List[Tuple[int, int]] = None
+    buffers: list = None  # Preallocated work buffers for 'output'
+
+    # Activations are copied into 'neuron_weights' only when set (for drawing).
+    capture_activations: bool = False
     neuron_weights: list = None  # Stored here for verbose
-    neuron_screen_locations: list = None
 
     def __init__(
         self,
         dimensions: Tuple[int] = None,
-        layer_weights: list = None
+        layer_weights: list = None,
+        genome: np.ndarray = None,
+        layer_shapes: List[Tuple[int, int]] = None
     ):
         """
         Randomly initialize a Neural Network with the given dimensions.
 
         len(dimensions) = layer count.
         dimensions[i] = neurons at layer i.
+
+        A flat genome & its layer shapes may be given instead, in which case
+        the network uses the genome in place (without copying it).
         """
 
-        assert dimensions != None or layer_weights != None, 'Neural Network must be initialized with either dimensions or weights'
+        assert dimensions is not None or layer_weights is not None or genome is not None, \
+            'Neural Network must be initialized with either dimensions, weights or a genome'
+
+        if genome is not None:
+            self.set_genome(genome, layer_shapes)
+            return
 
         # if dimensions != None:
         # assert len(self.input_neuron_labels) == dimensions[0] + 1, \
@@ -124,9 +128,38 @@ class NeuralNetwork:
                 self.layer_weights.append(
                     layer
                 )
+
+            self.flatten()
             return
 
         self.layer_weights = list(layer_weights)
+        self.flatten()
+
+    def flatten(self):
+        """Copies the current layers into one contiguous genome & makes them views into it."""
+        shapes = [np.shape(layer) for layer in self.layer_weights]
+        genome = np.empty(sum(rows * cols for rows, cols in shapes))
+
+        start = 0
+        for layer, (rows, cols) in zip(self.layer_weights, shapes):
+            genome[start:start + rows * cols] = np.ravel(layer)
+            start += rows * cols
+
+        self.set_genome(genome, shapes)
+
+    def set_genome(self, genome: np.ndarray, layer_shapes: List[Tuple[int, int]]):
+        """Uses the given flat genome as this network's weights, with one view per layer."""
+        self.genome = genome
+        self.layer_shapes = [tuple(shape) for shape in layer_shapes]
+        self.layer_weights = []
+
+        start = 0
+        for rows, cols in self.layer_shapes:
+            self.layer_weights.append(
+                genome[start:start + rows * cols].reshape(rows, cols))
+            start += rows * cols
+
+        assert start == genome.size, 'Genome size MUST match the layer shapes.'
 
     def sigmoid(x, derivative=False):
         return x*(1-x) if derivative else 1/(1+np.exp(-x))
@@ -146,129 +179,56 @@ class NeuralNetwork:
             elif ACTIVATION == ActivationType.TANH:
                 x[...] = np.tanh(x)
 
-    def output(self, X):
-        # Z = np.copy(X)
-
-        # if return_all:
-        #     Zs = []
-
-        # for i in range(len(self.W) - 1):
-        #     Z = self.activation(Z.dot(self.W[i]) + self.B[i])
+    def activate_batch(Z: np.ndarray):
+        """Vectorized, in place version of 'activate_layer' for arrays of any shape."""
+        if ACTIVATION == ActivationType.RELU:
+            np.maximum(Z, 0, out=Z)
+        elif ACTIVATION == ActivationType.SIGMOID:
+            np.negative(Z, out=Z)
+            np.exp(Z, out=Z)
+            Z += 1
+            np.reciprocal(Z, out=Z)
+        elif ACTIVATION == ActivationType.TANH:
+            np.tanh(Z, out=Z)
+
+    def init_buffers(self):
+        """Preallocates the per layer work buffers used by 'output'."""
+        self.buffers = [np.empty(self.layer_weights[0].shape[1])]
+
+        for weight_layer in self.layer_weights:
+            self.buffers.append(np.empty(weight_layer.shape[0]))
 
-        #     if return_all:
-        #         Zs.append(np.copy(Z))
-
-        # Z = ClassificationNeuralNetwork.softmax(Z.dot(self.W[-1]) + self.B[-1])
-
-        # if return_all:
-        #     return Zs + [Z]
-
-        # return Z
-
-        X.append(1)
-        Z = np.array(X)
-
-        self.neuron_weights = []
-        self.neuron_weights.append(np.copy(Z))
-
-        for weight_layer in self.layer_weights[:-1]:
-            Z = weight_layer.dot(Z)
-            NeuralNetwork.activate_layer(Z)
-            self.neuron_weights.append(np.copy(Z))
-
-        Z = self.layer_weights[-1].dot(Z)
-        self.neuron_weights.append(np.copy(Z))
+    def output(self, X):
+        """
+        Feeds the inputs X (without bias) forward through the network.
 
-        return Z
+        Hidden layers are computed in preallocated buffers & only the output
+        layer is copied out. Activations are only copied into 'neuron_weights'
+        if 'capture_activations' is set.
+        """
 
-    def draw_neurons(self, offset_x=-70, offset_y=0):
-        if self.neuron_weights == None:
-            return
+        if self.buffers is None or len(self.buffers) != len(self.layer_weights) + 1:
+            self.init_buffers()
 
-        x = SCREEN_WIDTH - len(self.neuron_weights) * \
-            VERBOSE_NEURON_SPACING_X + offset_x
-
-        self.neuron_screen_locations = []
-
-        for i, layer in enumerate(self.neuron_weights):
-            y = NETWORK_CENTER_HEIGHT - \
-                ((len(layer) / 2) * VERBOSE_NEURON_SPACING_Y) + offset_y
-
-            self.neuron_screen_locations.append([])
-
-            # All weights will be normalized. Use radial representation.
-            for j, weight in enumerate(np.nditer(layer, op_flags=['readwrite'])):
-                if DRAW_NEURON_LABELS:
-                    if i == 0:  # input layer
-                        text = self.input_neuron_labels[j]
-                        arcade.draw_text(
-                            text,
-                            x-VERBOSE_NEURON_RADIUS * 2.5 -
-                            len(text) * (VERBOSE_NEURON_TEXT_SIZE/2.5),
-                            y,
-                            arcade.color.WHITE,
-                            font_size=VERBOSE_NEURON_TEXT_SIZE*1.5,
-                            align='center',
-                            anchor_x='center',
-                            anchor_y='center'
-                        )
-                    elif i == len(self.neuron_weights) - 1:  # output layer
-                        text = self.output_neuron_labels[j]
-                        arcade.draw_text(
-                            text,
-                            x+VERBOSE_NEURON_RADIUS * 2.5,
-                            y,
-                            arcade.color.WHITE,
-                            font_size=VERBOSE_NEURON_TEXT_SIZE*1.5,
-                            anchor_y='center'
-                        )
-
-                self.neuron_screen_locations[i].append((x, y))
-
-                arcade.draw_circle_filled(
-                    x,
-                    y,
-                    VERBOSE_NEURON_RADIUS,
-                    arcade.color.WHITE if i < len(
-                        self.neuron_weights)-1 or weight < REACTION_THRESHOLD else arcade.color.GREEN
-                )
+        Z = self.buffers[0]
+        Z[:-1] = X
+        Z[-1] = 1  # bias
 
-                arcade.draw_text(
-                    '%.1f' % weight, x, y,
-                    arcade.color.BLACK,
-                    font_size=VERBOSE_NEURON_TEXT_SIZE,
-                    align='center',
-                    anchor_x='center',
-                    anchor_y='center')
+        last = len(self.layer_weights) - 1
+        for i, weight_layer in enumerate(self.layer_weights):
+            out = self.buffers[i + 1]
+            np.dot(weight_layer, Z, out=out)
 
-                y += VERBOSE_NEURON_SPACING_Y
+            # Don't activate the output layer.
+            if i < last:
+                NeuralNetwork.activate_batch(out)
 
-            x += VERBOSE_NEURON_SPACING_X
+            Z = out
 
-    def draw_weights(self):
-        if self.neuron_screen_locations == None:
-            return
+        if self.capture_activations:
+            self.neuron_weights = [np.copy(b) for b in self.buffers]
 
-        for i, layer_weight_set in enumerate(self.layer_weights):
-            layer_weight_set = layer_weight_set.T
-            layer1_neuron_locations = self.neuron_screen_locations[i]
-            layer2_neuron_locations = self.neuron_screen_locations[i+1]
-
-            for j, weight_layer in enumerate(layer_weight_set):
-                neuron1 = layer1_neuron_locations[j]
-
-                for k, weight in enumerate(layer_weight_set[j]):
-                    neuron2 = layer2_neuron_locations[k]
-
-                    arcade.draw_line(
-                        neuron1[0],
-                        neuron1[1],
-                        neuron2[0],
-                        neuron2[1],
-                        arcade.color.WHITE,
-                        border_width=max(
-                            0.1, VERBOSE_MAX_SYNAPSE_THICKNESS * weight)
-                    )
+        return Z.copy()
 
     def save_to_file(self, path: str):
         """
@@ -276,10 +236,15 @@ class NeuralNetwork:
             path (str): Extension not required. (.npy)
         """
 
-        np.save(path, self.layer_weights)
+        # Layers have different shapes, so they are stored as an object array.
+        layers = np.empty(len(self.layer_weights), dtype=object)
+        for i, layer in enumerate(self.layer_weights):
+            layers[i] = layer
+
+        np.save(path, layers)
 
     def load_from_file(path: str):
-        return NeuralNetwork(layer_weights=np.load(path))
+        return NeuralNetwork(layer_weights=np.load(path, allow_pickle=True))
 
 
 if __name__ == '__main__':
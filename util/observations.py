@@ -0,0 +1,116 @@
+from controllers.creature_controller import *
+from util.geometry import *
+from typing import List, Tuple
+import numpy as np
+
+# Columns of the 'CreatureController.look' inputs.
+SELF_STATS = slice(0, STAT_INPUTS)
+ENEMY_MOVEMENT_SPEED = 7
+LASER_DISTANCE = 8
+LASER_ANGLE = 9
+LASER_SPEED = 10
+ENEMY_DISTANCE = 11
+ENEMY_ANGLE = 12
+CURRENT_ANGLE = 13
+BIAS = INPUT_NODES
+
+
+class ObservationBuilder:
+    """
+    Builds the 'CreatureController.look' inputs of many creatures at once.
+
+    Observations are written into a preallocated (creatures, INPUT_NODES + 1) array whose last
+    column is the network bias, so they can be fed straight into a BatchedInference. Only the
+    match up queries (imminent laser & closest opponent) remain per creature, every distance &
+    angle is computed by the geometry kernels in one pass (matching 'look' exactly).
+    """
+
+    observations: np.ndarray = None
+
+    def __init__(self, capacity: int = 64):
+        self.observations = np.empty((0, INPUT_NODES + 1))
+        self.reserve(capacity)
+
+    def reserve(self, n: int) -> np.ndarray:
+        """Returns a view of the first n rows, growing the array if needed."""
+        if n > len(self.observations):
+            capacity = max(n, 2 * len(self.observations))
+            self.observations = np.empty((capacity, INPUT_NODES + 1))
+            self.observations[:, BIAS] = 1
+
+        return self.observations[:n]
+
+    def build(self, pairs: List[Tuple[MatchUp, CreatureController]]) -> np.ndarray:
+        """
+        Args:
+            pairs: (match up, controller) of every creature to observe.
+
+        Returns:
+            (len(pairs), INPUT_NODES + 1) view of the observations (valid until the next 'build').
+        """
+
+        n = len(pairs)
+        X = self.reserve(n)
+
+        if n == 0:
+            return X
+
+        stat_rows = []
+        pos = []
+        direc = []
+
+        # Missing targets default to the pawn itself, & are masked out below.
+        laser_pos = []
+        laser_speed = []
+        enemy_pos = []
+        enemy_speed = []
+
+        for match_up, controller in pairs:
+            p: Pawn = controller.pawn
+
+            imminent: Laser = match_up.get_most_imminent_laser(p)
+            enemy: Pawn = match_up.get_closest_opponent(p)
+
+            stat_rows.append(get_stat_inputs(p.stat_bias))
+            pos.append(p.pos)
+            direc.append(p.get_direc())
+
+            if imminent is not None:
+                laser_pos.append(imminent.pos)
+                laser_speed.append(imminent.speed)
+            else:
+                laser_pos.append(p.pos)
+                laser_speed.append(None)
+
+            if enemy is not None:
+                enemy_pos.append(enemy.pos)
+                enemy_speed.append(enemy.stat_bias.movement_speed)
+            else:
+                enemy_pos.append(p.pos)
+                enemy_speed.append(None)
+
+        pos = np.array(pos, dtype=float)
+        laser_pos = np.array(laser_pos, dtype=float)
+        enemy_pos = np.array(enemy_pos, dtype=float)
+        has_laser = np.array([speed is not None for speed in laser_speed])
+        has_enemy = np.array([speed is not None for speed in enemy_speed])
+        laser_speed = np.array([speed or 0 for speed in laser_speed], dtype=float)
+        enemy_speed = np.array([speed or 0 for speed in enemy_speed], dtype=float)
+
+        X[:, SELF_STATS] = stat_rows
+        X[:, ENEMY_MOVEMENT_SPEED] = enemy_speed / MAX_DIST
+
+        X[:, LASER_DISTANCE] = np.where(
+            has_laser, donut_dist_squared(pos, laser_pos) / MAX_DIST, 1)
+        X[:, LASER_ANGLE] = np.where(
+            has_laser, angles_to(pos, laser_pos) / MAX_ANGLE, 1)
+        X[:, LASER_SPEED] = laser_speed / MAX_DIST
+
+        X[:, ENEMY_DISTANCE] = np.where(
+            has_enemy, donut_dist_squared(pos, enemy_pos) / MAX_DIST, 1)
+        X[:, ENEMY_ANGLE] = np.where(
+            has_enemy, angles_to(pos, enemy_pos) / MAX_ANGLE, 1)
+
+        X[:, CURRENT_ANGLE] = np.array(direc) / MAX_ANGLE
+
+        return X
@@ -0,0 +1,182 @@
+from environments.environment import *
+from util.population import *
+from typing import List
+import multiprocessing
+import os
+
+# Shards per worker process, so slow shards don't leave the other workers idle.
+SHARDS_PER_PROCESS = 4
+
+
+def build_pawn_spec(pawn: Pawn, populations: List[Population], opponent_factory: Callable):
+    """
+    Describes how to rebuild the given pawn inside a worker process.
+
+    Creatures are shipped as their controller class & genome, every other pawn
+    is rebuilt by the (picklable) opponent factory.
+    """
+
+    for population in populations:
+        net = population.get_network(pawn)
+
+        if net is not None:
+            return (type(pawn.controller), net.genome, net.layer_shapes)
+
+    return (opponent_factory,)
+
+
+def build_pawn(spec) -> Pawn:
+    """Inverse of 'build_pawn_spec'."""
+    if len(spec) == 1:
+        return spec[0]()
+
+    controller_class, genome, layer_shapes = spec
+    pawn = FitnessPawn()
+    pawn.set_controller(
+        controller_class(
+            pawn,
+            EvoNeuralNetwork(genome=genome, layer_shapes=layer_shapes)
+        )
+    )
+
+    return pawn
+
+
+def get_decision_schedule(pawn: Pawn) -> tuple:
+    return pawn.controller.decision_interval, pawn.controller.decision_phase
+
+
+def get_results(pawn: Pawn):
+    """Returns whether the pawn died & its fitness counters (None if it isn't a FitnessPawn)."""
+    if not isinstance(pawn, FitnessPawn):
+        return pawn.is_dead, None
+
+    return pawn.is_dead, (pawn.total_hits, pawn.total_attacks, pawn.total_hits_taken)
+
+
+def apply_results(match_up: MatchUp, pawn: Pawn, results):
+    """Writes the results of 'get_results' from a worker onto the original pawn."""
+    is_dead, counters = results
+
+    if counters is not None:
+        pawn.total_hits, pawn.total_attacks, pawn.total_hits_taken = counters
+        pawn.update_fitness()
+
+    if is_dead and not pawn.is_dead:
+        pawn.kill()
+        match_up.dead_pawns.add(pawn)
+        match_up.invalidate_queries()
+
+
+def simulate_shard(shard: list, settings: dict):
+    """
+    Worker entry point. Simulates the given match up specs to completion (or the max game length).
+
+    Each match up spec is its seed (None if unseeded), the specs of its pawns & their decision schedules.
+
+    Returns:
+        The results of every pawn (in spec order) & the amount of frames simulated.
+    """
+
+    tracked = [[build_pawn(spec) for spec in pawn_specs] for _, pawn_specs, _ in shard]
+    match_ups = [MatchUp(*pawns) for pawns in tracked]
+
+    # Seeded match ups replay the exact same game as they would serially.
+    for match_up, (seed, _, schedules) in zip(match_ups, shard):
+        if seed is not None:
+            match_up.seed(seed)
+
+        for pawn, schedule in zip(match_up.pawns, schedules):
+            pawn.controller.set_decision_schedule(*schedule)
+
+    env = Environment(*match_ups, batched=settings['batched'])
+    env.batched_inference = settings['batched_inference']
+    env.pooled_lasers = settings['pooled_lasers']
+    env.max_game_length = settings['max_game_length']
+
+    while env.are_match_ups_still_going() and \
+            (env.max_game_length <= 0 or env.frame_count < env.max_game_length):
+        env.do_logic()
+
+    results = [[get_results(pawn) for pawn in pawns] for pawns in tracked]
+    return results, env.frame_count
+
+
+class ParallelEvaluator:
+    """
+    Simulates the match ups of a generation across a pool of worker processes.
+
+    Every match up is independent until natural selection, so they are shipped as
+    specs (genomes & opponent factories), simulated in shards & only the fitness
+    counters of each pawn are sent back & written onto the original pawns.
+    """
+
+    processes: int
+    pool = None
+
+    batched = False
+    batched_inference = False
+    pooled_lasers = False
+    max_game_length: int = 1500
+
+    def __init__(self, processes: int = None):
+        self.processes = processes if processes else os.cpu_count()
+
+    def get_pool(self):
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.processes)
+
+        return self.pool
+
+    def settings(self) -> dict:
+        return {
+            'batched': self.batched,
+            'batched_inference': self.batched_inference,
+            'pooled_lasers': self.pooled_lasers,
+            'max_game_length': self.max_game_length
+        }
+
+    def evaluate(self, match_ups, populations: List[Population], opponent_factory: Callable = None) -> int:
+        """
+        Simulates every match up & writes the resulting fitness counters onto their pawns.
+
+        Returns:
+            The largest amount of frames any shard simulated.
+        """
+
+        match_ups = list(match_ups)
+        pawns = [list(match_up.pawns) for match_up in match_ups]
+        specs = [
+            (match_up.seed_value,
+             [build_pawn_spec(pawn, populations, opponent_factory) for pawn in match_pawns],
+             [get_decision_schedule(pawn) for pawn in match_pawns])
+            for match_up, match_pawns in zip(match_ups, pawns)
+        ]
+
+        shard_size = max(
+            1, math.ceil(len(specs) / (self.processes * SHARDS_PER_PROCESS)))
+        shards = [specs[i:i + shard_size]
+                  for i in range(0, len(specs), shard_size)]
+
+        settings = self.settings()
+        results = self.get_pool().starmap(
+            simulate_shard, [(shard, settings) for shard in shards])
+
+        frames = 0
+        i = 0
+        for shard_results, shard_frames in results:
+            frames = max(frames, shard_frames)
+
+            for match_results in shard_results:
+                for pawn, pawn_results in zip(pawns[i], match_results):
+                    apply_results(match_ups[i], pawn, pawn_results)
+
+                i += 1
+
+        return frames
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
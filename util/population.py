@@ -3,6 +3,9 @@ from util.evolutionary_neural_network import *
 from controllers.creature_controller import *
 from actors.pawns.fitness_pawn import *
 from util.match_up import *
+from util.selection import *
+from util.checkpoint import *
+from util.generation_log import *
 
 import math
 import random
@@ -35,6 +38,15 @@ class Population:
     max_overall_fitness = 0
     generational_fitnesses = None
 
+    # Networks of the last evaluated generation, best first.
+    ranked_networks: List[EvoNeuralNetwork] = None
+
+    # How parents are picked (see SelectionEngine).
+    selection_strategy: str = ROULETTE
+
+    # If True, every generation is appended to the population's GenerationLog.
+    log_generations: bool = True
+
     def __init__(self, name: str, size: int = -1, networks: List[EvoNeuralNetwork] = None):
         assert size > 0 or networks != None, 'Populations MUST be initialized with either a size or networks.'
         assert name != None, 'Population MUST have a name.'
@@ -67,46 +79,34 @@ class Population:
     def get_network(self, creature: FitnessPawn):
         return self.creatures_to_nets.get(creature)
 
-    def best_network(self) -> EvoNeuralNetwork:
-        best = None
-        best_fit = float('-inf')
+    def get_fitnesses(self) -> np.ndarray:
+        """Snapshot of every creature's fitness, in network order."""
+        return np.array(
+            [c.calculate_fitness() for c in self.creatures_to_nets.keys()], dtype=float)
 
-        for pawn in self.creatures_to_nets.keys():
-            fit = pawn.calculate_fitness()
-            if fit > best_fit:
-                best_fit = fit
-                best = self.creatures_to_nets[pawn]
+    def build_selection_engine(self) -> SelectionEngine:
+        return SelectionEngine(self.get_fitnesses(), self.selection_strategy)
 
-        return best
+    def best_network(self) -> EvoNeuralNetwork:
+        nets = list(self.creatures_to_nets.values())
+        return nets[self.build_selection_engine().best()]
 
     def pick_random(self) -> EvoNeuralNetwork:
-        fitness_sum = 1
-
-        for pawn in self.creatures_to_nets.keys():
-            fitness_sum += pawn.calculate_fitness()
-
-        r = random.randrange(start=0, stop=math.floor(fitness_sum))
-        pawns = list(self.creatures_to_nets.keys())
-        np.random.shuffle(pawns)
-
-        for pawn in pawns:
-            r -= pawn.calculate_fitness()
-            if r <= 1:
-                return self.creatures_to_nets[pawn]
-
-        raise Exception('This shouldn\'t be possible..')
+        """Picks a single network according to the selection strategy."""
+        nets = list(self.creatures_to_nets.values())
+        return nets[self.build_selection_engine().sample(1)[0]]
 
     def size(self):
         return len(self.neural_networks)
 
     def build_match_ups(self, other_population: 'Population' = None):
         """Converts the current creature set into a set of MatchUps"""
-        match_ups: Set[MatchUp] = set()
+        match_ups: List[MatchUp] = []
         other_creatures = None if other_population is None else list(
             other_population.creatures_to_nets.keys())
 
         for i, creature_pawn in enumerate(self.creatures_to_nets.keys()):
-            match_ups.add(
+            match_ups.append(
                 MatchUp(
                     creature_pawn,
                     self.opponent_factory(
@@ -133,89 +133,177 @@ class Population:
             # Put back into dict.
             self.creatures_to_nets[new_creature] = neural_network
 
-    def natural_selection(self):
-        """Uses natural selection to alter the current Neural Network population."""
+    def natural_selection(self, frames: int = 0, wall_time: float = 0, saved_frames: int = 0):
+        """
+        Uses natural selection to alter the current Neural Network population.
 
-        gen_max = max(
-            [c.calculate_fitness() for c in self.creatures_to_nets.keys()]
-        )
+        Args:
+            frames (int): Frames the generation was simulated for (only logged).
+            wall_time (float): Seconds the generation was simulated for (only logged).
+            saved_frames (int): Match up frames cut short by racing (only logged).
+        """
+
+        engine = self.build_selection_engine()
+        fitnesses = engine.fitnesses
+        nets = list(self.creatures_to_nets.values())
+        gen_max = fitnesses.max()
+
+        self.ranked_networks = [nets[i] for i in engine.ranking()]
 
         # Log data
         self.max_overall_fitness = \
             max(self.max_overall_fitness, gen_max)
         self.generational_fitnesses.append(gen_max)
 
-        # Save best network unmutated AND get the best with mutations.
-        best = self.best_network()
-        new_nets = [
-            best.clone(),
-            best.clone().mutate()
-        ]
+        if self.log_generations:
+            self.log_generation(build_generation_record(
+                self.current_gen, fitnesses, self.count_alive(), wall_time, frames, saved_frames))
+
+        # Every genome as one row.
+        genomes = np.stack([net.genome for net in nets])
+        layer_shapes = nets[0].layer_shapes
 
         l = round(self.size() / 2) - 1
+        crossovers = math.ceil(l / 2)
+        clones = l - crossovers
+
+        parents = engine.sample(2 * crossovers + 2 * clones)
+        parentsA = parents[:crossovers]
+        parentsB = parents[crossovers:2 * crossovers]
+        clonesA = parents[2 * crossovers:2 * crossovers + clones]
+        clonesB = parents[2 * crossovers + clones:]
+
+        children1, children2 = crossover_genomes(
+            genomes[parentsA], genomes[parentsB])
+
+        # Offspring rows are laid out so all mutated rows are contiguous:
+        # best, mutated best, crossover children (mutated), mutated clones, clones.
+        best = genomes[engine.best()]
+        offspring = np.concatenate([
+            best[None, :],
+            best[None, :],
+            children1,
+            children2,
+            genomes[clonesB],
+            genomes[clonesA]
+        ])
+
+        mutate_genomes(offspring[1:2 + 2 * crossovers + clones])
+
+        # Networks use their row of the offspring matrix in place.
+        self.neural_networks = [
+            EvoNeuralNetwork(genome=genome, layer_shapes=layer_shapes)
+            for genome in offspring
+        ]
 
-        # For the rest, cross them over.
-        for i in range(l):
+    def immigrate(self, networks: List[EvoNeuralNetwork]):
+        """Replaces the last networks (the plain clones of natural selection) with the given ones."""
+        count = min(len(networks), self.size() - 1)
 
-            if i < l / 2:
-                parentA = self.pick_random()
-                parentB = self.pick_random()
-                children = parentA.crossover(parentB)
-                [child.mutate() for child in children]  # mutate all (2) children
-                new_nets.extend(children)
+        if count <= 0:
+            return
 
-            else:
-                cr = (
-                    self.pick_random().clone(),
-                    self.pick_random().clone()
-                )
+        self.neural_networks[-count:] = networks[:count]
+        self.generate_creatures()
+
+    def get_generation_log(self, path: str = None) -> GenerationLog:
+        return GenerationLog(os.path.join(
+            POPULATION_DIRECTORY, self.dir_name if path == None else path, HISTORY_DIRECTORY))
+
+    def get_history(self, column: str = 'max') -> np.ndarray:
+        """A column of the generation log (memory mapped), or the in memory max fitness history if there is no log."""
+        log = self.get_generation_log()
+
+        if self.log_generations and GenerationLog.exists(log.directory):
+            return log.read(column)
+
+        assert column == 'max', 'Only the max fitness history is kept without a generation log.'
+        return np.array(self.generational_fitnesses, dtype=float)
+
+    def log_generation(self, record: dict):
+        """Appends the record to the generation log (which is started with the known history, if new)."""
+        log = self.get_generation_log()
 
-                cr[1].mutate()
-                new_nets.extend(cr)
+        if not GenerationLog.exists(log.directory):
+            # Histories of checkpoints & legacy saves only kept the max fitness.
+            for generation, fitness in enumerate(self.generational_fitnesses[:-1]):
+                log.append({'generation': generation, 'max': fitness})
 
-        # assert self.size() == len(new_nets), \
-        #     'Inconsistent population size. Start: %i End: %i' % (
-        #         self.size(),
-        #         len(new_nets)
-        # )
+        log.append(record)
 
-        self.neural_networks = new_nets
+    def snapshot(self, path: str = None) -> CheckpointSnapshot:
+        """Read-only copy of the networks, metadata & fitness history, to be saved under the given name."""
+
+        # Logged histories are appended to the generation log instead (kept in the population's own directory).
+        logged = self.log_generations and path in (None, self.dir_name) and \
+            GenerationLog.exists(self.get_generation_log().directory)
+
+        return CheckpointSnapshot(
+            os.path.join(POPULATION_DIRECTORY,
+                         self.dir_name if path == None else path),
+            self.dir_name,
+            self.neural_networks,
+            {
+                'current_gen': self.current_gen,
+                'max_overall_fitness': float(self.max_overall_fitness)
+            },
+            [] if logged else self.generational_fitnesses
+        )
 
     def save_to_dir(self, path: str = None):
+        """Saves every network, the metadata & the fitness history to the population's checkpoint."""
         print('\nSaving Population \"%s\"...' % self.dir_name)
+        self.snapshot(path).write()
+        print('Success!')
 
-        if path == None:
-            path = os.path.join(POPULATION_DIRECTORY, self.dir_name)
-        else:
-            path = os.path.join(POPULATION_DIRECTORY, path)
+    def get_checkpoint_path(name: str) -> str:
+        return os.path.join(POPULATION_DIRECTORY, name, CHECKPOINT_FILE)
 
-        # Clean existing dir
-        if os.path.exists(path):
-            shutil.rmtree(path)
-        os.makedirs(path)
+    def open_checkpoint(name: str) -> PopulationCheckpoint:
+        """Returns the saved population's checkpoint (None if it was saved in the legacy format)."""
+        path = Population.get_checkpoint_path(name)
+        return PopulationCheckpoint(path) if os.path.isfile(path) else None
 
-        # Save all nets inside dir
-        for i, net in enumerate(self.neural_networks):
-            net.save_to_file('%s/%i' % (path, i))
+    def list_legacy_networks(path: str) -> List[str]:
+        """Returns the network files of a legacy population directory, in network order."""
+        files = [f for f in os.listdir(path) if f.endswith('.npy')
+                 and os.path.isfile(os.path.join(path, f))]
+        return [os.path.join(path, f) for f in sorted(files, key=lambda f: int(f[:-4]))]
 
-        if not os.path.isdir('%s/data' % path):
-            os.makedirs('%s/data' % path)
+    def count_saved_networks(name: str) -> int:
+        checkpoint = Population.open_checkpoint(name)
+        if checkpoint is not None:
+            return len(checkpoint)
 
-        # Save extra data
-        with open('%s/data/data.json' % path, 'w') as outfile:
-            json.dump({
-                'current_gen': self.current_gen,
-                'max_overall_fitness': self.max_overall_fitness
-            }, outfile)
+        return len(Population.list_legacy_networks(os.path.join(POPULATION_DIRECTORY, name)))
 
-        generational_fitnesses = np.array(self.generational_fitnesses)
-        np.save('%s/data/generational_fitnesses.npy' %
-                path, generational_fitnesses)
+    def load_network(name: str, i: int) -> EvoNeuralNetwork:
+        """Loads only the i'th network of a saved population."""
+        checkpoint = Population.open_checkpoint(name)
+        if checkpoint is not None:
+            return checkpoint.get_network(i)
 
-        print('Success!')
+        return EvoNeuralNetwork.load_from_file(
+            os.path.join(POPULATION_DIRECTORY, name, '%i.npy' % i))
+
+    def is_saved(name: str) -> bool:
+        """Whether the population was ever saved (directories of unsaved runs only hold their generation log)."""
+        path = os.path.join(POPULATION_DIRECTORY, name)
+        return Population.open_checkpoint(name) is not None or \
+            os.path.isfile(os.path.join(path, 'data/data.json'))
+
+    def has_history(name: str) -> bool:
+        """Whether the population (saved or not) has a fitness history to visualize."""
+        return Population.is_saved(name) or GenerationLog.exists(
+            os.path.join(POPULATION_DIRECTORY, name, HISTORY_DIRECTORY))
 
-    def list_all_saved():
-        """Returns a string describing all of the saved populations."""
+    def list_all_saved(include_history: bool = False):
+        """
+        Returns a string describing all of the saved populations.
+
+        Args:
+            include_history (bool): If True, unsaved populations with a generation log are listed too.
+        """
 
         population_names = os.listdir(POPULATION_DIRECTORY)
 
@@ -223,28 +311,41 @@ class Population:
         for pop_name in population_names:
             p = os.path.join(POPULATION_DIRECTORY, pop_name)
             if os.path.isdir(p):
-
-                with open(os.path.join(p, 'data/data.json')) as f:
-                    data: dict = json.load(f)
-
-                    out += '\"%s\": size: %s gens: %s\n' % (
-                        pop_name,
-                        len(os.listdir(p))-1,
-                        str(data.get('current_gen'))
-                    )
+                checkpoint = Population.open_checkpoint(pop_name)
+
+                if checkpoint is not None:
+                    size = len(checkpoint)
+                    data: dict = checkpoint.metadata
+                elif os.path.isfile(os.path.join(p, 'data/data.json')):
+                    size = len(Population.list_legacy_networks(p))
+                    with open(os.path.join(p, 'data/data.json')) as f:
+                        data: dict = json.load(f)
+                else:
+                    # Generations were logged, but the population was never saved.
+                    if include_history and Population.has_history(pop_name):
+                        out += '\"%s\": history only\n' % pop_name
+                    continue
+
+                out += '\"%s\": size: %s gens: %s\n' % (
+                    pop_name,
+                    size,
+                    str(data.get('current_gen'))
+                )
 
         out += '----------------------------\n'
         return out
 
     def is_valid_population_directory(path: str):
-        return os.path.exists(os.path.join(POPULATION_DIRECTORY, path))
+        """Whether the directory holds a saved (loadable) population."""
+        return os.path.isdir(os.path.join(POPULATION_DIRECTORY, path)) and Population.is_saved(path)
 
     def get_valid_populations():
+        """Names of every saved (loadable) population."""
         out = []
 
         if os.path.isdir(POPULATION_DIRECTORY):
             for f in os.listdir(POPULATION_DIRECTORY):
-                if os.path.isdir(os.path.join(POPULATION_DIRECTORY, f)):
+                if Population.is_valid_population_directory(f):
                     out.append(f)
 
         return out
@@ -257,32 +358,49 @@ class Population:
             raise Exception(
                 'Path given %s was not found while trying to load a population.' % path)
 
-        networks = []
+        if not Population.is_saved(name):
+            raise Exception(
+                'Population %s was never saved, only its generation history was logged.' % name)
 
-        for fname in os.listdir(path):
-            path_to_file = os.path.join(path, fname)
+        checkpoint = Population.open_checkpoint(name)
 
-            if os.path.isfile(path_to_file):
-                if path_to_file.endswith('.npy'):
-                    networks.append(
-                        EvoNeuralNetwork.load_from_file(path_to_file)
-                    )
+        if checkpoint is not None:
+            population = Population(
+                name=name, networks=checkpoint.get_networks())
+            j: dict = checkpoint.metadata
+        else:
+            networks = [EvoNeuralNetwork.load_from_file(f)
+                        for f in Population.list_legacy_networks(path)]
 
-        population = Population(name=name, networks=networks)
-        with open(os.path.join(path, 'data/data.json')) as f:
-            j: dict = json.load(f)
-            for key in j.keys():
+            population = Population(name=name, networks=networks)
+            with open(os.path.join(path, 'data/data.json')) as f:
+                j: dict = json.load(f)
+
+        for key in ('current_gen', 'max_overall_fitness'):
+            if key in j:
                 population.__dict__[key] = j[key]
 
+        # Generations logged after the checkpoint are simulated again.
+        log = population.get_generation_log()
+        if GenerationLog.exists(log.directory):
+            log.truncate_from(population.current_gen)
+            population.generational_fitnesses = population.load_generational_fitnesses()
+
         return population
 
     def load_generational_fitnesses(self, path: str = None):
         if path == None:
-            path = os.path.join(POPULATION_DIRECTORY, self.dir_name)
-        else:
-            path = os.path.join(POPULATION_DIRECTORY, path)
+            path = self.dir_name
+
+        log = self.get_generation_log(path)
+        if GenerationLog.exists(log.directory):
+            return log.read('max').tolist()
+
+        checkpoint = Population.open_checkpoint(path)
+        if checkpoint is not None:
+            return checkpoint.generational_fitnesses.tolist()
 
-        path = '%s/data/generational_fitnesses.npy' % path
+        path = os.path.join(POPULATION_DIRECTORY, path, 'data/generational_fitnesses.npy')
 
         if os.path.isfile(path):
             return np.load(path).tolist()
@@ -0,0 +1,93 @@
+from util.match_up import *
+from typing import List
+
+# Fractions of the max game length at which the running match ups are raced.
+DEFAULT_CHECKPOINTS = (0.25, 0.5, 0.75)
+
+# Fraction of the running match ups stopped at every checkpoint.
+DEFAULT_CUT_FRACTION = 0.5
+
+
+def get_race_fitness(match_up: MatchUp) -> float:
+    """Fitness a match up is ranked by: the best fitness of any of its pawns, dead or alive."""
+    return max(pawn.calculate_fitness() for pawn in match_up.pawns)
+
+
+class RacingScheduler:
+    """
+    Successive halving of a generation's simulation budget.
+
+    At every checkpoint (a fraction of the max game length), the running match ups are ranked by
+    fitness & the worst 'cut_fraction' of them are stopped, freezing the fitness of their pawns.
+    The others keep running for the rest of the frame budget.
+
+    Stopped match ups & the frames they didn't simulate are counted per generation, see 'end_generation'.
+    """
+
+    checkpoints: tuple = DEFAULT_CHECKPOINTS
+    cut_fraction: float = DEFAULT_CUT_FRACTION
+
+    stopped: int = 0
+    saved_frames: int = 0
+
+    # Counts of the last finished generation & of the whole run.
+    last_stopped: int = 0
+    last_saved_frames: int = 0
+    last_budget: int = 0
+    total_saved_frames: int = 0
+    total_budget: int = 0
+
+    def __init__(self, checkpoints: tuple = DEFAULT_CHECKPOINTS, cut_fraction: float = DEFAULT_CUT_FRACTION):
+        assert all(0 < c < 1 for c in checkpoints), 'Racing checkpoints MUST be fractions of the game length.'
+        assert 0 < cut_fraction < 1, 'Racing MUST stop a fraction of the match ups.'
+
+        self.checkpoints = tuple(sorted(checkpoints))
+        self.cut_fraction = cut_fraction
+
+    def is_checkpoint(self, frame: int, max_game_length: int) -> bool:
+        """Whether the match ups are raced once 'frame' frames of a generation were simulated."""
+        if max_game_length <= 0 or frame <= 0:
+            return False
+
+        return any(frame == round(c * max_game_length) for c in self.checkpoints)
+
+    def race(self, match_ups: List[MatchUp], frame: int, max_game_length: int) -> List[MatchUp]:
+        """Stops the worst running match ups. Returns the stopped ones."""
+        running = [match_up for match_up in match_ups if match_up.is_still_going()]
+        cut = int(len(running) * self.cut_fraction)
+
+        if cut == 0:
+            return []
+
+        # Stable, so ties are broken by match up order (seeded runs stay reproducible).
+        stopped = sorted(running, key=get_race_fitness)[:cut]
+
+        for match_up in stopped:
+            match_up.stop()
+
+        self.stopped += cut
+        self.saved_frames += cut * (max_game_length - frame)
+        return stopped
+
+    def end_generation(self, budget: int):
+        """
+        Args:
+            budget: Match up frames the generation could have simulated (match ups * max game length).
+        """
+
+        self.last_stopped = self.stopped
+        self.last_saved_frames = self.saved_frames
+        self.last_budget = budget
+        self.total_saved_frames += self.saved_frames
+        self.total_budget += budget
+        self.stopped = 0
+        self.saved_frames = 0
+
+    def build_report(self) -> str:
+        """Frames saved in the last finished generation."""
+        return 'Racing: %i match ups stopped | %i match up frames saved (%.1f%%) | Overall: %.1f%%' % (
+            self.last_stopped,
+            self.last_saved_frames,
+            self.last_saved_frames / max(1, self.last_budget) * 100,
+            self.total_saved_frames / max(1, self.total_budget) * 100
+        )
@@ -0,0 +1,16 @@
+import numpy as np
+import random
+
+# Used instead of the wall clock delta time by seeded (deterministic) environments.
+FIXED_DELTA_TIME = 0.01796913
+
+
+def derive_seed(*keys: int) -> int:
+    """Derives an independent seed from a master seed & any amount of stream keys."""
+    return int(np.random.SeedSequence(list(keys)).generate_state(1)[0])
+
+
+def seed_globals(seed: int):
+    """Seeds the global 'random' & 'np.random' states (network init, selection & mutation)."""
+    random.seed(seed)
+    np.random.seed(derive_seed(seed))
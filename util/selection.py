@@ -0,0 +1,97 @@
+import numpy as np
+
+ROULETTE = 'roulette'
+TOURNAMENT = 'tournament'
+RANK = 'rank'
+
+SELECTION_STRATEGIES = (ROULETTE, TOURNAMENT, RANK)
+
+TOURNAMENT_SIZE = 3
+
+
+class SelectionEngine:
+    """
+    Samples parents out of a single snapshot of a generation's fitnesses.
+
+    Roulette (fitness proportional) selection builds a cumulative distribution once,
+    so every parent is a binary search ('searchsorted') of a uniform sample.
+    Rank & tournament selection invert their distribution over the ranking in closed form.
+    """
+
+    fitnesses: np.ndarray
+    strategy: str = ROULETTE
+    tournament_size: int = TOURNAMENT_SIZE
+
+    # Unnormalized cumulative selection weights (None if selection is uniform).
+    cdf: np.ndarray = None
+
+    # Indices from fittest to least fit, computed on first use.
+    order: np.ndarray = None
+
+    def __init__(self, fitnesses: np.ndarray, strategy: str = ROULETTE,
+                 tournament_size: int = TOURNAMENT_SIZE):
+        assert strategy in SELECTION_STRATEGIES, 'Unknown selection strategy %s.' % strategy
+        assert len(fitnesses) > 0, 'Selection needs at least one fitness.'
+
+        self.fitnesses = np.asarray(fitnesses, dtype=float)
+        self.strategy = strategy
+        self.tournament_size = tournament_size
+
+        if strategy == ROULETTE:
+            cdf = np.cumsum(self.fitnesses)
+
+            # Without any positive fitness, every index is equally likely.
+            self.cdf = cdf if cdf[-1] > 0 else None
+
+    def ranking(self) -> np.ndarray:
+        """Indices ordered from fittest to least fit."""
+        if self.order is None:
+            self.order = np.argsort(-self.fitnesses)
+
+        return self.order
+
+    def best(self) -> int:
+        """Index of the fittest (first if tied)."""
+        return int(np.argmax(self.fitnesses))
+
+    def sample_roulette(self, count: int) -> np.ndarray:
+        if self.cdf is None:
+            return np.random.randint(0, high=self.fitnesses.size, size=count)
+
+        # Sorted queries keep the binary searches cache friendly.
+        # Sorting & shuffling i.i.d. samples leaves their distribution unchanged.
+        u = np.sort(np.random.random(count))
+        picks = np.searchsorted(self.cdf, u * self.cdf[-1], side='right')
+        np.random.shuffle(picks)
+
+        return picks
+
+    def sample_rank(self, count: int) -> np.ndarray:
+        """
+        Ranking position p (0 is the fittest) has weight n - p, so the weight of all
+        positions before p is W(p) = p * n - p * (p - 1) / 2. Solves W(p) = t for p.
+        """
+        size = self.fitnesses.size
+        b = 2 * size + 1
+        t = np.random.random(count) * (size * (size + 1) / 2)
+
+        positions = ((b - np.sqrt(b * b - 8 * t)) / 2).astype(int)
+        return self.ranking()[np.minimum(positions, size - 1)]
+
+    def sample_tournament(self, count: int) -> np.ndarray:
+        """The best of k uniform ranks in [0, n) is floor(n * U^(1/k)) (0 is the least fit)."""
+        size = self.fitnesses.size
+        ranks = (size * np.random.random(count) **
+                 (1 / self.tournament_size)).astype(int)
+
+        return self.ranking()[size - 1 - ranks]
+
+    def sample(self, count: int) -> np.ndarray:
+        """Returns 'count' selected indices (with replacement)."""
+        if self.strategy == RANK:
+            return self.sample_rank(count)
+
+        if self.strategy == TOURNAMENT:
+            return self.sample_tournament(count)
+
+        return self.sample_roulette(count)
@@ -0,0 +1,168 @@
+from util.geometry import *
+from typing import Dict
+import numpy as np
+import math
+
+# Actors wrap once they are further offscreen than their outward bound (at most the default of 50).
+DEFAULT_BOUND = 50
+
+DEFAULT_CELL_SIZE = 50
+
+
+class SpatialHash:
+    """
+    Uniform grid over the wrapping screen, mapping cells to the items positioned in them.
+
+    'Actor.dist_squared' does not measure a true torus distance: it is the smaller of the raw
+    distance squared & its difference to WRAP_DIST_SQUARED. So everything within a radius of a
+    position lies either in the disc around it, or in the thin ring at the wrap distance.
+    Queries return the items of every occupied cell touching either, to be filtered exactly by the caller.
+
+    Items are kept in insertion order per cell & carry an order key, so callers can visit
+    candidates in the same order as a linear scan would (see 'sort').
+    """
+
+    cell_size: float = DEFAULT_CELL_SIZE
+    bound: float = DEFAULT_BOUND
+    columns: int = 0
+    rows: int = 0
+
+    cells: Dict[int, Dict[object, None]] = None
+    item_cells: Dict[object, int] = None
+    keys: Dict[object, object] = None
+
+    # Items per cell, so queries can skip empty cells at once.
+    counts: np.ndarray = None
+
+    # Raw distance squared beyond which a disc covers every cell.
+    max_dist_squared: float = 0
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE, bound: float = DEFAULT_BOUND):
+        self.cell_size = cell_size
+        self.bound = bound
+        self.columns = int(math.ceil((SCREEN_WIDTH + 2 * bound) / cell_size))
+        self.rows = int(math.ceil((SCREEN_HEIGHT + 2 * bound) / cell_size))
+
+        self.cells = dict()
+        self.item_cells = dict()
+        self.keys = dict()
+        self.counts = np.zeros(self.columns * self.rows, dtype=np.int64)
+
+        # Cell rectangles, flattened row by row.
+        col, row = np.meshgrid(np.arange(self.columns), np.arange(self.rows))
+        self.x0 = col.ravel() * cell_size - bound
+        self.y0 = row.ravel() * cell_size - bound
+        self.x1 = self.x0 + cell_size
+        self.y1 = self.y0 + cell_size
+
+        self.max_dist_squared = (self.columns * cell_size) ** 2 + \
+            (self.rows * cell_size) ** 2
+
+    def __len__(self):
+        return len(self.item_cells)
+
+    def cell_of(self, pos) -> int:
+        col = int((pos[0] + self.bound) // self.cell_size)
+        row = int((pos[1] + self.bound) // self.cell_size)
+
+        col = min(max(col, 0), self.columns - 1)
+        row = min(max(row, 0), self.rows - 1)
+
+        return row * self.columns + col
+
+    def clear(self):
+        self.cells.clear()
+        self.item_cells.clear()
+        self.keys.clear()
+        self.counts[:] = 0
+
+    def insert(self, item, pos, key=None):
+        """Adds the item at the given position, or moves it there if it's already contained (keeping its key)."""
+        if item in self.item_cells:
+            return self.move(item, pos)
+
+        cell = self.cell_of(pos)
+        self.cells.setdefault(cell, dict())[item] = None
+        self.item_cells[item] = cell
+        self.keys[item] = key
+        self.counts[cell] += 1
+
+    def move(self, item, pos):
+        cell = self.cell_of(pos)
+        old = self.item_cells[item]
+
+        if cell == old:
+            return
+
+        del self.cells[old][item]
+        self.counts[old] -= 1
+        self.cells.setdefault(cell, dict())[item] = None
+        self.item_cells[item] = cell
+        self.counts[cell] += 1
+
+    def remove(self, item):
+        """Removes the item (if contained)."""
+        cell = self.item_cells.pop(item, None)
+        if cell is None:
+            return
+
+        del self.cells[cell][item]
+        del self.keys[item]
+        self.counts[cell] -= 1
+
+    def sort(self, items: list) -> list:
+        """Orders the given items by their keys."""
+        return sorted(items, key=self.keys.__getitem__)
+
+    def min_dist_squared(self, pos) -> np.ndarray:
+        """Raw distance squared from the position to the closest point of every cell."""
+        dx = np.maximum(0, np.maximum(self.x0 - pos[0], pos[0] - self.x1))
+        dy = np.maximum(0, np.maximum(self.y0 - pos[1], pos[1] - self.y1))
+        return dx * dx + dy * dy
+
+    def max_dist_squared_to(self, pos) -> np.ndarray:
+        """Raw distance squared from the position to the furthest point of every cell."""
+        dx = np.maximum(np.abs(self.x0 - pos[0]), np.abs(self.x1 - pos[0]))
+        dy = np.maximum(np.abs(self.y0 - pos[1]), np.abs(self.y1 - pos[1]))
+        return dx * dx + dy * dy
+
+    def cells_within(self, pos, radius_squared: float) -> np.ndarray:
+        """Returns every occupied cell that may hold a point within the donut-compensated radius."""
+        near = self.min_dist_squared(pos)
+        mask = near <= radius_squared
+
+        if radius_squared < self.max_dist_squared:
+            far = self.max_dist_squared_to(pos)
+            mask |= (near <= WRAP_DIST_SQUARED + radius_squared) & \
+                (far >= WRAP_DIST_SQUARED - radius_squared)
+
+        return np.flatnonzero(mask & (self.counts > 0))
+
+    def query(self, pos, radius_squared: float) -> list:
+        """
+        Returns every item that may be within the donut-compensated radius of the position, ordered by key.
+        Contains at least all items for which 'Actor.dist_squared' is within the radius.
+        """
+        cells = self.cells
+        items = []
+
+        for cell in self.cells_within(pos, radius_squared).tolist():
+            items.extend(cells[cell])
+
+        return self.sort(items)
+
+    def cells_by_distance(self, pos, padding: float = 0):
+        """
+        Yields (cell items, raw distance squared lower bound) of every occupied cell, closest first.
+        'padding' is subtracted from the distances (for items reaching out of their cell).
+        """
+        occupied = np.flatnonzero(self.counts > 0)
+        if occupied.size == 0:
+            return
+
+        dist = np.sqrt(self.min_dist_squared(pos)[occupied]) - padding
+        dist = np.maximum(dist, 0) ** 2
+        order = np.argsort(dist, kind='stable')
+
+        for cell, d in zip(occupied[order].tolist(), dist[order].tolist()):
+            yield self.cells[cell], d
@@ -2,7 +2,7 @@
 from actors.actor import *
 from typing import Tuple
 
-import arcade
+import util.colors as colors
 
 """
 External Base Variables:
@@ -52,8 +52,8 @@ class StatBias:
     short_attack_cooldown: float
     long_attack_cooldown: float
 
-    short_attack_color = arcade.color.BLUE
-    long_attack_color = arcade.color.RED
+    short_attack_color = colors.BLUE
+    long_attack_color = colors.RED
 
 
 class Normal(StatBias):
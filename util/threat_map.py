@@ -0,0 +1,119 @@
+from actors.laser import *
+from typing import List
+import numpy as np
+import math
+
+# Moves tested by 'DynamicController.set_optimal_move', in the order they are tried.
+CANDIDATE_MOVES = [(i, j) for i in range(-1, 2) for j in range(-1, 2)]
+
+# How far each candidate move is looked ahead.
+CANDIDATE_OFFSETS = np.array(
+    [(i * BODY_RADIUS * 1.5, j * BODY_RADIUS * 1.5) for i, j in CANDIDATE_MOVES])
+
+
+def get_laser_rays(lasers: list) -> np.ndarray:
+    """
+    (L, 4) array of every laser's head (x, y) & the end of its path (x, y), computed exactly
+    like 'Laser.get_dist_if_in_path' does (trig once per laser, instead of once per tested circle).
+    """
+
+    rays = np.empty((len(lasers), 4))
+
+    laser: Laser
+    for i, laser in enumerate(lasers):
+        cos = math.cos(laser.direc)
+        sin = math.sin(laser.direc)
+        hx = laser.pos[0] + cos * LENGTH
+        hy = laser.pos[1] + sin * LENGTH
+
+        rays[i] = (hx, hy, hx + cos * SCREEN_WIDTH, hy + sin * SCREEN_HEIGHT)
+
+    return rays
+
+
+def get_dists_if_in_paths(cx, cy, rays: np.ndarray, r: float) -> np.ndarray:
+    """
+    Vectorized 'Laser.get_dist_if_in_path' for circles at (cx, cy) & laser rays (see 'get_laser_rays'),
+    broadcast against each other.
+    """
+
+    ex = rays[..., 0]
+    ey = rays[..., 1]
+    dx = rays[..., 2] - ex
+    dy = rays[..., 3] - ey
+    fx = ex - cx
+    fy = ey - cy
+
+    a = dx * dx + dy * dy
+    b = 2 * (fx * dx + fy * dy)
+    c = fx * fx + fy * fy - r * r
+
+    discriminant = b * b - 4 * a * c
+
+    # Note: the y term is measured against cx, matching Laser.
+    dy = ey - cx
+    return np.where(discriminant >= 0, fx * fx + dy * dy, -1)
+
+
+class ThreatMap:
+    """
+    Batched threat evaluation of 'DynamicController.set_optimal_move'.
+
+    Every queued pawn position is expanded into its 9 candidate moves, which are tested against
+    every laser ray queued with it in a single pass. The threat of a move is its worst
+    (largest) 'Laser.get_dist_if_in_path' over those lasers.
+    """
+
+    positions: list = None
+    laser_lists: list = None
+
+    def __init__(self):
+        self.positions = []
+        self.laser_lists = []
+
+    def __len__(self):
+        return len(self.positions)
+
+    def add(self, pos, lasers: list) -> int:
+        """Queues a pawn position & the lasers threatening it. Returns its index in 'evaluate'."""
+        self.positions.append((pos[0], pos[1]))
+        self.laser_lists.append(lasers)
+        return len(self.positions) - 1
+
+    def evaluate(self, r: float = BODY_RADIUS) -> List[np.ndarray]:
+        """
+        Returns:
+            For every queued position, the (9,) threats of CANDIDATE_MOVES (None if it had no lasers).
+        """
+
+        counts = np.array([len(lasers) for lasers in self.laser_lists], dtype=np.int64)
+        threats = [None] * len(self.positions)
+
+        if counts.sum() == 0:
+            return threats
+
+        rays = get_laser_rays(
+            [laser for lasers in self.laser_lists for laser in lasers])
+
+        # (positions, 9, 2) candidate positions & the position each ray was queued with.
+        candidates = np.array(self.positions)[:, None, :] + CANDIDATE_OFFSETS
+
+        if len(self.positions) == 1:
+            threats[0] = get_dists_if_in_paths(
+                candidates[0, :, 0], candidates[0, :, 1], rays[:, None, :], r).max(axis=0)
+            return threats
+
+        owners = np.repeat(np.arange(len(self.positions)), counts)
+
+        # (rays, 9) distances, reduced to the worst distance of each queued position.
+        dists = get_dists_if_in_paths(
+            candidates[owners, :, 0], candidates[owners, :, 1], rays[:, None, :], r)
+
+        threatened = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[threatened]
+        worst = np.maximum.reduceat(dists, starts, axis=0)
+
+        for i, row in zip(threatened.tolist(), worst):
+            threats[i] = row
+
+        return threats
@@ -4,7 +4,7 @@ from main import EXIT_STR
 
 print('\nWhich population history would you like to visualize?\n')
 
-print(Population.list_all_saved())
+print(Population.list_all_saved(include_history=True))
 
 while True:
     name = input('Choice (or exit): ')
@@ -13,19 +13,33 @@ while True:
         print('Exiting...')
         exit()
 
-    if Population.is_valid_population_directory(name):
+    if Population.has_history(name):
         break
     else:
         print('\nInvalid choice.\n')
 
-pop = Population.load_from_dir(name)
+log = GenerationLog(os.path.join(POPULATION_DIRECTORY, name, HISTORY_DIRECTORY))
 
-plt.plot(
-    pop.generational_fitnesses,
-    label=pop.dir_name
-)
+if GenerationLog.exists(log.directory):
+    # Columns are memory mapped & downsampled, so even huge histories plot at once.
+    generations = log.read('generation')
+
+    for column, label in (('max', 'Max'), ('median', 'Median'), ('mean', 'Mean')):
+        x, y = downsample_min_max(log.read(column))
+        plt.plot(generations[x], y, label='%s (%s)' % (name, label))
+
+    plt.ylabel('Fitness')
+else:
+    # Populations saved before the generation log only kept their max fitness.
+    pop = Population.load_from_dir(name)
+
+    plt.plot(
+        *downsample_min_max(np.array(pop.generational_fitnesses)),
+        label=pop.dir_name
+    )
+
+    plt.ylabel('Max Fitness')
 
 plt.xlabel('Generation')
-plt.ylabel('Max Fitness')
 plt.legend()
 plt.show()